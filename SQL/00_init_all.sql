@@ -12,6 +12,9 @@ USE rjgc;
 
 SET sql_mode = 'ONLY_FULL_GROUP_BY,STRICT_TRANS_TABLES,ERROR_FOR_DIVISION_BY_ZERO,NO_ENGINE_SUBSTITUTION';
 
+-- 全文索引不使用默认英文停用词表（ngram分词下包含停用词字符的词元会被整体丢弃）
+SET SESSION innodb_ft_enable_stopword = OFF;
+
 -- ==============================================
 -- 2. 创建表结构
 -- ==============================================
@@ -34,6 +37,13 @@ CREATE TABLE IF NOT EXISTS sys_user (
     INDEX idx_role (role)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='用户基础信息表';
 
+-- For id generation
+CREATE TABLE IF NOT EXISTS sys_id_counter (
+    name VARCHAR(32) NOT NULL COMMENT '计数器名称（user/doc/entity/export/summary）',
+    next_val BIGINT NOT NULL DEFAULT 0 COMMENT '最近一次分配的序号',
+    PRIMARY KEY (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='ID序号计数器表';
+
 -- For document
 CREATE TABLE IF NOT EXISTS doc_document (
     doc_id VARCHAR(32) NOT NULL COMMENT '唯一文档ID（UUID生成）',
@@ -48,21 +58,45 @@ CREATE TABLE IF NOT EXISTS doc_document (
     is_deleted TINYINT DEFAULT 0 COMMENT '逻辑删除：0-未删除，1-已删除',
     PRIMARY KEY (doc_id),
     FOREIGN KEY (user_id) REFERENCES sys_user (user_id) ON DELETE CASCADE ON UPDATE CASCADE,
-    INDEX idx_user_deleted (user_id, is_deleted),
+    INDEX idx_user_active_date (user_id, is_deleted, upload_date DESC, title, author, file_size, file_format, category),
     INDEX idx_title (title),
-    INDEX idx_author (author)
+    INDEX idx_author (author),
+    FULLTEXT INDEX ft_title (title) WITH PARSER ngram,
+    FULLTEXT INDEX ft_author (author) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='文档元信息表';
 
+-- 文档统计汇总（由doc_document上的触发器维护，统计查询无需扫描文档表）
+CREATE TABLE IF NOT EXISTS doc_document_stats (
+    user_id VARCHAR(32) NOT NULL COMMENT '用户ID（关联sys_user.user_id）',
+    total_docs INT NOT NULL DEFAULT 0 COMMENT '文档总数',
+    active_docs INT NOT NULL DEFAULT 0 COMMENT '未删除文档数',
+    deleted_docs INT NOT NULL DEFAULT 0 COMMENT '已删除文档数',
+    total_size BIGINT NOT NULL DEFAULT 0 COMMENT '文档总大小（单位：字节）',
+    PRIMARY KEY (user_id),
+    FOREIGN KEY (user_id) REFERENCES sys_user (user_id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='文档统计汇总表（触发器维护）';
+
+CREATE TABLE IF NOT EXISTS doc_category_presence (
+    user_id VARCHAR(32) NOT NULL COMMENT '用户ID（关联sys_user.user_id）',
+    category VARCHAR(50) NOT NULL COMMENT '文档分类',
+    doc_count INT NOT NULL DEFAULT 0 COMMENT '该分类下的文档数',
+    PRIMARY KEY (user_id, category),
+    FOREIGN KEY (user_id) REFERENCES sys_user (user_id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='用户文档分类表（触发器维护，用于统计分类数）';
+
 CREATE TABLE IF NOT EXISTS doc_summary (
     summary_id VARCHAR(32) NOT NULL COMMENT '唯一摘要ID（UUID生成）',
     doc_id VARCHAR(32) NOT NULL COMMENT '关联文档ID（关联doc_document.doc_id）',
     content TEXT NOT NULL COMMENT '摘要内容（若过长可存文件，此处存核心摘要）',
     length_type VARCHAR(10) NOT NULL COMMENT '摘要长度类型：short/medium/long',
     generate_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '生成时间',
+    user_id VARCHAR(32) DEFAULT NULL COMMENT '所属用户ID（与doc_document.user_id同步，由触发器维护）',
+    is_deleted TINYINT NOT NULL DEFAULT 0 COMMENT '所属文档是否已删除（与doc_document.is_deleted同步，由触发器维护）',
     PRIMARY KEY (summary_id),
     FOREIGN KEY (doc_id) REFERENCES doc_document (doc_id) ON DELETE CASCADE ON UPDATE CASCADE,
     INDEX idx_doc_id (doc_id),
-    INDEX idx_length_type (length_type)
+    INDEX idx_summary_length_time (length_type, is_deleted, generate_time DESC),
+    FULLTEXT INDEX ft_content (content) WITH PARSER ngram
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='文档摘要表';
 
 CREATE TABLE IF NOT EXISTS doc_tag (
@@ -83,11 +117,13 @@ CREATE TABLE IF NOT EXISTS doc_entity (
     name VARCHAR(255) NOT NULL COMMENT '实体名称',
     type VARCHAR(50) NOT NULL COMMENT '实体类型：algorithm/model/dataset/metric/task/method/person/organization/location/date/other',
     create_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
+    is_deleted TINYINT NOT NULL DEFAULT 0 COMMENT '所属文档是否已删除（与doc_document.is_deleted同步，由触发器维护）',
     PRIMARY KEY (entity_id),
     FOREIGN KEY (doc_id) REFERENCES doc_document (doc_id) ON DELETE CASCADE ON UPDATE CASCADE,
-    INDEX idx_doc_id (doc_id),
-    INDEX idx_name (name),
-    INDEX idx_type (type)
+    INDEX idx_doc_entity (doc_id, name),
+    INDEX idx_entity_name_doc (name, doc_id),
+    INDEX idx_type (type),
+    INDEX idx_entity_active_type (is_deleted, type)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='文档实体表';
 
 CREATE TABLE IF NOT EXISTS entity_relation (
@@ -195,6 +231,139 @@ CREATE TABLE IF NOT EXISTS sys_table_metadata (
     UNIQUE KEY uk_table_name (table_name)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='表元数据表';
 
+-- 文档统计汇总维护触发器
+-- 删除用户时级联删除的文档不会触发触发器，汇总行随外键一并级联删除
+DELIMITER //
+CREATE TRIGGER IF NOT EXISTS tr_doc_document_stats_insert
+AFTER INSERT ON doc_document
+FOR EACH ROW
+BEGIN
+    INSERT INTO doc_document_stats (user_id, total_docs, active_docs, deleted_docs, total_size)
+    VALUES (NEW.user_id, 1, NEW.is_deleted <=> 0, NEW.is_deleted <=> 1, NEW.file_size)
+    ON DUPLICATE KEY UPDATE
+        total_docs = total_docs + 1,
+        active_docs = active_docs + (NEW.is_deleted <=> 0),
+        deleted_docs = deleted_docs + (NEW.is_deleted <=> 1),
+        total_size = total_size + NEW.file_size;
+    
+    IF NEW.category IS NOT NULL THEN
+        INSERT INTO doc_category_presence (user_id, category, doc_count)
+        VALUES (NEW.user_id, NEW.category, 1)
+        ON DUPLICATE KEY UPDATE doc_count = doc_count + 1;
+    END IF;
+END//
+
+CREATE TRIGGER IF NOT EXISTS tr_doc_document_stats_delete
+AFTER DELETE ON doc_document
+FOR EACH ROW
+BEGIN
+    UPDATE doc_document_stats
+    SET total_docs = total_docs - 1,
+        active_docs = active_docs - (OLD.is_deleted <=> 0),
+        deleted_docs = deleted_docs - (OLD.is_deleted <=> 1),
+        total_size = total_size - OLD.file_size
+    WHERE user_id = OLD.user_id;
+    
+    IF OLD.category IS NOT NULL THEN
+        UPDATE doc_category_presence
+        SET doc_count = doc_count - 1
+        WHERE user_id = OLD.user_id AND category = OLD.category;
+        
+        DELETE FROM doc_category_presence
+        WHERE user_id = OLD.user_id AND category = OLD.category AND doc_count <= 0;
+    END IF;
+END//
+
+CREATE TRIGGER IF NOT EXISTS tr_doc_document_stats_update
+AFTER UPDATE ON doc_document
+FOR EACH ROW
+BEGIN
+    -- 按"移出旧行、计入新行"处理，覆盖软删除、恢复、修改大小及更换用户
+    IF NOT (OLD.user_id <=> NEW.user_id AND OLD.is_deleted <=> NEW.is_deleted
+            AND OLD.file_size <=> NEW.file_size) THEN
+        UPDATE doc_document_stats
+        SET total_docs = total_docs - 1,
+            active_docs = active_docs - (OLD.is_deleted <=> 0),
+            deleted_docs = deleted_docs - (OLD.is_deleted <=> 1),
+            total_size = total_size - OLD.file_size
+        WHERE user_id = OLD.user_id;
+        
+        INSERT INTO doc_document_stats (user_id, total_docs, active_docs, deleted_docs, total_size)
+        VALUES (NEW.user_id, 1, NEW.is_deleted <=> 0, NEW.is_deleted <=> 1, NEW.file_size)
+        ON DUPLICATE KEY UPDATE
+            total_docs = total_docs + 1,
+            active_docs = active_docs + (NEW.is_deleted <=> 0),
+            deleted_docs = deleted_docs + (NEW.is_deleted <=> 1),
+            total_size = total_size + NEW.file_size;
+    END IF;
+    
+    IF NOT (OLD.user_id <=> NEW.user_id AND OLD.category <=> NEW.category) THEN
+        IF OLD.category IS NOT NULL THEN
+            UPDATE doc_category_presence
+            SET doc_count = doc_count - 1
+            WHERE user_id = OLD.user_id AND category = OLD.category;
+            
+            DELETE FROM doc_category_presence
+            WHERE user_id = OLD.user_id AND category = OLD.category AND doc_count <= 0;
+        END IF;
+        
+        IF NEW.category IS NOT NULL THEN
+            INSERT INTO doc_category_presence (user_id, category, doc_count)
+            VALUES (NEW.user_id, NEW.category, 1)
+            ON DUPLICATE KEY UPDATE doc_count = doc_count + 1;
+        END IF;
+    END IF;
+END//
+DELIMITER ;
+
+-- 实体表冗余的文档删除标记维护触发器，实体查询无需关联文档表判断文档是否已删除
+DELIMITER //
+CREATE TRIGGER IF NOT EXISTS tr_doc_entity_deleted_insert
+BEFORE INSERT ON doc_entity
+FOR EACH ROW
+BEGIN
+    SET NEW.is_deleted = COALESCE(
+        (SELECT is_deleted FROM doc_document WHERE doc_id = NEW.doc_id), 0);
+END//
+
+CREATE TRIGGER IF NOT EXISTS tr_doc_document_entity_deleted
+AFTER UPDATE ON doc_document
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.is_deleted <=> NEW.is_deleted) THEN
+        UPDATE doc_entity
+        SET is_deleted = COALESCE(NEW.is_deleted, 0)
+        WHERE doc_id = NEW.doc_id;
+    END IF;
+END//
+DELIMITER ;
+
+-- 摘要表冗余的文档所属用户与删除标记维护触发器，摘要查询无需关联文档表判断文档是否已删除
+DELIMITER //
+CREATE TRIGGER IF NOT EXISTS tr_doc_summary_deleted_insert
+BEFORE INSERT ON doc_summary
+FOR EACH ROW
+BEGIN
+    DECLARE doc_user_id VARCHAR(32);
+    DECLARE doc_deleted TINYINT;
+    SELECT user_id, is_deleted INTO doc_user_id, doc_deleted
+    FROM doc_document WHERE doc_id = NEW.doc_id;
+    SET NEW.user_id = doc_user_id;
+    SET NEW.is_deleted = COALESCE(doc_deleted, 0);
+END//
+
+CREATE TRIGGER IF NOT EXISTS tr_doc_document_summary_deleted
+AFTER UPDATE ON doc_document
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.is_deleted <=> NEW.is_deleted) OR NOT (OLD.user_id <=> NEW.user_id) THEN
+        UPDATE doc_summary
+        SET is_deleted = COALESCE(NEW.is_deleted, 0), user_id = NEW.user_id
+        WHERE doc_id = NEW.doc_id;
+    END IF;
+END//
+DELIMITER ;
+
 -- ==============================================
 -- 3. 初始化字段元数据
 -- ==============================================
@@ -1,3 +1,6 @@
+-- 全文索引不使用默认英文停用词表（ngram分词下包含停用词字符的词元会被整体丢弃）
+SET SESSION innodb_ft_enable_stopword = OFF;
+
 -- For user
 CREATE TABLE IF NOT EXISTS sys_user (
     user_id VARCHAR(32) NOT NULL COMMENT '唯一用户ID（UUID生成）',
@@ -18,6 +21,14 @@ CREATE TABLE IF NOT EXISTS sys_user (
     INDEX idx_role (role)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='用户基础信息表';
 
+-- For id generation
+CREATE TABLE IF NOT EXISTS sys_id_counter (
+    name VARCHAR(32) NOT NULL COMMENT '计数器名称（user/doc/entity/export/summary）',
+    next_val BIGINT NOT NULL DEFAULT 0 COMMENT '最近一次分配的序号',
+    -- 约束
+    PRIMARY KEY (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='ID序号计数器表（替代按正则扫描最大ID）';
+
 -- For document
 CREATE TABLE IF NOT EXISTS doc_document (
     doc_id VARCHAR(32) NOT NULL COMMENT '唯一文档ID（UUID生成）',
@@ -34,23 +45,49 @@ CREATE TABLE IF NOT EXISTS doc_document (
     PRIMARY KEY (doc_id),
     FOREIGN KEY (user_id) REFERENCES sys_user (user_id) ON DELETE CASCADE ON UPDATE CASCADE,
     -- 索引（优化文档列表查询、检索功能）
-    INDEX idx_user_deleted (user_id, is_deleted), -- 用户查询自己的未删除文档
+    -- 用户文档列表：按上传时间倒序的覆盖索引，列表查询只读索引、无需额外排序（主键doc_id隐含在二级索引中）
+    INDEX idx_user_active_date (user_id, is_deleted, upload_date DESC, title, author, file_size, file_format, category),
     INDEX idx_title (title), -- 按标题检索文档
-    INDEX idx_author (author) -- 按作者检索文档
+    INDEX idx_author (author), -- 按作者检索文档
+    FULLTEXT INDEX ft_title (title) WITH PARSER ngram, -- 标题关键词全文检索（ngram分词支持中文）
+    FULLTEXT INDEX ft_author (author) WITH PARSER ngram -- 作者关键词全文检索
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='文档元信息表';
 
 
+-- 文档统计汇总（由doc_document上的触发器维护，统计查询无需扫描文档表）
+CREATE TABLE IF NOT EXISTS doc_document_stats (
+    user_id VARCHAR(32) NOT NULL COMMENT '用户ID（关联sys_user.user_id）',
+    total_docs INT NOT NULL DEFAULT 0 COMMENT '文档总数',
+    active_docs INT NOT NULL DEFAULT 0 COMMENT '未删除文档数',
+    deleted_docs INT NOT NULL DEFAULT 0 COMMENT '已删除文档数',
+    total_size BIGINT NOT NULL DEFAULT 0 COMMENT '文档总大小（单位：字节）',
+    PRIMARY KEY (user_id),
+    FOREIGN KEY (user_id) REFERENCES sys_user (user_id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='文档统计汇总表（触发器维护）';
+
+CREATE TABLE IF NOT EXISTS doc_category_presence (
+    user_id VARCHAR(32) NOT NULL COMMENT '用户ID（关联sys_user.user_id）',
+    category VARCHAR(50) NOT NULL COMMENT '文档分类',
+    doc_count INT NOT NULL DEFAULT 0 COMMENT '该分类下的文档数',
+    PRIMARY KEY (user_id, category),
+    FOREIGN KEY (user_id) REFERENCES sys_user (user_id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='用户文档分类表（触发器维护，用于统计分类数）';
+
 CREATE TABLE IF NOT EXISTS doc_summary (
     summary_id VARCHAR(32) NOT NULL COMMENT '唯一摘要ID（UUID生成）',
     doc_id VARCHAR(32) NOT NULL COMMENT '关联文档ID（关联doc_document.doc_id）',
     content TEXT NOT NULL COMMENT '摘要内容（若过长可存文件，此处存核心摘要）',
     length_type VARCHAR(10) NOT NULL COMMENT '摘要长度类型：short/medium/long',
     generate_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '生成时间',
+    user_id VARCHAR(32) DEFAULT NULL COMMENT '所属用户ID（与doc_document.user_id同步，由触发器维护）',
+    is_deleted TINYINT NOT NULL DEFAULT 0 COMMENT '所属文档是否已删除（与doc_document.is_deleted同步，由触发器维护）',
     -- 约束
     PRIMARY KEY (summary_id),
     FOREIGN KEY (doc_id) REFERENCES doc_document (doc_id) ON DELETE CASCADE ON UPDATE CASCADE,
     -- 索引（优化文档-摘要关联查询）
-    UNIQUE KEY uk_doc_id (doc_id) -- 一篇文档对应一条摘要，避免重复
+    UNIQUE KEY uk_doc_id (doc_id), -- 一篇文档对应一条摘要，避免重复
+    INDEX idx_summary_length_time (length_type, is_deleted, generate_time DESC), -- 按长度类型列出未删除文档的最新摘要，无需filesort
+    FULLTEXT INDEX ft_content (content) WITH PARSER ngram -- 摘要内容关键词全文检索
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='文档摘要表';
 
 CREATE TABLE IF NOT EXISTS doc_tag (
@@ -74,12 +111,15 @@ CREATE TABLE IF NOT EXISTS doc_entity (
     name VARCHAR(100) NOT NULL COMMENT '实体名称（如：BART模型、TF-IDF算法）',
     type VARCHAR(50) NOT NULL COMMENT '实体类型：算法/数据集/任务/公式等',
     recognize_time DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '识别时间',
+    is_deleted TINYINT NOT NULL DEFAULT 0 COMMENT '所属文档是否已删除（与doc_document.is_deleted同步，由触发器维护）',
     -- 约束
     PRIMARY KEY (entity_id),
     FOREIGN KEY (doc_id) REFERENCES doc_document (doc_id) ON DELETE CASCADE ON UPDATE CASCADE,
     -- 索引（优化实体查询、图谱关联）
     INDEX idx_doc_entity (doc_id, name),
-    INDEX idx_entity_type (type) -- 按实体类型筛选
+    INDEX idx_entity_name_doc (name, doc_id), -- 按实体名称查找文档（覆盖索引）
+    INDEX idx_entity_type (type), -- 按实体类型筛选
+    INDEX idx_entity_active_type (is_deleted, type) -- 未删除文档中的实体类型（松散索引扫描）
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='文档实体表（关联Neo4j图谱）';
 
 CREATE TABLE IF NOT EXISTS sys_operation_log (
@@ -181,8 +221,9 @@ CREATE TABLE IF NOT EXISTS doc_export (
     PRIMARY KEY (export_id),
     FOREIGN KEY (user_id) REFERENCES sys_user (user_id) ON DELETE CASCADE ON UPDATE CASCADE,
     -- 索引（优化导出查询）
-    INDEX idx_user_status (user_id, status),
-    INDEX idx_create_time (create_time),
+    INDEX idx_export_user_status_time (user_id, status, create_time DESC, download_count, file_size), -- 按状态筛选的用户导出列表，无需filesort；同时覆盖按用户的导出统计
+    INDEX idx_export_user_time (user_id, create_time DESC), -- 不筛选状态的用户导出列表
+    INDEX idx_export_cleanup (status, create_time, download_count, file_size), -- 清理旧导出任务；同时覆盖全局导出统计
     INDEX idx_export_type (export_type)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='文档导出管理表';
 
@@ -330,6 +371,139 @@ BEGIN
 END//
 DELIMITER ;
 
+-- 文档统计汇总维护触发器
+-- 删除用户时级联删除的文档不会触发触发器，汇总行随外键一并级联删除
+DELIMITER //
+CREATE TRIGGER IF NOT EXISTS tr_doc_document_stats_insert
+AFTER INSERT ON doc_document
+FOR EACH ROW
+BEGIN
+    INSERT INTO doc_document_stats (user_id, total_docs, active_docs, deleted_docs, total_size)
+    VALUES (NEW.user_id, 1, NEW.is_deleted <=> 0, NEW.is_deleted <=> 1, NEW.file_size)
+    ON DUPLICATE KEY UPDATE
+        total_docs = total_docs + 1,
+        active_docs = active_docs + (NEW.is_deleted <=> 0),
+        deleted_docs = deleted_docs + (NEW.is_deleted <=> 1),
+        total_size = total_size + NEW.file_size;
+    
+    IF NEW.category IS NOT NULL THEN
+        INSERT INTO doc_category_presence (user_id, category, doc_count)
+        VALUES (NEW.user_id, NEW.category, 1)
+        ON DUPLICATE KEY UPDATE doc_count = doc_count + 1;
+    END IF;
+END//
+
+CREATE TRIGGER IF NOT EXISTS tr_doc_document_stats_delete
+AFTER DELETE ON doc_document
+FOR EACH ROW
+BEGIN
+    UPDATE doc_document_stats
+    SET total_docs = total_docs - 1,
+        active_docs = active_docs - (OLD.is_deleted <=> 0),
+        deleted_docs = deleted_docs - (OLD.is_deleted <=> 1),
+        total_size = total_size - OLD.file_size
+    WHERE user_id = OLD.user_id;
+    
+    IF OLD.category IS NOT NULL THEN
+        UPDATE doc_category_presence
+        SET doc_count = doc_count - 1
+        WHERE user_id = OLD.user_id AND category = OLD.category;
+        
+        DELETE FROM doc_category_presence
+        WHERE user_id = OLD.user_id AND category = OLD.category AND doc_count <= 0;
+    END IF;
+END//
+
+CREATE TRIGGER IF NOT EXISTS tr_doc_document_stats_update
+AFTER UPDATE ON doc_document
+FOR EACH ROW
+BEGIN
+    -- 按"移出旧行、计入新行"处理，覆盖软删除、恢复、修改大小及更换用户
+    IF NOT (OLD.user_id <=> NEW.user_id AND OLD.is_deleted <=> NEW.is_deleted
+            AND OLD.file_size <=> NEW.file_size) THEN
+        UPDATE doc_document_stats
+        SET total_docs = total_docs - 1,
+            active_docs = active_docs - (OLD.is_deleted <=> 0),
+            deleted_docs = deleted_docs - (OLD.is_deleted <=> 1),
+            total_size = total_size - OLD.file_size
+        WHERE user_id = OLD.user_id;
+        
+        INSERT INTO doc_document_stats (user_id, total_docs, active_docs, deleted_docs, total_size)
+        VALUES (NEW.user_id, 1, NEW.is_deleted <=> 0, NEW.is_deleted <=> 1, NEW.file_size)
+        ON DUPLICATE KEY UPDATE
+            total_docs = total_docs + 1,
+            active_docs = active_docs + (NEW.is_deleted <=> 0),
+            deleted_docs = deleted_docs + (NEW.is_deleted <=> 1),
+            total_size = total_size + NEW.file_size;
+    END IF;
+    
+    IF NOT (OLD.user_id <=> NEW.user_id AND OLD.category <=> NEW.category) THEN
+        IF OLD.category IS NOT NULL THEN
+            UPDATE doc_category_presence
+            SET doc_count = doc_count - 1
+            WHERE user_id = OLD.user_id AND category = OLD.category;
+            
+            DELETE FROM doc_category_presence
+            WHERE user_id = OLD.user_id AND category = OLD.category AND doc_count <= 0;
+        END IF;
+        
+        IF NEW.category IS NOT NULL THEN
+            INSERT INTO doc_category_presence (user_id, category, doc_count)
+            VALUES (NEW.user_id, NEW.category, 1)
+            ON DUPLICATE KEY UPDATE doc_count = doc_count + 1;
+        END IF;
+    END IF;
+END//
+DELIMITER ;
+
+-- 实体表冗余的文档删除标记维护触发器，实体查询无需关联文档表判断文档是否已删除
+DELIMITER //
+CREATE TRIGGER IF NOT EXISTS tr_doc_entity_deleted_insert
+BEFORE INSERT ON doc_entity
+FOR EACH ROW
+BEGIN
+    SET NEW.is_deleted = COALESCE(
+        (SELECT is_deleted FROM doc_document WHERE doc_id = NEW.doc_id), 0);
+END//
+
+CREATE TRIGGER IF NOT EXISTS tr_doc_document_entity_deleted
+AFTER UPDATE ON doc_document
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.is_deleted <=> NEW.is_deleted) THEN
+        UPDATE doc_entity
+        SET is_deleted = COALESCE(NEW.is_deleted, 0)
+        WHERE doc_id = NEW.doc_id;
+    END IF;
+END//
+DELIMITER ;
+
+-- 摘要表冗余的文档所属用户与删除标记维护触发器，摘要查询无需关联文档表判断文档是否已删除
+DELIMITER //
+CREATE TRIGGER IF NOT EXISTS tr_doc_summary_deleted_insert
+BEFORE INSERT ON doc_summary
+FOR EACH ROW
+BEGIN
+    DECLARE doc_user_id VARCHAR(32);
+    DECLARE doc_deleted TINYINT;
+    SELECT user_id, is_deleted INTO doc_user_id, doc_deleted
+    FROM doc_document WHERE doc_id = NEW.doc_id;
+    SET NEW.user_id = doc_user_id;
+    SET NEW.is_deleted = COALESCE(doc_deleted, 0);
+END//
+
+CREATE TRIGGER IF NOT EXISTS tr_doc_document_summary_deleted
+AFTER UPDATE ON doc_document
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.is_deleted <=> NEW.is_deleted) OR NOT (OLD.user_id <=> NEW.user_id) THEN
+        UPDATE doc_summary
+        SET is_deleted = COALESCE(NEW.is_deleted, 0), user_id = NEW.user_id
+        WHERE doc_id = NEW.doc_id;
+    END IF;
+END//
+DELIMITER ;
+
 -- ============================================
 -- 存储过程：批量更新字段元数据
 -- ============================================
@@ -0,0 +1,36 @@
+-- 已有数据库的实体删除标记迁移脚本：为doc_entity增加与所属文档同步的is_deleted列
+-- 新建库直接使用ForCreate.sql / 00_init_all.sql，无需执行本脚本
+-- 请在停止写入的情况下执行，避免回填期间的软删除未同步到实体
+
+USE rjgc;
+
+ALTER TABLE doc_entity
+    ADD COLUMN is_deleted TINYINT NOT NULL DEFAULT 0 COMMENT '所属文档是否已删除（与doc_document.is_deleted同步，由触发器维护）',
+    ADD INDEX idx_entity_active_type (is_deleted, type);
+
+-- 实体表冗余的文档删除标记维护触发器，实体查询无需关联文档表判断文档是否已删除
+DELIMITER //
+CREATE TRIGGER IF NOT EXISTS tr_doc_entity_deleted_insert
+BEFORE INSERT ON doc_entity
+FOR EACH ROW
+BEGIN
+    SET NEW.is_deleted = COALESCE(
+        (SELECT is_deleted FROM doc_document WHERE doc_id = NEW.doc_id), 0);
+END//
+
+CREATE TRIGGER IF NOT EXISTS tr_doc_document_entity_deleted
+AFTER UPDATE ON doc_document
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.is_deleted <=> NEW.is_deleted) THEN
+        UPDATE doc_entity
+        SET is_deleted = COALESCE(NEW.is_deleted, 0)
+        WHERE doc_id = NEW.doc_id;
+    END IF;
+END//
+DELIMITER ;
+
+-- 按所属文档回填删除标记
+UPDATE doc_entity e
+JOIN doc_document d ON e.doc_id = d.doc_id
+SET e.is_deleted = COALESCE(d.is_deleted, 0);
@@ -0,0 +1,47 @@
+-- 已有数据库的索引迁移脚本
+-- 新建库直接使用ForCreate.sql / 00_init_all.sql，无需执行本脚本
+
+USE rjgc;
+
+-- 全文索引不使用默认英文停用词表（ngram分词下包含停用词字符的词元会被整体丢弃）
+SET SESSION innodb_ft_enable_stopword = OFF;
+
+-- 文档标题/作者关键词全文检索（ngram分词支持中文，MATCH的列需与索引列完全一致，故分别建索引）
+-- InnoDB一次只能新建一个全文索引
+ALTER TABLE doc_document ADD FULLTEXT INDEX ft_title (title) WITH PARSER ngram;
+ALTER TABLE doc_document ADD FULLTEXT INDEX ft_author (author) WITH PARSER ngram;
+
+-- 按实体名称查找文档（覆盖索引，多实体同时匹配时逐文档判断）
+ALTER TABLE doc_entity ADD INDEX idx_entity_name_doc (name, doc_id);
+
+-- 以下仅适用于由00_init_all.sql创建的库（ForCreate.sql已包含idx_doc_entity）
+-- ALTER TABLE doc_entity ADD INDEX idx_doc_entity (doc_id, name), DROP INDEX idx_doc_id, DROP INDEX idx_name;
+
+-- 用户文档列表覆盖索引（按上传时间倒序），替代原idx_user_deleted（新索引前缀同样满足user_id外键）
+ALTER TABLE doc_document
+    ADD INDEX idx_user_active_date (user_id, is_deleted, upload_date DESC, title, author, file_size, file_format, category),
+    DROP INDEX idx_user_deleted;
+
+-- 用户导出列表（按创建时间倒序，可选按状态筛选）与旧导出清理，替代原idx_user_status/idx_create_time
+-- 以下仅适用于由ForCreate.sql创建的库（00_init_all.sql中的doc_export没有create_time列）
+ALTER TABLE doc_export
+    ADD INDEX idx_export_user_status_time (user_id, status, create_time DESC),
+    ADD INDEX idx_export_user_time (user_id, create_time DESC),
+    ADD INDEX idx_export_cleanup (status, create_time),
+    DROP INDEX idx_user_status,
+    DROP INDEX idx_create_time;
+
+-- 按长度类型列出最新摘要
+ALTER TABLE doc_summary ADD INDEX idx_summary_length_time (length_type, generate_time DESC);
+-- 由00_init_all.sql创建的库可同时删除被新索引前缀覆盖的idx_length_type
+-- ALTER TABLE doc_summary DROP INDEX idx_length_type;
+
+-- 摘要内容关键词全文检索（ngram分词支持中文）
+ALTER TABLE doc_summary ADD FULLTEXT INDEX ft_content (content) WITH PARSER ngram;
+
+-- 导出统计覆盖索引：在列表/清理索引末尾加上统计用到的列，统计查询只读索引无需回表
+ALTER TABLE doc_export
+    DROP INDEX idx_export_user_status_time,
+    ADD INDEX idx_export_user_status_time (user_id, status, create_time DESC, download_count, file_size),
+    DROP INDEX idx_export_cleanup,
+    ADD INDEX idx_export_cleanup (status, create_time, download_count, file_size);
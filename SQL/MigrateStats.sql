@@ -0,0 +1,121 @@
+-- 已有数据库的文档统计汇总表迁移脚本
+-- 新建库直接使用ForCreate.sql / 00_init_all.sql，无需执行本脚本
+-- 请在停止写入的情况下执行，避免回填与触发器之间的并发写入被重复或遗漏计数
+
+USE rjgc;
+
+-- 文档统计汇总（由doc_document上的触发器维护，统计查询无需扫描文档表）
+CREATE TABLE IF NOT EXISTS doc_document_stats (
+    user_id VARCHAR(32) NOT NULL COMMENT '用户ID（关联sys_user.user_id）',
+    total_docs INT NOT NULL DEFAULT 0 COMMENT '文档总数',
+    active_docs INT NOT NULL DEFAULT 0 COMMENT '未删除文档数',
+    deleted_docs INT NOT NULL DEFAULT 0 COMMENT '已删除文档数',
+    total_size BIGINT NOT NULL DEFAULT 0 COMMENT '文档总大小（单位：字节）',
+    PRIMARY KEY (user_id),
+    FOREIGN KEY (user_id) REFERENCES sys_user (user_id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='文档统计汇总表（触发器维护）';
+
+CREATE TABLE IF NOT EXISTS doc_category_presence (
+    user_id VARCHAR(32) NOT NULL COMMENT '用户ID（关联sys_user.user_id）',
+    category VARCHAR(50) NOT NULL COMMENT '文档分类',
+    doc_count INT NOT NULL DEFAULT 0 COMMENT '该分类下的文档数',
+    PRIMARY KEY (user_id, category),
+    FOREIGN KEY (user_id) REFERENCES sys_user (user_id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='用户文档分类表（触发器维护，用于统计分类数）';
+
+-- 文档统计汇总维护触发器
+-- 删除用户时级联删除的文档不会触发触发器，汇总行随外键一并级联删除
+DELIMITER //
+CREATE TRIGGER IF NOT EXISTS tr_doc_document_stats_insert
+AFTER INSERT ON doc_document
+FOR EACH ROW
+BEGIN
+    INSERT INTO doc_document_stats (user_id, total_docs, active_docs, deleted_docs, total_size)
+    VALUES (NEW.user_id, 1, NEW.is_deleted <=> 0, NEW.is_deleted <=> 1, NEW.file_size)
+    ON DUPLICATE KEY UPDATE
+        total_docs = total_docs + 1,
+        active_docs = active_docs + (NEW.is_deleted <=> 0),
+        deleted_docs = deleted_docs + (NEW.is_deleted <=> 1),
+        total_size = total_size + NEW.file_size;
+    
+    IF NEW.category IS NOT NULL THEN
+        INSERT INTO doc_category_presence (user_id, category, doc_count)
+        VALUES (NEW.user_id, NEW.category, 1)
+        ON DUPLICATE KEY UPDATE doc_count = doc_count + 1;
+    END IF;
+END//
+
+CREATE TRIGGER IF NOT EXISTS tr_doc_document_stats_delete
+AFTER DELETE ON doc_document
+FOR EACH ROW
+BEGIN
+    UPDATE doc_document_stats
+    SET total_docs = total_docs - 1,
+        active_docs = active_docs - (OLD.is_deleted <=> 0),
+        deleted_docs = deleted_docs - (OLD.is_deleted <=> 1),
+        total_size = total_size - OLD.file_size
+    WHERE user_id = OLD.user_id;
+    
+    IF OLD.category IS NOT NULL THEN
+        UPDATE doc_category_presence
+        SET doc_count = doc_count - 1
+        WHERE user_id = OLD.user_id AND category = OLD.category;
+        
+        DELETE FROM doc_category_presence
+        WHERE user_id = OLD.user_id AND category = OLD.category AND doc_count <= 0;
+    END IF;
+END//
+
+CREATE TRIGGER IF NOT EXISTS tr_doc_document_stats_update
+AFTER UPDATE ON doc_document
+FOR EACH ROW
+BEGIN
+    -- 按"移出旧行、计入新行"处理，覆盖软删除、恢复、修改大小及更换用户
+    IF NOT (OLD.user_id <=> NEW.user_id AND OLD.is_deleted <=> NEW.is_deleted
+            AND OLD.file_size <=> NEW.file_size) THEN
+        UPDATE doc_document_stats
+        SET total_docs = total_docs - 1,
+            active_docs = active_docs - (OLD.is_deleted <=> 0),
+            deleted_docs = deleted_docs - (OLD.is_deleted <=> 1),
+            total_size = total_size - OLD.file_size
+        WHERE user_id = OLD.user_id;
+        
+        INSERT INTO doc_document_stats (user_id, total_docs, active_docs, deleted_docs, total_size)
+        VALUES (NEW.user_id, 1, NEW.is_deleted <=> 0, NEW.is_deleted <=> 1, NEW.file_size)
+        ON DUPLICATE KEY UPDATE
+            total_docs = total_docs + 1,
+            active_docs = active_docs + (NEW.is_deleted <=> 0),
+            deleted_docs = deleted_docs + (NEW.is_deleted <=> 1),
+            total_size = total_size + NEW.file_size;
+    END IF;
+    
+    IF NOT (OLD.user_id <=> NEW.user_id AND OLD.category <=> NEW.category) THEN
+        IF OLD.category IS NOT NULL THEN
+            UPDATE doc_category_presence
+            SET doc_count = doc_count - 1
+            WHERE user_id = OLD.user_id AND category = OLD.category;
+            
+            DELETE FROM doc_category_presence
+            WHERE user_id = OLD.user_id AND category = OLD.category AND doc_count <= 0;
+        END IF;
+        
+        IF NEW.category IS NOT NULL THEN
+            INSERT INTO doc_category_presence (user_id, category, doc_count)
+            VALUES (NEW.user_id, NEW.category, 1)
+            ON DUPLICATE KEY UPDATE doc_count = doc_count + 1;
+        END IF;
+    END IF;
+END//
+DELIMITER ;
+
+-- 按现有文档回填汇总数据
+REPLACE INTO doc_document_stats (user_id, total_docs, active_docs, deleted_docs, total_size)
+SELECT user_id, COUNT(*), SUM(is_deleted <=> 0), SUM(is_deleted <=> 1), SUM(file_size)
+FROM doc_document
+GROUP BY user_id;
+
+REPLACE INTO doc_category_presence (user_id, category, doc_count)
+SELECT user_id, category, COUNT(*)
+FROM doc_document
+WHERE category IS NOT NULL
+GROUP BY user_id, category;
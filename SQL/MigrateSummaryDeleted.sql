@@ -0,0 +1,42 @@
+-- 已有数据库的摘要冗余字段迁移脚本：为doc_summary增加与所属文档同步的user_id、is_deleted列
+-- 新建库直接使用ForCreate.sql / 00_init_all.sql，无需执行本脚本
+-- 请在停止写入的情况下执行，避免回填期间的软删除未同步到摘要
+
+USE rjgc;
+
+ALTER TABLE doc_summary
+    ADD COLUMN user_id VARCHAR(32) DEFAULT NULL COMMENT '所属用户ID（与doc_document.user_id同步，由触发器维护）',
+    ADD COLUMN is_deleted TINYINT NOT NULL DEFAULT 0 COMMENT '所属文档是否已删除（与doc_document.is_deleted同步，由触发器维护）',
+    DROP INDEX idx_summary_length_time,
+    ADD INDEX idx_summary_length_time (length_type, is_deleted, generate_time DESC);
+
+-- 摘要表冗余的文档所属用户与删除标记维护触发器，摘要查询无需关联文档表判断文档是否已删除
+DELIMITER //
+CREATE TRIGGER IF NOT EXISTS tr_doc_summary_deleted_insert
+BEFORE INSERT ON doc_summary
+FOR EACH ROW
+BEGIN
+    DECLARE doc_user_id VARCHAR(32);
+    DECLARE doc_deleted TINYINT;
+    SELECT user_id, is_deleted INTO doc_user_id, doc_deleted
+    FROM doc_document WHERE doc_id = NEW.doc_id;
+    SET NEW.user_id = doc_user_id;
+    SET NEW.is_deleted = COALESCE(doc_deleted, 0);
+END//
+
+CREATE TRIGGER IF NOT EXISTS tr_doc_document_summary_deleted
+AFTER UPDATE ON doc_document
+FOR EACH ROW
+BEGIN
+    IF NOT (OLD.is_deleted <=> NEW.is_deleted) OR NOT (OLD.user_id <=> NEW.user_id) THEN
+        UPDATE doc_summary
+        SET is_deleted = COALESCE(NEW.is_deleted, 0), user_id = NEW.user_id
+        WHERE doc_id = NEW.doc_id;
+    END IF;
+END//
+DELIMITER ;
+
+-- 按所属文档回填用户与删除标记
+UPDATE doc_summary s
+JOIN doc_document d ON s.doc_id = d.doc_id
+SET s.user_id = d.user_id, s.is_deleted = COALESCE(d.is_deleted, 0);
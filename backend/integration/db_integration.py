@@ -122,22 +122,7 @@ class DatabaseIntegration:
         if not entities:
             return {"success": True, "message": "无实体需要存储", "count": 0}
         
-        # 转换格式：NLP输出 -> 数据库格式
-        db_entities = []
-        for entity in entities:
-            db_entities.append({
-                "name": entity.get("text", entity.get("name", "")),
-                "type": self._map_entity_type(entity.get("type", "UNKNOWN"))
-            })
-        
-        # 去重
-        seen = set()
-        unique_entities = []
-        for e in db_entities:
-            key = (e["name"], e["type"])
-            if key not in seen:
-                seen.add(key)
-                unique_entities.append(e)
+        unique_entities = self._to_db_entities(entities)
         
         # 批量存储
         try:
@@ -157,6 +142,35 @@ class DatabaseIntegration:
                 "count": 0
             }
     
+    def _to_db_entities(self, entities: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """
+        将NLP识别的实体转换为数据库格式并去重
+        
+        Args:
+            entities: NLP识别的实体列表
+            
+        Returns:
+            去重后的实体列表，每个实体包含name和type字段
+        """
+        # 转换格式：NLP输出 -> 数据库格式
+        db_entities = []
+        for entity in entities:
+            db_entities.append({
+                "name": entity.get("text", entity.get("name", "")),
+                "type": self._map_entity_type(entity.get("type", "UNKNOWN"))
+            })
+        
+        # 去重
+        seen = set()
+        unique_entities = []
+        for e in db_entities:
+            key = (e["name"], e["type"])
+            if key not in seen:
+                seen.add(key)
+                unique_entities.append(e)
+        
+        return unique_entities
+    
     def _map_entity_type(self, nlp_type: str) -> str:
         """
         将NLP实体类型映射到数据库类型
@@ -339,12 +353,13 @@ class DatabaseIntegration:
         }
         
         try:
-            # 1. 创建文档记录
+            # 1. 创建文档记录，实体与文档在同一事务中写入
             doc_result = self.create_document(
                 user_id=user_id,
                 title=title,
                 file_path=file_path,
                 file_size=file_size,
+                entities=self._to_db_entities(entities) if entities else None,
                 **doc_kwargs
             )
             
@@ -355,12 +370,8 @@ class DatabaseIntegration:
             doc_id = doc_result.get('doc_id')
             result['doc_id'] = doc_id
             
-            # 2. 存储实体
-            if entities:
-                entity_result = self.store_entities(doc_id, entities)
-                result['entities_stored'] = entity_result.get('count', 0)
-                if not entity_result.get('success'):
-                    result['errors'].append(f"实体存储失败: {entity_result.get('message')}")
+            # 2. 实体已随文档一起存储
+            result['entities_stored'] = len(doc_result.get('entity_ids', []))
             
             # 3. 存储摘要
             if summary:
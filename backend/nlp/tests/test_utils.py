@@ -3,6 +3,7 @@ import sys
 import os
 import tempfile
 import shutil
+import json
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -80,6 +81,18 @@ class TestUtils:
         assert isinstance(ngrams, list)
         assert len(ngrams) == 2
     
+    def test_summarize_text_short_input(self, monkeypatch):
+        """测试单句及分句失败时的文本摘要"""
+        text = "This is a long enough sentence for extraction."
+        
+        # 只有一个句子时原样返回
+        monkeypatch.setattr(TextUtils, "extract_sentences", staticmethod(lambda t: [t]))
+        assert TextUtils.summarize_text(text) == text
+        
+        # 分句失败（无句子）时返回前100个字符
+        monkeypatch.setattr(TextUtils, "extract_sentences", staticmethod(lambda t: []))
+        assert TextUtils.summarize_text(text * 5) == (text * 5)[:100]
+    
     def test_error_handler(self):
         """测试错误处理功能"""
         error_handler = ErrorHandler()
@@ -97,6 +110,55 @@ class TestUtils:
             assert error_response["status"] == "error"
             assert "测试错误" in error_response["message"]
     
+    def test_error_handler_responses(self):
+        """测试不同错误类型的响应内容"""
+        error_handler = ErrorHandler()
+        
+        # 测试文件错误按异常类型匹配建议
+        response = error_handler.handle_file_error(FileNotFoundError("missing.pdf"))
+        assert list(response.keys()) == ["status", "message", "details", "suggestion"]
+        assert response["message"] == "文件未找到: missing.pdf"
+        assert response["suggestion"] == "请检查文件路径是否正确"
+        
+        # 子类异常匹配到父类规则
+        response = error_handler.handle_file_error(NotADirectoryError("docs"))
+        assert response["message"] == "文件操作失败: docs"
+        
+        # 未命中规则时使用默认消息
+        response = error_handler.handle_model_error(KeyError("bart"))
+        assert response["message"].startswith("模型处理失败")
+        assert response["suggestion"] == "请稍后重试或联系技术支持"
+        assert response["details"]["error_type"] == "KeyError"
+        
+        # 上下文记录为出错时的快照，之后修改原字典不影响响应；无上下文时为空字典
+        context = {"doc_id": "D001"}
+        response = error_handler.handle_api_error(ValueError("bad"), context)
+        context["doc_id"] = "D002"
+        assert response["details"]["context"] == {"doc_id": "D001"}
+        assert error_handler.handle_api_error(ValueError("bad"))["details"]["context"] == {}
+        
+        # 错误响应可直接序列化为JSON
+        response = error_handler.create_error_response(ValueError("x"), context={"k": 1})
+        assert json.loads(json.dumps(response))["details"]["context"] == {"k": 1}
+    
+    def test_error_retry_policy(self):
+        """测试错误可恢复性与重试判断"""
+        error_handler = ErrorHandler()
+        
+        # 可恢复错误（包括子类）
+        assert error_handler.is_recoverable_error(ValueError("bad")) is True
+        assert error_handler.is_recoverable_error(UnicodeDecodeError("utf-8", b"\xff", 0, 1, "bad")) is True
+        assert error_handler.is_recoverable_error(RuntimeError("fatal")) is False
+        
+        # 网络错误可重试但不可恢复
+        assert error_handler.is_recoverable_error(ConnectionResetError()) is False
+        assert error_handler.should_retry(ConnectionResetError()) is True
+        assert error_handler.should_retry(TimeoutError()) is True
+        assert error_handler.should_retry(RuntimeError("fatal")) is False
+        
+        # 超过最大重试次数
+        assert error_handler.should_retry(ValueError("bad"), max_retries=3, current_retries=3) is False
+    
     def test_config_manager(self):
         """测试配置管理功能"""
         config_manager = ConfigManager()
@@ -143,6 +205,64 @@ class TestUtils:
         os.remove(temp_file_path)
         assert not os.path.exists(temp_file_path)
     
+    def test_read_file_content(self):
+        """测试文件内容读取功能"""
+        file_utils = FileUtils()
+        temp_dir = tempfile.mkdtemp()
+        
+        try:
+            # 多字节字符与不同换行符
+            file_path = os.path.join(temp_dir, "content.txt")
+            with open(file_path, 'wb') as file:
+                file.write("第一行\r\n第二行\rthird\n".encode("utf-8") * 1000)
+            
+            with open(file_path, 'r', encoding='utf-8') as file:
+                expected = file.read()
+            assert file_utils.read_file_content(file_path) == expected
+            
+            # 目录和不存在的文件返回空字符串
+            assert file_utils.read_file_content(temp_dir) == ""
+            assert file_utils.read_file_content(os.path.join(temp_dir, "missing.txt")) == ""
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_stat_cache_invalidation(self):
+        """测试文件修改后stat缓存失效"""
+        file_utils = FileUtils()
+        temp_dir = tempfile.mkdtemp()
+        
+        try:
+            file_path = os.path.join(temp_dir, "cached.txt")
+            assert file_utils.write_file_content(file_path, "abc") is True
+            assert file_utils.get_file_info(file_path)["size"] == 3
+            
+            # 通过FileUtils写入后立即能看到新的大小
+            assert file_utils.write_file_content(file_path, "abcdef") is True
+            assert file_utils.get_file_info(file_path)["size"] == 6
+            assert file_utils.get_file_size_formatted(file_path, "B") == 6
+            
+            # 删除后不再被视为有效文件
+            assert file_utils.delete_file(file_path) is True
+            assert file_utils.validate_file_path(file_path) is False
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_write_after_directory_removed(self):
+        """测试目录被外部删除后仍能重新创建并写入"""
+        file_utils = FileUtils()
+        temp_dir = tempfile.mkdtemp()
+        
+        try:
+            file_path = os.path.join(temp_dir, "out", "result.txt")
+            assert file_utils.write_file_content(file_path, "first") is True
+            
+            # 外部删除已缓存的目录
+            shutil.rmtree(os.path.join(temp_dir, "out"))
+            assert file_utils.write_file_content(file_path, "second") is True
+            assert file_utils.read_file_content(file_path) == "second"
+        finally:
+            shutil.rmtree(temp_dir)
+    
     def test_file_validation(self):
         """测试文件验证功能"""
         file_utils = FileUtils()
@@ -161,6 +281,198 @@ class TestUtils:
         # 验证结果
         assert is_valid is False
     
+    def test_copy_and_move_file(self):
+        """测试文件复制与移动功能"""
+        file_utils = FileUtils()
+        temp_dir = tempfile.mkdtemp()
+        
+        try:
+            # 准备源文件
+            src_path = os.path.join(temp_dir, "source.bin")
+            content = os.urandom(3 * 1024 * 1024 + 7)
+            with open(src_path, 'wb') as file:
+                file.write(content)
+            
+            # 测试复制到不存在的目录
+            copy_path = os.path.join(temp_dir, "copy", "target.bin")
+            assert file_utils.copy_file(src_path, copy_path) is True
+            with open(copy_path, 'rb') as file:
+                assert file.read() == content
+            assert os.stat(copy_path).st_mode == os.stat(src_path).st_mode
+            
+            # 测试移动文件
+            move_path = os.path.join(temp_dir, "move", "target.bin")
+            assert file_utils.move_file(copy_path, move_path) is True
+            assert not os.path.exists(copy_path)
+            with open(move_path, 'rb') as file:
+                assert file.read() == content
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_copy_and_move_file_edge_cases(self):
+        """测试复制到自身及以目录为目标的复制与移动"""
+        file_utils = FileUtils()
+        temp_dir = tempfile.mkdtemp()
+        
+        try:
+            src_path = os.path.join(temp_dir, "source.txt")
+            with open(src_path, 'wb') as file:
+                file.write(b"hello")
+            
+            # 复制到自身时失败且不破坏源文件
+            assert file_utils.copy_file(src_path, src_path) is False
+            with open(src_path, 'rb') as file:
+                assert file.read() == b"hello"
+            
+            # 目标为已存在的目录时复制到该目录下
+            copy_dir = os.path.join(temp_dir, "copy")
+            os.makedirs(copy_dir)
+            assert file_utils.copy_file(src_path, copy_dir) is True
+            with open(os.path.join(copy_dir, "source.txt"), 'rb') as file:
+                assert file.read() == b"hello"
+            
+            # 目标为已存在的目录时移动到该目录下
+            move_dir = os.path.join(temp_dir, "move")
+            os.makedirs(move_dir)
+            assert file_utils.move_file(src_path, move_dir) is True
+            assert not os.path.exists(src_path)
+            with open(os.path.join(move_dir, "source.txt"), 'rb') as file:
+                assert file.read() == b"hello"
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_list_files(self):
+        """测试目录文件列举功能"""
+        file_utils = FileUtils()
+        temp_dir = tempfile.mkdtemp()
+        
+        try:
+            # 构造嵌套目录结构
+            for name in ["a.PDF", "b.txt", ".hidden", os.path.join("sub", "c.pdf")]:
+                path = os.path.join(temp_dir, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                open(path, 'w').close()
+            
+            # 无过滤时返回全部文件
+            all_files = file_utils.list_files(temp_dir)
+            assert len(all_files) == 4
+            
+            # 扩展名过滤不区分大小写，且兼容带点/不带点写法
+            pdf_files = sorted(file_utils.list_files(temp_dir, [".pdf"]))
+            assert pdf_files == sorted([
+                os.path.join(temp_dir, "a.PDF"),
+                os.path.join(temp_dir, "sub", "c.pdf")
+            ])
+            assert sorted(file_utils.list_files(temp_dir, ["PDF"])) == pdf_files
+            
+            # 不存在的目录
+            assert file_utils.list_files(os.path.join(temp_dir, "missing")) == []
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_file_type_detection(self):
+        """测试PDF和图像文件识别功能"""
+        file_utils = FileUtils()
+        temp_dir = tempfile.mkdtemp()
+        
+        try:
+            samples = {
+                "doc.bin": b"%PDF-1.7\n",
+                "image.dat": b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR",
+                "photo.jpg": b"\xff\xd8\xff\xe0\x00\x10JFIF",
+                "anim.webp": b"RIFF\x00\x00\x00\x00WEBPVP8 ",
+                "fake.pdf": b"plain text",
+            }
+            for name, header in samples.items():
+                with open(os.path.join(temp_dir, name), 'wb') as file:
+                    file.write(header)
+            
+            # 按文件头识别，而不是按扩展名
+            assert file_utils.is_pdf_file(os.path.join(temp_dir, "doc.bin")) is True
+            assert file_utils.is_pdf_file(os.path.join(temp_dir, "fake.pdf")) is False
+            assert file_utils.is_image_file(os.path.join(temp_dir, "image.dat")) is True
+            assert file_utils.is_image_file(os.path.join(temp_dir, "photo.jpg")) is True
+            assert file_utils.is_image_file(os.path.join(temp_dir, "anim.webp")) is True
+            assert file_utils.is_image_file(os.path.join(temp_dir, "doc.bin")) is False
+            
+            # 目录和不存在的路径
+            assert file_utils.is_pdf_file(temp_dir) is False
+            assert file_utils.is_image_file(os.path.join(temp_dir, "missing.png")) is False
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_batch_tokenization(self):
+        """测试批量分词功能"""
+        text_utils = TextUtils()
+        
+        texts = ["This is a test.", "", "这是一个测试文本", None]
+        results = text_utils.tokenize_texts(texts, batch_size=2)
+        
+        # 验证结果与输入一一对应，并与单条分词一致
+        assert len(results) == len(texts)
+        assert results[0] == text_utils.tokenize_text(texts[0])
+        assert results[1] == []
+        assert results[2] == text_utils.tokenize_text(texts[2])
+        assert results[3] == []
+    
+    def test_ngram_ranking(self):
+        """测试N-grams按频率排序"""
+        text_utils = TextUtils()
+        
+        # 中文按字符分词：甲乙出现3次，乙甲出现2次，乙丙出现1次
+        ngrams = text_utils.extract_ngrams("甲乙甲乙甲乙丙", n=2, num_ngrams=3)
+        assert ngrams == ["甲 乙", "乙 甲", "乙 丙"]
+        
+        # 同频时按首次出现顺序
+        assert text_utils.extract_ngrams("甲乙丙丁", n=2, num_ngrams=2) == ["甲 乙", "乙 丙"]
+        
+        # 词数不足N时返回空列表
+        assert text_utils.extract_ngrams("甲", n=2) == []
+    
+    def test_batch_extract_keywords(self):
+        """测试批量关键词提取功能"""
+        text_utils = TextUtils()
+        
+        docs = ["这是第一个测试文本", "另一个测试文档内容", ""]
+        expected = [text_utils.extract_keywords(doc, num_keywords=3) for doc in docs]
+        
+        # 串行与多进程结果一致且顺序不变
+        assert text_utils.batch_extract_keywords(docs, num_keywords=3) == expected
+        assert text_utils.batch_extract_keywords(docs, num_keywords=3, n_process=2, chunksize=1) == expected
+        assert text_utils.batch_extract_keywords([]) == []
+    
+    def test_clean_and_tokenize_cache(self):
+        """测试清洗和分词结果缓存"""
+        text_utils = TextUtils()
+        
+        text = "<p>缓存测试文本，包含标点！</p>"
+        assert text_utils.clean_text(text) == text_utils.clean_text(text) == "缓存测试文本包含标点"
+        
+        # 修改返回的分词结果不影响后续调用
+        tokens = text_utils.tokenize_text("缓存测试")
+        tokens.append("额外")
+        assert text_utils.tokenize_text("缓存测试") == ["缓", "存", "测", "试"]
+    
+    def test_tokenize_pre_cleaned(self):
+        """测试已清洗文本的快速分词路径"""
+        text_utils = TextUtils()
+        
+        assert text_utils.tokenize_text("quick brown fox", pre_cleaned=True) == ["quick", "brown", "fox"]
+        assert text_utils.tokenize_text("自然语言", pre_cleaned=True) == ["自", "然", "语", "言"]
+        
+        cleaned = text_utils.clean_text("这是一个测试，包含标点！")
+        assert text_utils.tokenize_text(cleaned, pre_cleaned=True) == text_utils.tokenize_text(cleaned)
+    
+    def test_extract_entities_from_text(self):
+        """测试单次扫描的实体提取"""
+        text_utils = TextUtils()
+        
+        entities = text_utils.extract_entities_from_text("Alice Smith joined Acme LLC on 12/03/2024 at Baker Street.")
+        assert set(entities["persons"]) == {"Alice Smith", "Acme", "Baker Street"}
+        assert set(entities["organizations"]) == {"Alice Smith", "Acme LLC", "Baker Street"}
+        assert entities["locations"] == ["Baker Street"]
+        assert entities["dates"] == ["12/03/2024"]
+    
     def test_text_processing_pipeline(self):
         """测试文本处理管道"""
         text_utils = TextUtils()
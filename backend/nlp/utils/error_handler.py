@@ -1,11 +1,71 @@
 import logging
-from typing import Dict, Any, Optional
+import time
+import functools
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Tuple
 import traceback
 
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 通用的兜底建议
+_DEFAULT_SUGGESTION = "请稍后重试或联系技术支持"
+
+# 各类错误的 (异常类型, 消息前缀, 处理建议) 规则表，按顺序匹配
+_OCR_ERROR_RULES = (
+    (FileNotFoundError, "文件未找到", "请检查文件路径是否正确"),
+    (PermissionError, "文件权限不足", "请检查文件权限设置"),
+    (ValueError, "无效的输入参数", "请检查输入参数是否正确"),
+)
+_OCR_ERROR_DEFAULT = ("OCR处理失败", _DEFAULT_SUGGESTION)
+
+_MODEL_ERROR_RULES = (
+    (ImportError, "模型依赖缺失", "请安装必要的依赖包"),
+    (RuntimeError, "模型运行时错误", "请检查模型配置和输入数据"),
+    (MemoryError, "内存不足", "请减少输入数据量或增加内存"),
+)
+_MODEL_ERROR_DEFAULT = ("模型处理失败", _DEFAULT_SUGGESTION)
+
+_API_ERROR_RULES = (
+    (ValueError, "无效的API参数", "请检查API参数是否正确"),
+    (TypeError, "API参数类型错误", "请检查参数类型"),
+    (AttributeError, "API对象属性错误", "请检查对象属性和方法"),
+)
+_API_ERROR_DEFAULT = ("API处理失败", _DEFAULT_SUGGESTION)
+
+_FILE_ERROR_RULES = (
+    (FileNotFoundError, "文件未找到", "请检查文件路径是否正确"),
+    (PermissionError, "文件权限不足", "请检查文件权限设置"),
+    (IsADirectoryError, "路径是目录而不是文件", "请提供正确的文件路径"),
+    (OSError, "文件操作失败", "请检查文件系统状态"),
+)
+_FILE_ERROR_DEFAULT = ("文件处理失败", _DEFAULT_SUGGESTION)
+
+# 可恢复的错误类型
+_RECOVERABLE_ERRORS = (
+    ValueError, TypeError, AttributeError,
+    FileNotFoundError, PermissionError, IsADirectoryError
+)
+
+# 可重试的错误类型：可恢复错误以及网络相关错误
+_RETRYABLE_ERRORS = _RECOVERABLE_ERRORS + (ConnectionError, TimeoutError)
+
+
+@functools.lru_cache(maxsize=128)
+def _is_recoverable_cls(error_cls: type) -> bool:
+    """按异常类型缓存是否可恢复的判断结果"""
+    return issubclass(error_cls, _RECOVERABLE_ERRORS)
+
+
+@functools.lru_cache(maxsize=128)
+def _is_retryable_cls(error_cls: type) -> bool:
+    """按异常类型缓存是否可重试的判断结果"""
+    return issubclass(error_cls, _RETRYABLE_ERRORS)
+
+# 最近一次格式化的 (整秒时间戳, "YYYY-MM-DDTHH:MM:SS") ，同一秒内的错误复用
+_timestamp_prefix: Tuple[int, str] = (-1, "")
+
 class ErrorHandler:
     """错误处理工具类"""
     
@@ -21,46 +81,13 @@ class ErrorHandler:
         Returns:
             错误处理结果
         """
-        error_info = {
-            "error_type": type(error).__name__,
-            "error_message": str(error),
-            "context": context or {},
-            "timestamp": ErrorHandler._get_timestamp(),
-            "traceback": ErrorHandler._get_traceback(error)
-        }
+        error_info = ErrorHandler._build_error_info(error, context)
         
         # 记录错误日志
         logger.error(f"OCR错误: {error_info}")
         
         # 根据错误类型返回不同的处理结果
-        if isinstance(error, FileNotFoundError):
-            return {
-                "status": "error",
-                "message": f"文件未找到: {str(error)}",
-                "details": error_info,
-                "suggestion": "请检查文件路径是否正确"
-            }
-        elif isinstance(error, PermissionError):
-            return {
-                "status": "error",
-                "message": f"文件权限不足: {str(error)}",
-                "details": error_info,
-                "suggestion": "请检查文件权限设置"
-            }
-        elif isinstance(error, ValueError):
-            return {
-                "status": "error",
-                "message": f"无效的输入参数: {str(error)}",
-                "details": error_info,
-                "suggestion": "请检查输入参数是否正确"
-            }
-        else:
-            return {
-                "status": "error",
-                "message": f"OCR处理失败: {str(error)}",
-                "details": error_info,
-                "suggestion": "请稍后重试或联系技术支持"
-            }
+        return ErrorHandler._build_response(error, error_info, _OCR_ERROR_RULES, _OCR_ERROR_DEFAULT)
     
     @staticmethod
     def handle_model_error(error: Exception, context: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -74,46 +101,13 @@ class ErrorHandler:
         Returns:
             错误处理结果
         """
-        error_info = {
-            "error_type": type(error).__name__,
-            "error_message": str(error),
-            "context": context or {},
-            "timestamp": ErrorHandler._get_timestamp(),
-            "traceback": ErrorHandler._get_traceback(error)
-        }
+        error_info = ErrorHandler._build_error_info(error, context)
         
         # 记录错误日志
         logger.error(f"模型错误: {error_info}")
         
         # 根据错误类型返回不同的处理结果
-        if isinstance(error, ImportError):
-            return {
-                "status": "error",
-                "message": f"模型依赖缺失: {str(error)}",
-                "details": error_info,
-                "suggestion": "请安装必要的依赖包"
-            }
-        elif isinstance(error, RuntimeError):
-            return {
-                "status": "error",
-                "message": f"模型运行时错误: {str(error)}",
-                "details": error_info,
-                "suggestion": "请检查模型配置和输入数据"
-            }
-        elif isinstance(error, MemoryError):
-            return {
-                "status": "error",
-                "message": f"内存不足: {str(error)}",
-                "details": error_info,
-                "suggestion": "请减少输入数据量或增加内存"
-            }
-        else:
-            return {
-                "status": "error",
-                "message": f"模型处理失败: {str(error)}",
-                "details": error_info,
-                "suggestion": "请稍后重试或联系技术支持"
-            }
+        return ErrorHandler._build_response(error, error_info, _MODEL_ERROR_RULES, _MODEL_ERROR_DEFAULT)
     
     @staticmethod
     def handle_api_error(error: Exception, context: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -127,46 +121,13 @@ class ErrorHandler:
         Returns:
             错误处理结果
         """
-        error_info = {
-            "error_type": type(error).__name__,
-            "error_message": str(error),
-            "context": context or {},
-            "timestamp": ErrorHandler._get_timestamp(),
-            "traceback": ErrorHandler._get_traceback(error)
-        }
+        error_info = ErrorHandler._build_error_info(error, context)
         
         # 记录错误日志
         logger.error(f"API错误: {error_info}")
         
         # 根据错误类型返回不同的处理结果
-        if isinstance(error, ValueError):
-            return {
-                "status": "error",
-                "message": f"无效的API参数: {str(error)}",
-                "details": error_info,
-                "suggestion": "请检查API参数是否正确"
-            }
-        elif isinstance(error, TypeError):
-            return {
-                "status": "error",
-                "message": f"API参数类型错误: {str(error)}",
-                "details": error_info,
-                "suggestion": "请检查参数类型"
-            }
-        elif isinstance(error, AttributeError):
-            return {
-                "status": "error",
-                "message": f"API对象属性错误: {str(error)}",
-                "details": error_info,
-                "suggestion": "请检查对象属性和方法"
-            }
-        else:
-            return {
-                "status": "error",
-                "message": f"API处理失败: {str(error)}",
-                "details": error_info,
-                "suggestion": "请稍后重试或联系技术支持"
-            }
+        return ErrorHandler._build_response(error, error_info, _API_ERROR_RULES, _API_ERROR_DEFAULT)
     
     @staticmethod
     def handle_file_error(error: Exception, context: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -180,53 +141,13 @@ class ErrorHandler:
         Returns:
             错误处理结果
         """
-        error_info = {
-            "error_type": type(error).__name__,
-            "error_message": str(error),
-            "context": context or {},
-            "timestamp": ErrorHandler._get_timestamp(),
-            "traceback": ErrorHandler._get_traceback(error)
-        }
+        error_info = ErrorHandler._build_error_info(error, context)
         
         # 记录错误日志
         logger.error(f"文件错误: {error_info}")
         
         # 根据错误类型返回不同的处理结果
-        if isinstance(error, FileNotFoundError):
-            return {
-                "status": "error",
-                "message": f"文件未找到: {str(error)}",
-                "details": error_info,
-                "suggestion": "请检查文件路径是否正确"
-            }
-        elif isinstance(error, PermissionError):
-            return {
-                "status": "error",
-                "message": f"文件权限不足: {str(error)}",
-                "details": error_info,
-                "suggestion": "请检查文件权限设置"
-            }
-        elif isinstance(error, IsADirectoryError):
-            return {
-                "status": "error",
-                "message": f"路径是目录而不是文件: {str(error)}",
-                "details": error_info,
-                "suggestion": "请提供正确的文件路径"
-            }
-        elif isinstance(error, OSError):
-            return {
-                "status": "error",
-                "message": f"文件操作失败: {str(error)}",
-                "details": error_info,
-                "suggestion": "请检查文件系统状态"
-            }
-        else:
-            return {
-                "status": "error",
-                "message": f"文件处理失败: {str(error)}",
-                "details": error_info,
-                "suggestion": "请稍后重试或联系技术支持"
-            }
+        return ErrorHandler._build_response(error, error_info, _FILE_ERROR_RULES, _FILE_ERROR_DEFAULT)
     
     @staticmethod
     def log_error(error: Exception, context: Dict[str, Any] = None, level: str = "error") -> None:
@@ -238,13 +159,7 @@ class ErrorHandler:
             context: 错误上下文信息
             level: 日志级别
         """
-        error_info = {
-            "error_type": type(error).__name__,
-            "error_message": str(error),
-            "context": context or {},
-            "timestamp": ErrorHandler._get_timestamp(),
-            "traceback": ErrorHandler._get_traceback(error)
-        }
+        error_info = ErrorHandler._build_error_info(error, context)
         
         # 根据级别记录日志
         if level == "critical":
@@ -254,11 +169,61 @@ class ErrorHandler:
         else:
             logger.error(f"错误: {error_info}")
     
+    @staticmethod
+    def _build_error_info(error: Exception, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """构建错误详情，上下文复制为普通字典，记录出错时的快照且可JSON序列化"""
+        return {
+            "error_type": type(error).__name__,
+            "error_message": str(error),
+            "context": dict(context) if context else {},
+            "timestamp": ErrorHandler._get_timestamp(),
+            "traceback": ErrorHandler._get_traceback(error)
+        }
+    
+    @staticmethod
+    def _build_response(error: Exception, error_info: Dict[str, Any],
+                        rules: Tuple[Tuple[type, str, str], ...],
+                        default: Tuple[str, str]) -> Dict[str, Any]:
+        """
+        按规则表匹配异常类型并构建错误响应
+        
+        所有响应的键顺序保持一致，便于CPython共享字典键
+        
+        Args:
+            error: 异常对象
+            error_info: 错误详情
+            rules: (异常类型, 消息前缀, 处理建议) 规则表
+            default: 未命中规则时的 (消息前缀, 处理建议)
+            
+        Returns:
+            错误处理结果
+        """
+        prefix, suggestion = default
+        for error_cls, rule_prefix, rule_suggestion in rules:
+            if isinstance(error, error_cls):
+                prefix, suggestion = rule_prefix, rule_suggestion
+                break
+        
+        return {
+            "status": "error",
+            "message": f"{prefix}: {error}",
+            "details": error_info,
+            "suggestion": suggestion
+        }
+    
     @staticmethod
     def _get_timestamp() -> str:
-        """获取当前时间戳"""
-        import datetime
-        return datetime.datetime.now().isoformat()
+        """获取当前时间戳（ISO格式，与datetime.now().isoformat()一致）"""
+        global _timestamp_prefix
+        now = time.time()
+        second = int(now)
+        cached_second, prefix = _timestamp_prefix
+        if cached_second != second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(second))
+            _timestamp_prefix = (second, prefix)
+        
+        microsecond = int((now - second) * 1_000_000)
+        return f"{prefix}.{microsecond:06d}" if microsecond else prefix
     
     @staticmethod
     def _get_traceback(error: Exception) -> Optional[str]:
@@ -282,15 +247,7 @@ class ErrorHandler:
         Returns:
             标准化错误响应
         """
-        error_handlers = {
-            "ocr": ErrorHandler.handle_ocr_error,
-            "model": ErrorHandler.handle_model_error,
-            "api": ErrorHandler.handle_api_error,
-            "file": ErrorHandler.handle_file_error,
-            "general": lambda e, c: ErrorHandler.handle_api_error(e, c)
-        }
-        
-        handler = error_handlers.get(error_type, ErrorHandler.handle_api_error)
+        handler = _ERROR_HANDLERS.get(error_type, ErrorHandler.handle_api_error)
         return handler(error, context)
     
     @staticmethod
@@ -304,12 +261,7 @@ class ErrorHandler:
         Returns:
             是否可恢复
         """
-        recoverable_errors = (
-            ValueError, TypeError, AttributeError, 
-            FileNotFoundError, PermissionError, IsADirectoryError
-        )
-        
-        return isinstance(error, recoverable_errors)
+        return _is_recoverable_cls(type(error))
     
     @staticmethod
     def should_retry(error: Exception, max_retries: int = 3, current_retries: int = 0) -> bool:
@@ -327,15 +279,8 @@ class ErrorHandler:
         if current_retries >= max_retries:
             return False
         
-        # 可恢复的错误可以重试
-        if ErrorHandler.is_recoverable_error(error):
-            return True
-        
-        # 网络相关的错误可以重试
-        if isinstance(error, (ConnectionError, TimeoutError)):
-            return True
-        
-        return False
+        # 可恢复的错误和网络相关的错误可以重试
+        return _is_retryable_cls(type(error))
     
     @staticmethod
     def get_error_suggestion(error: Exception) -> str:
@@ -359,8 +304,14 @@ class ErrorHandler:
             TimeoutError: "请稍后重试"
         }
         
-        return error_suggestions.get(type(error), "请稍后重试或联系技术支持")
-
-
+        return error_suggestions.get(type(error), _DEFAULT_SUGGESTION)
 
 
+# 错误类型到处理函数的映射，"general"与未知类型均按API错误处理
+_ERROR_HANDLERS = MappingProxyType({
+    "ocr": ErrorHandler.handle_ocr_error,
+    "model": ErrorHandler.handle_model_error,
+    "api": ErrorHandler.handle_api_error,
+    "file": ErrorHandler.handle_file_error,
+    "general": ErrorHandler.handle_api_error
+})
@@ -1,17 +1,161 @@
+import io
 import os
+import sys
+import stat
+import time
+import errno
 import shutil
 import tempfile
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Iterator, Tuple, Callable
 import magic  # 文件类型检测库
 
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 大文件复制时每次搬运的字节数（1MB）
+_COPY_CHUNK_SIZE = 1 << 20
+
+# 常见图像格式的文件头签名
+_IMAGE_SIGNATURES = (
+    b"\x89PNG\r\n\x1a\n",   # PNG
+    b"\xff\xd8\xff",          # JPEG
+    b"GIF87a",                # GIF
+    b"GIF89a",                # GIF
+    b"BM",                    # BMP
+    b"II*\x00",               # TIFF (little-endian)
+    b"MM\x00*",               # TIFF (big-endian)
+)
+
+# 文件头无法读取时用于回退判断的扩展名
+_IMAGE_EXTENSIONS = frozenset({".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tif", ".tiff", ".webp"})
+
+# 文件大小单位对应的除数
+_UNIT_DIVISORS = {"B": 1, "KB": 1024, "MB": 1024 * 1024, "GB": 1024 * 1024 * 1024}
+
+# os.stat结果缓存：同一文件在短时间内的重复stat直接复用结果
+_STAT_CACHE_TTL = 0.1
+_STAT_CACHE_SIZE = 1024
+_stat_cache: "OrderedDict[str, Tuple[float, os.stat_result]]" = OrderedDict()
+_stat_cache_lock = threading.Lock()
+
+# 已确认存在的目录，避免每次写文件都调用os.makedirs
+_KNOWN_DIRS_SIZE = 10000
+_known_dirs: "OrderedDict[str, None]" = OrderedDict()
+_known_dirs_lock = threading.Lock()
+
 class FileUtils:
     """文件处理工具类"""
     
+    @staticmethod
+    def _cached_stat(file_path: str) -> os.stat_result:
+        """
+        获取文件stat结果，短时间内的重复调用复用缓存
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            stat结果，文件不存在时抛出OSError
+        """
+        now = time.monotonic()
+        with _stat_cache_lock:
+            cached = _stat_cache.get(file_path)
+            if cached is not None and cached[0] > now:
+                _stat_cache.move_to_end(file_path)
+                return cached[1]
+        
+        st = os.stat(file_path)
+        
+        with _stat_cache_lock:
+            _stat_cache[file_path] = (now + _STAT_CACHE_TTL, st)
+            _stat_cache.move_to_end(file_path)
+            if len(_stat_cache) > _STAT_CACHE_SIZE:
+                _stat_cache.popitem(last=False)
+        return st
+    
+    @staticmethod
+    def _invalidate_stat(*file_paths: str) -> None:
+        """
+        使指定路径的stat缓存失效
+        
+        Args:
+            file_paths: 文件路径
+        """
+        with _stat_cache_lock:
+            for file_path in file_paths:
+                _stat_cache.pop(file_path, None)
+    
+    @staticmethod
+    def _ensure_parent_dir(file_path: str) -> None:
+        """
+        确保文件所在目录存在，已确认存在的目录不再重复创建
+        
+        Args:
+            file_path: 文件路径
+        """
+        directory = os.path.dirname(file_path)
+        if not directory:
+            return
+        
+        with _known_dirs_lock:
+            if directory in _known_dirs:
+                _known_dirs.move_to_end(directory)
+                return
+        
+        os.makedirs(directory, exist_ok=True)
+        
+        with _known_dirs_lock:
+            _known_dirs[directory] = None
+            if len(_known_dirs) > _KNOWN_DIRS_SIZE:
+                _known_dirs.popitem(last=False)
+    
+    @staticmethod
+    def _run_in_parent_dir(file_path: str, operation: Callable[[], Any]) -> Any:
+        """
+        确保目标目录存在后执行文件操作
+        
+        已缓存的目录可能被外部删除，此时重新创建目录并重试一次
+        
+        Args:
+            file_path: 目标文件路径
+            operation: 文件操作
+            
+        Returns:
+            文件操作的返回值
+        """
+        FileUtils._ensure_parent_dir(file_path)
+        try:
+            return operation()
+        except FileNotFoundError:
+            with _known_dirs_lock:
+                _known_dirs.pop(os.path.dirname(file_path), None)
+            FileUtils._ensure_parent_dir(file_path)
+            return operation()
+    
+    @staticmethod
+    def _get_extension(file_path: str) -> str:
+        """
+        获取小写的文件扩展名（含点），结果与os.path.splitext一致
+        
+        Args:
+            file_path: 文件名或文件路径
+            
+        Returns:
+            扩展名，无扩展名时返回空字符串
+        """
+        name = file_path.rpartition(os.sep)[2]
+        if os.altsep:
+            name = name.rpartition(os.altsep)[2]
+        head, sep, tail = name.rpartition('.')
+        # 以点开头的隐藏文件视为无扩展名
+        if sep and head.strip('.'):
+            return sep + tail.lower()
+        return ""
+    
     @staticmethod
     def validate_file_path(file_path: str) -> bool:
         """
@@ -28,12 +172,14 @@ class FileUtils:
         
         try:
             # 检查文件是否存在
-            if not os.path.exists(file_path):
+            try:
+                st = FileUtils._cached_stat(file_path)
+            except OSError:
                 logger.warning(f"文件不存在: {file_path}")
                 return False
             
             # 检查是否是文件
-            if not os.path.isfile(file_path):
+            if not stat.S_ISREG(st.st_mode):
                 logger.warning(f"不是文件: {file_path}")
                 return False
             
@@ -58,14 +204,15 @@ class FileUtils:
             return {}
         
         try:
+            st = FileUtils._cached_stat(file_path)
             file_info = {
                 "path": file_path,
-                "size": os.path.getsize(file_path),
-                "modified_time": os.path.getmtime(file_path),
-                "created_time": os.path.getctime(file_path),
+                "size": st.st_size,
+                "modified_time": st.st_mtime,
+                "created_time": st.st_ctime,
                 "is_readable": os.access(file_path, os.R_OK),
                 "is_writable": os.access(file_path, os.W_OK),
-                "extension": os.path.splitext(file_path)[1].lower()
+                "extension": FileUtils._get_extension(file_path)
             }
             
             # 使用magic库检测文件类型
@@ -98,11 +245,13 @@ class FileUtils:
             return False
         
         try:
-            # 确保目标目录存在
-            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            # 目标为已存在的目录时复制到该目录下（与shutil.copy2一致）
+            if os.path.isdir(dst_path):
+                dst_path = os.path.join(dst_path, os.path.basename(src_path))
             
-            # 复制文件
-            shutil.copy2(src_path, dst_path)
+            # 确保目标目录存在并复制文件
+            FileUtils._run_in_parent_dir(dst_path, lambda: FileUtils._fast_copy(src_path, dst_path))
+            FileUtils._invalidate_stat(dst_path)
             logger.info(f"复制文件: {src_path} -> {dst_path}")
             return True
             
@@ -110,6 +259,43 @@ class FileUtils:
             logger.error(f"复制文件失败: {e}")
             return False
     
+    @staticmethod
+    def _fast_copy(src_path: str, dst_path: str) -> None:
+        """
+        复制文件内容及元数据（等价于shutil.copy2）
+        
+        Linux下使用os.sendfile在内核中完成数据搬运，
+        其他平台回退到大缓冲区的shutil.copyfileobj
+        
+        Args:
+            src_path: 源文件路径
+            dst_path: 目标文件路径
+            
+        Raises:
+            shutil.SameFileError: 源文件与目标文件为同一文件
+        """
+        # 目标以O_TRUNC打开前先检查，否则复制到自身会清空源文件
+        if os.path.exists(dst_path) and os.path.samefile(src_path, dst_path):
+            raise shutil.SameFileError(f"{src_path!r} and {dst_path!r} are the same file")
+        
+        if sys.platform.startswith("linux") and hasattr(os, "sendfile"):
+            in_fd = os.open(src_path, os.O_RDONLY)
+            try:
+                out_fd = os.open(dst_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+                try:
+                    while os.sendfile(out_fd, in_fd, None, _COPY_CHUNK_SIZE) > 0:
+                        pass
+                finally:
+                    os.close(out_fd)
+            finally:
+                os.close(in_fd)
+        else:
+            with open(src_path, 'rb') as src_file, open(dst_path, 'wb') as dst_file:
+                shutil.copyfileobj(src_file, dst_file, length=_COPY_CHUNK_SIZE)
+        
+        # 保留权限位和访问/修改时间
+        shutil.copystat(src_path, dst_path)
+    
     @staticmethod
     def move_file(src_path: str, dst_path: str) -> bool:
         """
@@ -126,11 +312,25 @@ class FileUtils:
             return False
         
         try:
-            # 确保目标目录存在
-            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            # 目标为已存在的目录时移动到该目录下（与shutil.move一致）
+            if os.path.isdir(dst_path):
+                dst_path = os.path.join(dst_path, os.path.basename(src_path))
+            
+            # 移动文件：同一文件系统内直接重命名，跨文件系统时再复制后删除
+            def _move() -> None:
+                try:
+                    os.rename(src_path, dst_path)
+                except OSError as e:
+                    if e.errno != errno.EXDEV:
+                        raise
+                    FileUtils._fast_copy(src_path, dst_path)
+                    os.unlink(src_path)
             
-            # 移动文件
-            shutil.move(src_path, dst_path)
+            # 确保目标目录存在
+            try:
+                FileUtils._run_in_parent_dir(dst_path, _move)
+            finally:
+                FileUtils._invalidate_stat(src_path, dst_path)
             logger.info(f"移动文件: {src_path} -> {dst_path}")
             return True
             
@@ -154,6 +354,7 @@ class FileUtils:
         
         try:
             os.remove(file_path)
+            FileUtils._invalidate_stat(file_path)
             logger.info(f"删除文件: {file_path}")
             return True
             
@@ -177,18 +378,9 @@ class FileUtils:
             return []
         
         try:
-            files = []
-            for root, _, filenames in os.walk(directory):
-                for filename in filenames:
-                    file_path = os.path.join(root, filename)
-                    
-                    # 如果指定了扩展名过滤
-                    if extensions:
-                        ext = os.path.splitext(filename)[1].lower()
-                        if ext in extensions:
-                            files.append(file_path)
-                    else:
-                        files.append(file_path)
+            # 扩展名统一为带点的小写形式，过滤时为O(1)集合查找
+            ext_set = frozenset('.' + ext.lower().lstrip('.') for ext in extensions) if extensions else None
+            files = list(FileUtils._walk(directory, ext_set))
             
             logger.info(f"列出目录文件: {directory}, 找到 {len(files)} 个文件")
             return files
@@ -197,6 +389,37 @@ class FileUtils:
             logger.error(f"列出目录文件失败: {e}")
             return []
     
+    @staticmethod
+    def _walk(directory: str, ext_set: Optional[frozenset] = None) -> Iterator[str]:
+        """
+        基于os.scandir递归遍历目录，逐个产出文件路径
+        
+        Args:
+            directory: 目录路径
+            ext_set: 带点的小写扩展名集合（可选）
+            
+        Yields:
+            文件路径
+        """
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            # 与os.walk一致：跳过无法访问的子目录
+            return
+        
+        with entries:
+            for entry in entries:
+                if entry.is_dir():
+                    # 与os.walk一致：不进入指向目录的符号链接
+                    if not entry.is_symlink():
+                        yield from FileUtils._walk(entry.path, ext_set)
+                elif entry.is_file():
+                    if ext_set is None:
+                        yield entry.path
+                        continue
+                    if FileUtils._get_extension(entry.name) in ext_set:
+                        yield entry.path
+    
     @staticmethod
     def create_temp_file(content: str = "", suffix: str = ".txt") -> str:
         """
@@ -228,6 +451,8 @@ class FileUtils:
         """
         读取文件内容
         
+        通过一次fstat获取文件大小并预分配缓冲区，避免多次stat和缓冲区扩容
+        
         Args:
             file_path: 文件路径
             encoding: 文件编码
@@ -235,12 +460,42 @@ class FileUtils:
         Returns:
             文件内容
         """
-        if not FileUtils.validate_file_path(file_path):
+        if not file_path or not isinstance(file_path, str):
             return ""
         
         try:
-            with open(file_path, 'r', encoding=encoding) as file:
-                content = file.read()
+            try:
+                raw = io.FileIO(file_path, 'r')
+            except FileNotFoundError:
+                logger.warning(f"文件不存在: {file_path}")
+                return ""
+            except IsADirectoryError:
+                logger.warning(f"不是文件: {file_path}")
+                return ""
+            
+            with raw:
+                st = os.fstat(raw.fileno())
+                if not stat.S_ISREG(st.st_mode):
+                    logger.warning(f"不是文件: {file_path}")
+                    return ""
+                
+                buffer = bytearray(st.st_size)
+                filled = 0
+                with memoryview(buffer) as view:
+                    while filled < st.st_size:
+                        count = raw.readinto(view[filled:])
+                        if not count:
+                            break
+                        filled += count
+                del buffer[filled:]
+                
+                # 文件在读取期间变大时读取剩余内容
+                buffer += raw.readall()
+            
+            content = buffer.decode(encoding)
+            # 与文本模式open保持一致的换行符转换
+            if "\r" in content:
+                content = content.replace("\r\n", "\n").replace("\r", "\n")
             
             logger.info(f"读取文件内容: {file_path}, 长度: {len(content)}")
             return content
@@ -263,11 +518,13 @@ class FileUtils:
             是否成功
         """
         try:
-            # 确保目录存在
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            def _write() -> None:
+                with open(file_path, 'w', encoding=encoding) as file:
+                    file.write(content)
             
-            with open(file_path, 'w', encoding=encoding) as file:
-                file.write(content)
+            # 确保目录存在
+            FileUtils._run_in_parent_dir(file_path, _write)
+            FileUtils._invalidate_stat(file_path)
             
             logger.info(f"写入文件内容: {file_path}, 长度: {len(content)}")
             return True
@@ -276,6 +533,30 @@ class FileUtils:
             logger.error(f"写入文件内容失败: {e}")
             return False
     
+    @staticmethod
+    def _sniff_header(file_path: str, size: int = 12) -> Optional[bytes]:
+        """
+        读取文件开头的若干字节用于格式识别
+        
+        Args:
+            file_path: 文件路径
+            size: 读取的字节数
+            
+        Returns:
+            文件头字节，读取失败时返回None
+        """
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+        except OSError:
+            return None
+        
+        try:
+            return os.read(fd, size)
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+    
     @staticmethod
     def is_pdf_file(file_path: str) -> bool:
         """
@@ -287,12 +568,11 @@ class FileUtils:
         Returns:
             是否是PDF文件
         """
-        if not FileUtils.validate_file_path(file_path):
-            return False
-        
         try:
-            file_info = FileUtils.get_file_info(file_path)
-            return file_info.get("mime_type", "").startswith("application/pdf")
+            header = FileUtils._sniff_header(file_path, 4)
+            if header is None:
+                return os.path.isfile(file_path) and FileUtils._get_extension(file_path) == ".pdf"
+            return header == b"%PDF"
             
         except Exception as e:
             logger.error(f"检查PDF文件失败: {e}")
@@ -309,12 +589,15 @@ class FileUtils:
         Returns:
             是否是图像文件
         """
-        if not FileUtils.validate_file_path(file_path):
-            return False
-        
         try:
-            file_info = FileUtils.get_file_info(file_path)
-            return file_info.get("mime_type", "").startswith("image/")
+            header = FileUtils._sniff_header(file_path)
+            if header is None:
+                return (os.path.isfile(file_path)
+                        and FileUtils._get_extension(file_path) in _IMAGE_EXTENSIONS)
+            if header.startswith(_IMAGE_SIGNATURES):
+                return True
+            # WEBP: RIFF容器且格式标识为WEBP
+            return header[:4] == b"RIFF" and header[8:12] == b"WEBP"
             
         except Exception as e:
             logger.error(f"检查图像文件失败: {e}")
@@ -332,23 +615,17 @@ class FileUtils:
         Returns:
             格式化后的文件大小
         """
-        if not FileUtils.validate_file_path(file_path):
+        try:
+            st = FileUtils._cached_stat(file_path)
+        except (OSError, TypeError, ValueError):
             return 0.0
         
         try:
-            size = os.path.getsize(file_path)
-            
-            # 转换单位
-            if unit.upper() == "B":
-                return size
-            elif unit.upper() == "KB":
-                return size / 1024
-            elif unit.upper() == "MB":
-                return size / (1024 * 1024)
-            elif unit.upper() == "GB":
-                return size / (1024 * 1024 * 1024)
-            else:
-                return size / (1024 * 1024)  # 默认MB
+            if not stat.S_ISREG(st.st_mode):
+                return 0.0
+            
+            # 转换单位，未知单位默认MB
+            return st.st_size / _UNIT_DIVISORS.get(unit.upper(), _UNIT_DIVISORS["MB"])
             
         except Exception as e:
             logger.error(f"获取文件大小失败: {e}")
@@ -8,6 +8,7 @@ import requests
 import time
 import sys
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple
 
 # 服务配置
@@ -18,6 +19,9 @@ SERVICES = [
     {"name": "Neo4j", "url": "http://localhost:7474", "method": "GET"},
 ]
 
+# 复用同一个会话，使重试检查时可以复用连接
+session = requests.Session()
+
 def check_service(service: Dict) -> Tuple[bool, str]:
     """
     检查单个服务的健康状态
@@ -38,7 +42,7 @@ def check_service(service: Dict) -> Tuple[bool, str]:
     
     try:
         if method == "GET":
-            response = requests.get(url, timeout=5)
+            response = session.get(url, timeout=5)
             if response.status_code < 400:
                 return (True, f"{name}: 正常 (状态码: {response.status_code})")
             else:
@@ -63,13 +67,9 @@ def check_all_services(services: List[Dict]) -> List[Tuple[bool, str]]:
     Returns:
         检查结果列表
     """
-    results = []
-    
-    for service in services:
-        result = check_service(service)
-        results.append(result)
-        
-    return results
+    # 并发检查，总耗时取决于最慢的服务而不是所有服务耗时之和
+    with ThreadPoolExecutor(max_workers=max(1, len(services))) as executor:
+        return list(executor.map(check_service, services))
 
 def print_results(results: List[Tuple[bool, str]]):
     """
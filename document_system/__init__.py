@@ -6,6 +6,12 @@ __version__ = "1.0.0"
 __author__ = "文档智能分析系统团队"
 __description__ = "基于AI的文档智能分析和管理系统"
 
-from .__main__ import DocumentSystem, create_document_system
-
 __all__ = ['DocumentSystem', 'create_document_system']
+
+
+def __getattr__(name):
+    # 延迟导入主模块，只使用命令行解析器等子模块时不加载全部服务、模型和数据库驱动
+    if name in __all__:
+        from . import __main__ as main_module
+        return getattr(main_module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
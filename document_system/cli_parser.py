@@ -4,53 +4,252 @@
 """
 
 import argparse
+import importlib
 import sys
-from typing import Dict, Any, List
-from .services.user_service import UserService
-from .services.document_service import DocumentService
+import threading
+from functools import cached_property, lru_cache
+from operator import methodcaller
+from typing import TYPE_CHECKING, Dict, Any, List
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    import json
+    HAS_ORJSON = False
+
+if TYPE_CHECKING:
+    from .services.user_service import UserService
+    from .services.document_service import DocumentService
+    from .models.summary import Summary
+    from .models.tag import Tag
+    from .models.entity import Entity
+    from .models.export import Export
+
+
+# 全部命令名称
+COMMANDS = frozenset((
+    'user-register', 'user-login', 'user-profile', 'user-update',
+    'user-password', 'user-list', 'user-stats',
+    'doc-upload', 'doc-info', 'doc-update', 'doc-delete',
+    'doc-restore', 'doc-list', 'doc-search', 'doc-stats',
+    'summary-add', 'summary-get', 'summary-update',
+    'tag-add', 'tag-get', 'tag-search', 'tag-popular',
+    'entity-add', 'entity-get', 'entity-search', 'entity-popular',
+    'export-create', 'export-get', 'export-list', 'export-stats',
+))
+
+
+def _json_default(value: Any) -> str:
+    """无法直接序列化的值：日期时间使用ISO格式，其余转换为字符串"""
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+if HAS_ORJSON:
+    def _jdumps(obj: Any) -> str:
+        """序列化为JSON字符串（orjson实现）"""
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS).decode()
+else:
+    def _jdumps(obj: Any) -> str:
+        """序列化为JSON字符串（标准库实现，输出格式与orjson一致）"""
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+
+@lru_cache(maxsize=None)
+def _lazy(module: str, name: str):
+    """
+    按需导入并缓存类，避免在解析参数前就加载服务、模型及数据库驱动
+    
+    Args:
+        module: 相对于本包的模块路径，如 '.models.tag'
+        name: 类名
+        
+    Returns:
+        导入的类
+    """
+    return getattr(importlib.import_module(module, __package__), name)
+
+
+def _parse_entities(entity_strs: List[str]) -> List[Dict[str, str]]:
+    """
+    解析实体列表，格式：name:type name:type
+    
+    Args:
+        entity_strs: 实体字符串列表，不含冒号的项会被忽略
+        
+    Returns:
+        实体字典列表
+    """
+    return [
+        {'name': name, 'type': entity_type}
+        for name, sep, entity_type in map(methodcaller('partition', ':'), entity_strs)
+        if sep
+    ]
+
+
+class _Args:
+    """
+    解析结果的命名空间，使用__slots__代替argparse.Namespace的实例字典
+    
+    槽位为全部子命令参数dest的并集；新增命令参数时需同步添加。
+    保留__dict__仅供argparse在出现未识别参数时通过vars()记录，正常解析不会创建字典
+    """
+    
+    __slots__ = (
+        'command', 'func', '__dict__',
+        # 用户
+        'username', 'email', 'password', 'role', 'user_id', 'theme',
+        'summary_length', 'old_password', 'new_password', 'status',
+        'limit', 'offset',
+        # 文档
+        'title', 'file_path', 'file_size', 'author', 'file_format', 'category',
+        'doc_id', 'no_summary', 'no_tags', 'no_entities', 'hard',
+        'include_deleted', 'keyword',
+        # 摘要、标签、实体
+        'type', 'content', 'keywords', 'match', 'entities', 'names',
+        # 导出
+        'format', 'doc_ids', 'export_id',
+    )
+
+
+class _FastParser(argparse.ArgumentParser):
+    """
+    复用参数校验用格式化器的ArgumentParser
+    
+    add_argument每次都会创建新的HelpFormatter仅用于校验metavar，
+    这里在add_argument期间复用同一个实例；生成帮助信息时仍创建新的格式化器。
+    参数错误以ArgumentError抛出，不向stderr打印用法后退出进程
+    """
+    
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('exit_on_error', False)
+        super().__init__(*args, **kwargs)
+    
+    def error(self, message):
+        # exit_on_error=False时缺少必填参数等错误仍会调用error()，同样改为抛出异常
+        raise argparse.ArgumentError(None, message)
+    
+    def add_argument(self, *args, **kwargs):
+        self._reuse_formatter = True
+        try:
+            return super().add_argument(*args, **kwargs)
+        finally:
+            self._reuse_formatter = False
+    
+    def _get_formatter(self):
+        if not self.__dict__.get('_reuse_formatter'):
+            return super()._get_formatter()
+        
+        formatter = self.__dict__.get('_validation_formatter')
+        if formatter is None:
+            formatter = self._validation_formatter = super()._get_formatter()
+        return formatter
 
 
 class CLIParser:
     """命令行解析器类"""
     
+    # 同一进程内所有实例共享的解析器；解析器构建完成后只读，可安全复用
+    _shared_parser = None
+    _shared_subparsers = None
+    _shared_built_groups = None
+    _shared_lock = threading.RLock()
+    
     def __init__(self):
-        self.user_service = UserService()
-        self.document_service = DocumentService()
         self.parser = None
+        self._subparsers = None
+        self._command_groups = {}
+        self._built_groups = set()
         self._setup_parser()
     
+    @cached_property
+    def user_service(self) -> 'UserService':
+        """用户服务，首次使用时导入并创建"""
+        return _lazy('.services.user_service', 'UserService')()
+    
+    @cached_property
+    def document_service(self) -> 'DocumentService':
+        """文档服务，首次使用时导入并创建"""
+        return _lazy('.services.document_service', 'DocumentService')()
+    
+    @cached_property
+    def summary_model(self) -> 'Summary':
+        """摘要模型，首次使用时导入并创建"""
+        return _lazy('.models.summary', 'Summary')()
+    
+    @cached_property
+    def tag_model(self) -> 'Tag':
+        """标签模型，首次使用时导入并创建"""
+        return _lazy('.models.tag', 'Tag')()
+    
+    @cached_property
+    def entity_model(self) -> 'Entity':
+        """实体模型，首次使用时导入并创建"""
+        return _lazy('.models.entity', 'Entity')()
+    
+    @cached_property
+    def export_model(self) -> 'Export':
+        """导出模型，首次使用时导入并创建"""
+        return _lazy('.models.export', 'Export')()
+    
     def _setup_parser(self):
-        """设置命令行解析器"""
-        self.parser = argparse.ArgumentParser(
-            description='文档管理系统命令行工具',
-            formatter_class=argparse.RawDescriptionHelpFormatter
-        )
-        
-        # 创建子命令解析器
-        subparsers = self.parser.add_subparsers(dest='command', help='可用命令')
-        
-        # 用户相关命令
-        self._setup_user_commands(subparsers)
-        
-        # 文档相关命令
-        self._setup_document_commands(subparsers)
-        
-        # 摘要相关命令
-        self._setup_summary_commands(subparsers)
-        
-        # 标签相关命令
-        self._setup_tag_commands(subparsers)
+        """设置命令行解析器（首次创建后由同类实例共享）"""
+        cls = type(self)
+        with cls._shared_lock:
+            # 按具体类缓存，避免子类复用父类的解析器
+            if cls.__dict__.get('_shared_parser') is None:
+                parser = _FastParser(
+                    description='文档管理系统命令行工具',
+                    formatter_class=argparse.RawDescriptionHelpFormatter
+                )
+                
+                # 创建子命令解析器（子命令同样使用_FastParser）
+                cls._shared_subparsers = parser.add_subparsers(
+                    dest='command', help='可用命令', parser_class=_FastParser
+                )
+                cls._shared_built_groups = set()
+                cls._shared_parser = parser
+        
+        self.parser = cls._shared_parser
+        self._subparsers = cls._shared_subparsers
+        self._built_groups = cls._shared_built_groups
+        
+        # 命令前缀到子命令构建方法的映射，子命令在解析前按需构建
+        self._command_groups = {
+            'user': self._setup_user_commands,        # 用户相关命令
+            'doc': self._setup_document_commands,     # 文档相关命令
+            'summary': self._setup_summary_commands,  # 摘要相关命令
+            'tag': self._setup_tag_commands,          # 标签相关命令
+            'entity': self._setup_entity_commands,    # 实体相关命令
+            'export': self._setup_export_commands,    # 导出相关命令
+        }
+    
+    def _ensure_commands(self, command: str = None):
+        """
+        构建命令所属命令组的子命令
         
-        # 实体相关命令
-        self._setup_entity_commands(subparsers)
+        Args:
+            command: 命令名称，无法确定命令组（如帮助、未知命令）时构建全部命令组
+        """
+        # 未知命令需要全部命令组，保证错误提示列出全部可用命令
+        if command in COMMANDS:
+            groups = [command.partition('-')[0]]
+        else:
+            groups = list(self._command_groups)
         
-        # 导出相关命令
-        self._setup_export_commands(subparsers)
+        with self._shared_lock:
+            for name in groups:
+                if name not in self._built_groups:
+                    self._command_groups[name](self._subparsers)
+                    self._built_groups.add(name)
     
     def _setup_user_commands(self, subparsers):
         """设置用户相关命令"""
+        # 解析器在实例间共享，默认值绑定类中的函数而非某个实例的方法
+        cls = type(self)
         # 用户注册
         register_parser = subparsers.add_parser('user-register', help='用户注册')
+        register_parser.set_defaults(func=cls._cmd_user_register)
         register_parser.add_argument('--username', required=True, help='用户名')
         register_parser.add_argument('--email', required=True, help='邮箱')
         register_parser.add_argument('--password', required=True, help='密码')
@@ -58,15 +257,18 @@ class CLIParser:
         
         # 用户登录
         login_parser = subparsers.add_parser('user-login', help='用户登录')
+        login_parser.set_defaults(func=cls._cmd_user_login)
         login_parser.add_argument('--email', required=True, help='邮箱')
         login_parser.add_argument('--password', required=True, help='密码')
         
         # 获取用户资料
         profile_parser = subparsers.add_parser('user-profile', help='获取用户资料')
+        profile_parser.set_defaults(func=cls._cmd_user_profile)
         profile_parser.add_argument('--user-id', required=True, help='用户ID')
         
         # 更新用户资料
         update_parser = subparsers.add_parser('user-update', help='更新用户资料')
+        update_parser.set_defaults(func=cls._cmd_user_update)
         update_parser.add_argument('--user-id', required=True, help='用户ID')
         update_parser.add_argument('--username', help='新用户名')
         update_parser.add_argument('--email', help='新邮箱')
@@ -76,12 +278,14 @@ class CLIParser:
         
         # 修改密码
         password_parser = subparsers.add_parser('user-password', help='修改密码')
+        password_parser.set_defaults(func=cls._cmd_user_password)
         password_parser.add_argument('--user-id', required=True, help='用户ID')
         password_parser.add_argument('--old-password', required=True, help='旧密码')
         password_parser.add_argument('--new-password', required=True, help='新密码')
         
         # 用户列表
         list_parser = subparsers.add_parser('user-list', help='获取用户列表')
+        list_parser.set_defaults(func=cls._cmd_user_list)
         list_parser.add_argument('--role', help='角色过滤')
         list_parser.add_argument('--status', type=int, help='状态过滤')
         list_parser.add_argument('--limit', type=int, default=50, help='返回数量限制')
@@ -89,11 +293,14 @@ class CLIParser:
         
         # 用户统计
         stats_parser = subparsers.add_parser('user-stats', help='获取用户统计')
+        stats_parser.set_defaults(func=cls._cmd_user_stats)
     
     def _setup_document_commands(self, subparsers):
         """设置文档相关命令"""
+        cls = type(self)
         # 上传文档
         upload_parser = subparsers.add_parser('doc-upload', help='上传文档')
+        upload_parser.set_defaults(func=cls._cmd_doc_upload)
         upload_parser.add_argument('--user-id', required=True, help='用户ID')
         upload_parser.add_argument('--title', required=True, help='文档标题')
         upload_parser.add_argument('--file-path', required=True, help='文件路径')
@@ -104,6 +311,7 @@ class CLIParser:
         
         # 获取文档信息
         info_parser = subparsers.add_parser('doc-info', help='获取文档信息')
+        info_parser.set_defaults(func=cls._cmd_doc_info)
         info_parser.add_argument('--doc-id', required=True, help='文档ID')
         info_parser.add_argument('--no-summary', action='store_true', help='不包含摘要')
         info_parser.add_argument('--no-tags', action='store_true', help='不包含标签')
@@ -111,6 +319,7 @@ class CLIParser:
         
         # 更新文档信息
         update_parser = subparsers.add_parser('doc-update', help='更新文档信息')
+        update_parser.set_defaults(func=cls._cmd_doc_update)
         update_parser.add_argument('--doc-id', required=True, help='文档ID')
         update_parser.add_argument('--user-id', required=True, help='用户ID')
         update_parser.add_argument('--title', help='新标题')
@@ -119,17 +328,20 @@ class CLIParser:
         
         # 删除文档
         delete_parser = subparsers.add_parser('doc-delete', help='删除文档')
+        delete_parser.set_defaults(func=cls._cmd_doc_delete)
         delete_parser.add_argument('--doc-id', required=True, help='文档ID')
         delete_parser.add_argument('--user-id', required=True, help='用户ID')
         delete_parser.add_argument('--hard', action='store_true', help='硬删除')
         
         # 恢复文档
         restore_parser = subparsers.add_parser('doc-restore', help='恢复文档')
+        restore_parser.set_defaults(func=cls._cmd_doc_restore)
         restore_parser.add_argument('--doc-id', required=True, help='文档ID')
         restore_parser.add_argument('--user-id', required=True, help='用户ID')
         
         # 文档列表
         list_parser = subparsers.add_parser('doc-list', help='获取文档列表')
+        list_parser.set_defaults(func=cls._cmd_doc_list)
         list_parser.add_argument('--user-id', required=True, help='用户ID')
         list_parser.add_argument('--include-deleted', action='store_true', help='包含已删除文档')
         list_parser.add_argument('--limit', type=int, default=50, help='返回数量限制')
@@ -137,6 +349,7 @@ class CLIParser:
         
         # 搜索文档
         search_parser = subparsers.add_parser('doc-search', help='搜索文档')
+        search_parser.set_defaults(func=cls._cmd_doc_search)
         search_parser.add_argument('--user-id', required=True, help='用户ID')
         search_parser.add_argument('--keyword', required=True, help='搜索关键词')
         search_parser.add_argument('--type', choices=['title', 'author', 'category'], 
@@ -145,12 +358,15 @@ class CLIParser:
         
         # 文档统计
         stats_parser = subparsers.add_parser('doc-stats', help='获取文档统计')
+        stats_parser.set_defaults(func=cls._cmd_doc_stats)
         stats_parser.add_argument('--user-id', help='用户ID（可选）')
     
     def _setup_summary_commands(self, subparsers):
         """设置摘要相关命令"""
+        cls = type(self)
         # 添加摘要
         add_parser = subparsers.add_parser('summary-add', help='添加文档摘要')
+        add_parser.set_defaults(func=cls._cmd_summary_add)
         add_parser.add_argument('--doc-id', required=True, help='文档ID')
         add_parser.add_argument('--user-id', required=True, help='用户ID')
         add_parser.add_argument('--content', required=True, help='摘要内容')
@@ -159,10 +375,12 @@ class CLIParser:
         
         # 获取摘要
         get_parser = subparsers.add_parser('summary-get', help='获取文档摘要')
+        get_parser.set_defaults(func=cls._cmd_summary_get)
         get_parser.add_argument('--doc-id', required=True, help='文档ID')
         
         # 更新摘要
         update_parser = subparsers.add_parser('summary-update', help='更新文档摘要')
+        update_parser.set_defaults(func=cls._cmd_summary_update)
         update_parser.add_argument('--doc-id', required=True, help='文档ID')
         update_parser.add_argument('--content', help='新摘要内容')
         update_parser.add_argument('--type', choices=['short', 'medium', 'long'],
@@ -170,18 +388,22 @@ class CLIParser:
     
     def _setup_tag_commands(self, subparsers):
         """设置标签相关命令"""
+        cls = type(self)
         # 添加标签
         add_parser = subparsers.add_parser('tag-add', help='添加文档标签')
+        add_parser.set_defaults(func=cls._cmd_tag_add)
         add_parser.add_argument('--doc-id', required=True, help='文档ID')
         add_parser.add_argument('--user-id', required=True, help='用户ID')
         add_parser.add_argument('--keywords', nargs='+', required=True, help='关键词列表')
         
         # 获取标签
         get_parser = subparsers.add_parser('tag-get', help='获取文档标签')
+        get_parser.set_defaults(func=cls._cmd_tag_get)
         get_parser.add_argument('--doc-id', required=True, help='文档ID')
         
         # 根据标签搜索文档
         search_parser = subparsers.add_parser('tag-search', help='根据标签搜索文档')
+        search_parser.set_defaults(func=cls._cmd_tag_search)
         search_parser.add_argument('--keywords', nargs='+', required=True, help='关键词列表')
         search_parser.add_argument('--match', choices=['any', 'all'], default='any',
                                   help='匹配类型')
@@ -189,12 +411,15 @@ class CLIParser:
         
         # 热门标签
         popular_parser = subparsers.add_parser('tag-popular', help='获取热门标签')
+        popular_parser.set_defaults(func=cls._cmd_tag_popular)
         popular_parser.add_argument('--limit', type=int, default=20, help='返回数量限制')
     
     def _setup_entity_commands(self, subparsers):
         """设置实体相关命令"""
+        cls = type(self)
         # 添加实体
         add_parser = subparsers.add_parser('entity-add', help='添加文档实体')
+        add_parser.set_defaults(func=cls._cmd_entity_add)
         add_parser.add_argument('--doc-id', required=True, help='文档ID')
         add_parser.add_argument('--user-id', required=True, help='用户ID')
         add_parser.add_argument('--entities', nargs='+', required=True, 
@@ -202,10 +427,12 @@ class CLIParser:
         
         # 获取实体
         get_parser = subparsers.add_parser('entity-get', help='获取文档实体')
+        get_parser.set_defaults(func=cls._cmd_entity_get)
         get_parser.add_argument('--doc-id', required=True, help='文档ID')
         
         # 根据实体搜索文档
         search_parser = subparsers.add_parser('entity-search', help='根据实体搜索文档')
+        search_parser.set_defaults(func=cls._cmd_entity_search)
         search_parser.add_argument('--names', nargs='+', required=True, help='实体名称列表')
         search_parser.add_argument('--match', choices=['any', 'all'], default='any',
                                    help='匹配类型')
@@ -213,13 +440,16 @@ class CLIParser:
         
         # 热门实体
         popular_parser = subparsers.add_parser('entity-popular', help='获取热门实体')
+        popular_parser.set_defaults(func=cls._cmd_entity_popular)
         popular_parser.add_argument('--type', help='实体类型过滤')
         popular_parser.add_argument('--limit', type=int, default=20, help='返回数量限制')
     
     def _setup_export_commands(self, subparsers):
         """设置导出相关命令"""
+        cls = type(self)
         # 创建导出任务
         create_parser = subparsers.add_parser('export-create', help='创建导出任务')
+        create_parser.set_defaults(func=cls._cmd_export_create)
         create_parser.add_argument('--user-id', required=True, help='用户ID')
         create_parser.add_argument('--type', choices=['graph', 'summary', 'document', 'tags'],
                                    required=True, help='导出类型')
@@ -229,10 +459,12 @@ class CLIParser:
         
         # 获取导出任务
         get_parser = subparsers.add_parser('export-get', help='获取导出任务')
+        get_parser.set_defaults(func=cls._cmd_export_get)
         get_parser.add_argument('--export-id', required=True, help='导出ID')
         
         # 导出任务列表
         list_parser = subparsers.add_parser('export-list', help='获取导出任务列表')
+        list_parser.set_defaults(func=cls._cmd_export_list)
         list_parser.add_argument('--user-id', required=True, help='用户ID')
         list_parser.add_argument('--status', choices=['pending', 'processing', 'completed', 'failed'],
                                 help='状态过滤')
@@ -240,8 +472,22 @@ class CLIParser:
         
         # 导出统计
         stats_parser = subparsers.add_parser('export-stats', help='获取导出统计')
+        stats_parser.set_defaults(func=cls._cmd_export_stats)
         stats_parser.add_argument('--user-id', help='用户ID（可选）')
     
+    @staticmethod
+    def format_result(result: Dict[str, Any]) -> str:
+        """
+        将执行结果格式化为JSON字符串（安装了orjson时使用orjson）
+        
+        Args:
+            result: parse_and_execute返回的执行结果
+            
+        Returns:
+            JSON字符串，无法直接序列化的值转换为字符串
+        """
+        return _jdumps(result)
+    
     def parse_and_execute(self, args: List[str] = None) -> Dict[str, Any]:
         """
         解析命令行参数并执行对应操作
@@ -256,344 +502,298 @@ class CLIParser:
             args = sys.argv[1:]
         
         if not args:
+            self._ensure_commands()
             self.parser.print_help()
             return {'success': False, 'message': '请提供命令'}
         
+        # 只构建本次命令所需的子命令
+        self._ensure_commands(args[0])
+        
+        try:
+            parsed_args = self.parser.parse_args(args, namespace=_Args())
+        except argparse.ArgumentError as e:
+            return {'success': False, 'message': f'参数错误: {e}'}
+        
         try:
-            parsed_args = self.parser.parse_args(args)
             return self._execute_command(parsed_args)
         except Exception as e:
             return {'success': False, 'message': f'命令执行失败: {str(e)}'}
     
     def _execute_command(self, args) -> Dict[str, Any]:
-        """执行对应的命令"""
-        command = args.command
-        
-        if command.startswith('user-'):
-            return self._execute_user_command(command, args)
-        elif command.startswith('doc-'):
-            return self._execute_document_command(command, args)
-        elif command.startswith('summary-'):
-            return self._execute_summary_command(command, args)
-        elif command.startswith('tag-'):
-            return self._execute_tag_command(command, args)
-        elif command.startswith('entity-'):
-            return self._execute_entity_command(command, args)
-        elif command.startswith('export-'):
-            return self._execute_export_command(command, args)
-        else:
-            return {'success': False, 'message': f'未知命令: {command}'}
-    
-    def _execute_user_command(self, command: str, args) -> Dict[str, Any]:
-        """执行用户相关命令"""
-        if command == 'user-register':
-            return self.user_service.register_user(
-                username=args.username,
-                email=args.email,
-                password=args.password,
-                role=args.role
-            )
-        elif command == 'user-login':
-            return self.user_service.login_user(
-                email=args.email,
-                password=args.password
-            )
-        elif command == 'user-profile':
-            return self.user_service.get_user_profile(args.user_id)
-        elif command == 'user-update':
-            kwargs = {}
-            if args.username: kwargs['username'] = args.username
-            if args.email: kwargs['email'] = args.email
-            if args.role: kwargs['role'] = args.role
-            if args.theme: kwargs['theme'] = args.theme
-            if args.summary_length: kwargs['summary_length'] = args.summary_length
-            
-            return self.user_service.update_user_profile(args.user_id, **kwargs)
-        elif command == 'user-password':
-            return self.user_service.change_password(
-                user_id=args.user_id,
-                old_password=args.old_password,
-                new_password=args.new_password
-            )
-        elif command == 'user-list':
-            return self.user_service.list_users(
-                role=args.role,
-                status=args.status,
-                limit=args.limit,
-                offset=args.offset
-            )
-        elif command == 'user-stats':
-            return self.user_service.get_user_stats()
-    
-    def _execute_document_command(self, command: str, args) -> Dict[str, Any]:
-        """执行文档相关命令"""
-        if command == 'doc-upload':
-            kwargs = {}
-            if args.author: kwargs['author'] = args.author
-            if args.category: kwargs['category'] = args.category
-            
-            return self.document_service.upload_document(
-                user_id=args.user_id,
-                title=args.title,
-                file_path=args.file_path,
-                file_size=args.file_size,
-                file_format=args.file_format,
-                **kwargs
-            )
-        elif command == 'doc-info':
-            return self.document_service.get_document_info(
-                doc_id=args.doc_id,
-                include_summary=not args.no_summary,
-                include_tags=not args.no_tags,
-                include_entities=not args.no_entities
-            )
-        elif command == 'doc-update':
-            kwargs = {}
-            if args.title: kwargs['title'] = args.title
-            if args.author: kwargs['author'] = args.author
-            if args.category: kwargs['category'] = args.category
-            
-            return self.document_service.update_document_info(
-                doc_id=args.doc_id,
-                user_id=args.user_id,
-                **kwargs
-            )
-        elif command == 'doc-delete':
-            return self.document_service.delete_document(
-                doc_id=args.doc_id,
-                user_id=args.user_id,
-                hard_delete=args.hard
-            )
-        elif command == 'doc-restore':
-            return self.document_service.restore_document(
-                doc_id=args.doc_id,
-                user_id=args.user_id
-            )
-        elif command == 'doc-list':
-            return self.document_service.list_user_documents(
-                user_id=args.user_id,
-                include_deleted=args.include_deleted,
-                limit=args.limit,
-                offset=args.offset
-            )
-        elif command == 'doc-search':
-            return self.document_service.search_documents(
-                user_id=args.user_id,
-                keyword=args.keyword,
-                search_type=args.type,
-                limit=args.limit
-            )
-        elif command == 'doc-stats':
-            return self.document_service.get_document_stats(user_id=args.user_id)
-    
-    def _execute_summary_command(self, command: str, args) -> Dict[str, Any]:
-        """执行摘要相关命令"""
-        if command == 'summary-add':
-            return self.document_service.add_document_summary(
-                doc_id=args.doc_id,
-                user_id=args.user_id,
-                content=args.content,
-                length_type=args.type
-            )
-        elif command == 'summary-get':
-            doc_info = self.document_service.get_document_info(
-                doc_id=args.doc_id,
-                include_summary=True,
-                include_tags=False,
-                include_entities=False
-            )
-            if doc_info['success']:
-                return {
-                    'success': True,
-                    'message': '获取摘要成功',
-                    'summary': doc_info['document'].get('summary')
-                }
-            else:
-                return doc_info
-        elif command == 'summary-update':
-            from .models.summary import Summary
-            summary_model = Summary()
-            
-            kwargs = {}
-            if args.content: kwargs['content'] = args.content
-            if args.type: kwargs['length_type'] = args.type
-            
-            success = summary_model.update_summary(args.doc_id, **kwargs)
-            return {
-                'success': success,
-                'message': '摘要更新成功' if success else '摘要更新失败'
-            }
+        """执行对应的命令（处理函数由子命令解析器通过set_defaults提供）"""
+        func = getattr(args, 'func', None)
+        if func is None:
+            return {'success': False, 'message': f'未知命令: {args.command}'}
+        return func(self, args)
     
-    def _execute_tag_command(self, command: str, args) -> Dict[str, Any]:
-        """执行标签相关命令"""
-        if command == 'tag-add':
-            return self.document_service.add_document_tags(
-                doc_id=args.doc_id,
-                user_id=args.user_id,
-                keywords=args.keywords
-            )
-        elif command == 'tag-get':
-            doc_info = self.document_service.get_document_info(
-                doc_id=args.doc_id,
-                include_summary=False,
-                include_tags=True,
-                include_entities=False
-            )
-            if doc_info['success']:
-                return {
-                    'success': True,
-                    'message': '获取标签成功',
-                    'tags': doc_info['document'].get('tags', [])
-                }
-            else:
-                return doc_info
-        elif command == 'tag-search':
-            from .models.tag import Tag
-            tag_model = Tag()
-            
-            documents = tag_model.search_documents_by_keywords(
-                keywords=args.keywords,
-                match_type=args.match,
-                limit=args.limit
-            )
-            return {
-                'success': True,
-                'message': '搜索文档成功',
-                'documents': documents,
-                'keywords': args.keywords,
-                'match_type': args.match,
-                'total': len(documents)
-            }
-        elif command == 'tag-popular':
-            from .models.tag import Tag
-            tag_model = Tag()
-            
-            keywords = tag_model.get_popular_keywords(limit=args.limit)
-            return {
-                'success': True,
-                'message': '获取热门标签成功',
-                'keywords': keywords
-            }
+    # 用户相关命令
+    def _cmd_user_register(self, args) -> Dict[str, Any]:
+        return self.user_service.register_user(
+            username=args.username,
+            email=args.email,
+            password=args.password,
+            role=args.role
+        )
     
-    def _execute_entity_command(self, command: str, args) -> Dict[str, Any]:
-        """执行实体相关命令"""
-        if command == 'entity-add':
-            # 解析实体列表：name:type name:type
-            entities = []
-            for entity_str in args.entities:
-                if ':' in entity_str:
-                    name, entity_type = entity_str.split(':', 1)
-                    entities.append({'name': name, 'type': entity_type})
-            
-            return self.document_service.add_document_entities(
-                doc_id=args.doc_id,
-                user_id=args.user_id,
-                entities=entities
-            )
-        elif command == 'entity-get':
-            doc_info = self.document_service.get_document_info(
-                doc_id=args.doc_id,
-                include_summary=False,
-                include_tags=False,
-                include_entities=True
-            )
-            if doc_info['success']:
-                return {
-                    'success': True,
-                    'message': '获取实体成功',
-                    'entities': doc_info['document'].get('entities', [])
-                }
-            else:
-                return doc_info
-        elif command == 'entity-search':
-            from .models.entity import Entity
-            entity_model = Entity()
-            
-            documents = entity_model.search_documents_by_entities(
-                entity_names=args.names,
-                match_type=args.match,
-                limit=args.limit
-            )
+    def _cmd_user_login(self, args) -> Dict[str, Any]:
+        return self.user_service.login_user(
+            email=args.email,
+            password=args.password
+        )
+    
+    def _cmd_user_profile(self, args) -> Dict[str, Any]:
+        return self.user_service.get_user_profile(args.user_id)
+    
+    def _cmd_user_update(self, args) -> Dict[str, Any]:
+        kwargs = {key: value for key, value in (
+            ('username', args.username),
+            ('email', args.email),
+            ('role', args.role),
+            ('theme', args.theme),
+            ('summary_length', args.summary_length),
+        ) if value}
+        
+        return self.user_service.update_user_profile(args.user_id, **kwargs)
+    
+    def _cmd_user_password(self, args) -> Dict[str, Any]:
+        return self.user_service.change_password(
+            user_id=args.user_id,
+            old_password=args.old_password,
+            new_password=args.new_password
+        )
+    
+    def _cmd_user_list(self, args) -> Dict[str, Any]:
+        return self.user_service.list_users(
+            role=args.role,
+            status=args.status,
+            limit=args.limit,
+            offset=args.offset
+        )
+    
+    def _cmd_user_stats(self, args) -> Dict[str, Any]:
+        return self.user_service.get_user_stats()
+    
+    # 文档相关命令
+    def _cmd_doc_upload(self, args) -> Dict[str, Any]:
+        kwargs = {key: value for key, value in (
+            ('author', args.author),
+            ('category', args.category),
+        ) if value}
+        
+        return self.document_service.upload_document(
+            user_id=args.user_id,
+            title=args.title,
+            file_path=args.file_path,
+            file_size=args.file_size,
+            file_format=args.file_format,
+            **kwargs
+        )
+    
+    def _cmd_doc_info(self, args) -> Dict[str, Any]:
+        return self.document_service.get_document_info(
+            doc_id=args.doc_id,
+            include_summary=not args.no_summary,
+            include_tags=not args.no_tags,
+            include_entities=not args.no_entities
+        )
+    
+    def _cmd_doc_update(self, args) -> Dict[str, Any]:
+        kwargs = {key: value for key, value in (
+            ('title', args.title),
+            ('author', args.author),
+            ('category', args.category),
+        ) if value}
+        
+        return self.document_service.update_document_info(
+            doc_id=args.doc_id,
+            user_id=args.user_id,
+            **kwargs
+        )
+    
+    def _cmd_doc_delete(self, args) -> Dict[str, Any]:
+        return self.document_service.delete_document(
+            doc_id=args.doc_id,
+            user_id=args.user_id,
+            hard_delete=args.hard
+        )
+    
+    def _cmd_doc_restore(self, args) -> Dict[str, Any]:
+        return self.document_service.restore_document(
+            doc_id=args.doc_id,
+            user_id=args.user_id
+        )
+    
+    def _cmd_doc_list(self, args) -> Dict[str, Any]:
+        return self.document_service.list_user_documents(
+            user_id=args.user_id,
+            include_deleted=args.include_deleted,
+            limit=args.limit,
+            offset=args.offset
+        )
+    
+    def _cmd_doc_search(self, args) -> Dict[str, Any]:
+        return self.document_service.search_documents(
+            user_id=args.user_id,
+            keyword=args.keyword,
+            search_type=args.type,
+            limit=args.limit
+        )
+    
+    def _cmd_doc_stats(self, args) -> Dict[str, Any]:
+        return self.document_service.get_document_stats(user_id=args.user_id)
+    
+    # 摘要相关命令
+    def _cmd_summary_add(self, args) -> Dict[str, Any]:
+        return self.document_service.add_document_summary(
+            doc_id=args.doc_id,
+            user_id=args.user_id,
+            content=args.content,
+            length_type=args.type
+        )
+    
+    def _cmd_summary_get(self, args) -> Dict[str, Any]:
+        return self.document_service.get_document_summary(args.doc_id)
+    
+    def _cmd_summary_update(self, args) -> Dict[str, Any]:
+        kwargs = {key: value for key, value in (
+            ('content', args.content),
+            ('length_type', args.type),
+        ) if value}
+        
+        success = self.summary_model.update_summary(args.doc_id, **kwargs)
+        return {
+            'success': success,
+            'message': '摘要更新成功' if success else '摘要更新失败'
+        }
+    
+    # 标签相关命令
+    def _cmd_tag_add(self, args) -> Dict[str, Any]:
+        return self.document_service.add_document_tags(
+            doc_id=args.doc_id,
+            user_id=args.user_id,
+            keywords=args.keywords
+        )
+    
+    def _cmd_tag_get(self, args) -> Dict[str, Any]:
+        return self.document_service.get_document_tags(args.doc_id)
+    
+    def _cmd_tag_search(self, args) -> Dict[str, Any]:
+        documents = self.tag_model.search_documents_by_keywords(
+            keywords=args.keywords,
+            match_type=args.match,
+            limit=args.limit
+        )
+        return {
+            'success': True,
+            'message': '搜索文档成功',
+            'documents': documents,
+            'keywords': args.keywords,
+            'match_type': args.match,
+            'total': len(documents)
+        }
+    
+    def _cmd_tag_popular(self, args) -> Dict[str, Any]:
+        keywords = self.tag_model.get_popular_keywords(limit=args.limit)
+        return {
+            'success': True,
+            'message': '获取热门标签成功',
+            'keywords': keywords
+        }
+    
+    # 实体相关命令
+    def _cmd_entity_add(self, args) -> Dict[str, Any]:
+        return self.document_service.add_document_entities(
+            doc_id=args.doc_id,
+            user_id=args.user_id,
+            entities=_parse_entities(args.entities)
+        )
+    
+    def _cmd_entity_get(self, args) -> Dict[str, Any]:
+        return self.document_service.get_document_entities(args.doc_id)
+    
+    def _cmd_entity_search(self, args) -> Dict[str, Any]:
+        documents = self.entity_model.search_documents_by_entities(
+            entity_names=args.names,
+            match_type=args.match,
+            limit=args.limit
+        )
+        return {
+            'success': True,
+            'message': '搜索文档成功',
+            'documents': documents,
+            'entity_names': args.names,
+            'match_type': args.match,
+            'total': len(documents)
+        }
+    
+    def _cmd_entity_popular(self, args) -> Dict[str, Any]:
+        entities = self.entity_model.get_popular_entities(
+            entity_type=args.type,
+            limit=args.limit
+        )
+        return {
+            'success': True,
+            'message': '获取热门实体成功',
+            'entities': entities
+        }
+    
+    # 导出相关命令
+    def _cmd_export_create(self, args) -> Dict[str, Any]:
+        export_params = {}
+        if args.doc_ids:
+            export_params['doc_ids'] = args.doc_ids
+        
+        export_id = self.export_model.create_export(
+            user_id=args.user_id,
+            export_type=args.type,
+            format=args.format,
+            doc_ids=args.doc_ids,
+            export_params=export_params
+        )
+        
+        if export_id:
             return {
                 'success': True,
-                'message': '搜索文档成功',
-                'documents': documents,
-                'entity_names': args.names,
-                'match_type': args.match,
-                'total': len(documents)
+                'message': '导出任务创建成功',
+                'export_id': export_id
             }
-        elif command == 'entity-popular':
-            from .models.entity import Entity
-            entity_model = Entity()
-            
-            entities = entity_model.get_popular_entities(
-                entity_type=args.type,
-                limit=args.limit
-            )
+        else:
             return {
-                'success': True,
-                'message': '获取热门实体成功',
-                'entities': entities
+                'success': False,
+                'message': '导出任务创建失败'
             }
     
-    def _execute_export_command(self, command: str, args) -> Dict[str, Any]:
-        """执行导出相关命令"""
-        from .models.export import Export
-        export_model = Export()
-        
-        if command == 'export-create':
-            export_params = {}
-            if args.doc_ids:
-                export_params['doc_ids'] = args.doc_ids
-            
-            export_id = export_model.create_export(
-                user_id=args.user_id,
-                export_type=args.type,
-                format=args.format,
-                doc_ids=args.doc_ids,
-                export_params=export_params
-            )
-            
-            if export_id:
-                return {
-                    'success': True,
-                    'message': '导出任务创建成功',
-                    'export_id': export_id
-                }
-            else:
-                return {
-                    'success': False,
-                    'message': '导出任务创建失败'
-                }
-        elif command == 'export-get':
-            export_info = export_model.get_export_by_id(args.export_id)
-            if export_info:
-                return {
-                    'success': True,
-                    'message': '获取导出任务成功',
-                    'export': export_info
-                }
-            else:
-                return {
-                    'success': False,
-                    'message': '导出任务不存在'
-                }
-        elif command == 'export-list':
-            exports = export_model.list_user_exports(
-                user_id=args.user_id,
-                status=args.status,
-                limit=args.limit
-            )
+    def _cmd_export_get(self, args) -> Dict[str, Any]:
+        export_info = self.export_model.get_export_by_id(args.export_id)
+        if export_info:
             return {
                 'success': True,
-                'message': '获取导出任务列表成功',
-                'exports': exports,
-                'total': len(exports)
+                'message': '获取导出任务成功',
+                'export': export_info
             }
-        elif command == 'export-stats':
-            stats = export_model.get_export_stats(user_id=args.user_id)
+        else:
             return {
-                'success': True,
-                'message': '获取导出统计成功',
-                'stats': stats
+                'success': False,
+                'message': '导出任务不存在'
             }
+    
+    def _cmd_export_list(self, args) -> Dict[str, Any]:
+        exports = self.export_model.list_user_exports(
+            user_id=args.user_id,
+            status=args.status,
+            limit=args.limit
+        )
+        return {
+            'success': True,
+            'message': '获取导出任务列表成功',
+            'exports': exports,
+            'total': len(exports)
+        }
+    
+    def _cmd_export_stats(self, args) -> Dict[str, Any]:
+        stats = self.export_model.get_export_stats(user_id=args.user_id)
+        return {
+            'success': True,
+            'message': '获取导出统计成功',
+            'stats': stats
+        }
@@ -4,10 +4,13 @@
 提供数据库连接配置和相关工具函数
 """
 
-from .database import DB_CONFIG, DatabaseConnection, generate_user_id
+from .database import (DB_CONFIG, DatabaseConnection, allocate_ids, insert_with_new_id,
+                       generate_user_id)
 
 __all__ = [
     'DB_CONFIG',
     'DatabaseConnection', 
+    'allocate_ids',
+    'insert_with_new_id',
     'generate_user_id'
 ]
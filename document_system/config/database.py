@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
 import os
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from mysql.connector.errors import OperationalError, PoolError
+from functools import lru_cache
 import logging
 
 # 数据库配置 - 优先从环境变量读取（Docker部署），否则使用默认值（本地开发）
@@ -12,21 +18,96 @@ DB_CONFIG = {
     'password': os.environ.get('MYSQL_PASSWORD', '12345678'),
     'database': os.environ.get('MYSQL_DATABASE', 'rjgc'),
     'charset': 'utf8mb4',
-    'autocommit': True
+    'autocommit': True,
+    # 使用驱动自带的C扩展（基于libmysqlclient解码结果行），未安装C扩展或设置MYSQL_USE_PURE=1时使用纯Python实现
+    'use_pure': os.environ.get('MYSQL_USE_PURE') == '1' or not mysql.connector.HAVE_CEXT
 }
 
+if not mysql.connector.HAVE_CEXT:
+    logging.warning("mysql-connector C扩展不可用，结果行将由纯Python解码；请安装带C扩展的二进制包")
+
+# 连接池大小，可通过环境变量调整
+_POOL_SIZE = int(os.environ.get('MYSQL_POOL_SIZE', 8))
+# 每个连接缓存的预处理语句数量上限
+_STMT_CACHE_SIZE = 64
+
+@lru_cache(maxsize=1)
+def _get_pool():
+    """
+    进程内共享的连接池，首次使用时创建，避免每次操作都重新建立TCP连接和认证
+    
+    连接归还时不发送COM_RESET_CONNECTION：各操作不依赖跨取用保留的会话状态
+    （自动提交模式，未提交的事务在归还前已提交或回滚），省去每次归还的一次往返
+    """
+    return pooling.MySQLConnectionPool(pool_name='docsys', pool_size=_POOL_SIZE,
+                                       pool_reset_session=False, **DB_CONFIG)
+
+def _checkout_connection():
+    """从连接池取出连接（调用close()即归还连接池），连接池耗尽时退化为新建独立连接"""
+    try:
+        return _get_pool().get_connection()
+    except PoolError as e:
+        logging.warning(f"连接池已耗尽，新建独立连接: {e}")
+        return mysql.connector.connect(**DB_CONFIG)
+
+def _release_connection(connection):
+    """
+    归还连接（独立连接则关闭）
+    
+    连接池不重置会话，归还前回滚异常退出时遗留的未完成事务，避免被下一个使用者继承
+    """
+    try:
+        if connection.in_transaction:
+            connection.rollback()
+    except Error as e:
+        logging.warning(f"归还连接前回滚事务失败: {e}")
+    finally:
+        connection.close()
+
+# 实际连接 -> (服务端会话ID, (SQL模板, 是否返回字典) -> 预处理游标)，同一语句在每个连接上只解析一次；
+# 连接池归还时不重置会话，预处理语句跨取用保留；连接重连后会话ID变化，旧游标随之丢弃
+_stmt_caches = weakref.WeakKeyDictionary()
+_stmt_caches_lock = threading.Lock()
+
+def _stmt_cache_for(connection):
+    """获取连接对应的预处理游标缓存（按连接池包装下的实际连接保存）"""
+    cnx = getattr(connection, '_cnx', None) or connection
+    session_id = cnx.connection_id
+    with _stmt_caches_lock:
+        entry = _stmt_caches.get(cnx)
+        if entry is None or entry[0] != session_id:
+            entry = _stmt_caches[cnx] = (session_id, OrderedDict())
+    # 连接同一时间只被一个线程取用，缓存本身无需加锁
+    return entry[1]
+
 class DatabaseConnection:
-    """数据库连接管理类"""
+    """
+    数据库连接管理类
+    
+    每次操作从连接池取出连接，结束后立即归还，同一实例可被多个线程共享（如模型类共用的db），
+    不会长期占用连接池名额；需要在多次操作间固定同一连接时使用connect()/with语句
+    """
     
     def __init__(self):
-        self.connection = None
-        self.cursor = None
+        # 通过connect()固定的连接按线程保存
+        self._local = threading.local()
+    
+    @property
+    def connection(self):
+        """当前线程通过connect()固定的连接，未固定时为None"""
+        return getattr(self._local, 'connection', None)
+    
+    @connection.setter
+    def connection(self, value):
+        self._local.connection = value
     
     def connect(self):
-        """建立数据库连接"""
+        """为当前线程固定一个数据库连接，直到disconnect()"""
         try:
-            self.connection = mysql.connector.connect(**DB_CONFIG)
-            self.cursor = self.connection.cursor(dictionary=True)
+            if self.connection:
+                # 先归还旧连接，避免占用连接池名额
+                self.disconnect()
+            self.connection = _checkout_connection()
             logging.info("数据库连接成功")
             return True
         except Error as e:
@@ -34,69 +115,375 @@ class DatabaseConnection:
             return False
     
     def disconnect(self):
-        """关闭数据库连接"""
-        if self.cursor:
-            self.cursor.close()
+        """归还当前线程固定的连接"""
         if self.connection:
-            self.connection.close()
+            _release_connection(self.connection)
+            self.connection = None
         logging.info("数据库连接已关闭")
     
-    def execute_query(self, query, params=None):
-        """执行查询语句"""
+    def __enter__(self):
+        if self.connection is None:
+            self.connect()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disconnect()
+        return False
+    
+    @contextmanager
+    def _acquire(self):
+        """取得单次操作使用的连接：已固定连接时直接使用，否则从连接池取出并在结束时归还"""
+        if self.connection is not None:
+            yield self.connection
+            return
+        
+        connection = _checkout_connection()
+        try:
+            yield connection
+        finally:
+            _release_connection(connection)
+    
+    @contextmanager
+    def _transaction(self, connection):
+        """正常退出时提交未完成的事务，出现异常时回滚"""
+        try:
+            yield
+        except Exception:
+            try:
+                connection.rollback()
+            except Error as e:
+                logging.warning(f"事务回滚失败: {e}")
+            raise
+        
+        # 自动提交模式下没有未完成的事务，无需额外的COMMIT往返
+        if connection.in_transaction:
+            connection.commit()
+    
+    @contextmanager
+    def cursor(self, dictionary=True):
+        """
+        获取短生命周期游标，退出时关闭游标、提交或回滚事务并归还连接
+        
+        用法：
+            with db.cursor() as cursor:
+                cursor.execute(query, params)
+        
+        Args:
+            dictionary: 是否以字典形式返回结果行
+            
+        Yields:
+            游标
+        """
+        with self._acquire() as connection:
+            cursor = connection.cursor(dictionary=dictionary)
+            try:
+                with self._transaction(connection):
+                    yield cursor
+            finally:
+                cursor.close()
+    
+    @contextmanager
+    def _statement(self, connection, query, params, dictionary=True):
+        """
+        获取在指定连接上执行单条语句用的游标
+        
+        位置参数使用缓存的预处理游标；预处理语句不支持命名参数，此时使用短生命周期游标
+        """
+        if isinstance(params, dict):
+            cursor = connection.cursor(dictionary=dictionary)
+            try:
+                with self._transaction(connection):
+                    yield cursor
+            finally:
+                cursor.close()
+        else:
+            with self._transaction(connection):
+                yield self._prepared_cursor(connection, query, dictionary)
+    
+    def _prepared_cursor(self, connection, query, dictionary=True):
+        """获取连接上语句对应的预处理游标（LRU缓存，淘汰时关闭游标）"""
+        stmt_cache = _stmt_cache_for(connection)
+        key = (query, dictionary)
+        cursor = stmt_cache.get(key)
+        if cursor is None:
+            cursor = connection.cursor(prepared=True, dictionary=dictionary)
+            stmt_cache[key] = cursor
+            if len(stmt_cache) > _STMT_CACHE_SIZE:
+                _, evicted = stmt_cache.popitem(last=False)
+                evicted.close()
+        else:
+            stmt_cache.move_to_end(key)
+        return cursor
+    
+    def _run(self, operation):
+        """
+        取得连接执行数据库操作，结束后归还连接
+        
+        不在每次执行前ping服务器；连接失效（OperationalError）时换用新连接重试一次
+        （连接池在下次取出失效连接时自动重连）
+        
+        Args:
+            operation: 接收连接参数的可调用对象
+            
+        Returns:
+            operation的返回值
+        """
         try:
-            if not self.connection or not self.connection.is_connected():
+            with self._acquire() as connection:
+                return operation(connection)
+        except OperationalError as e:
+            logging.warning(f"数据库连接失效，重新连接后重试: {e}")
+            if self.connection is not None:
                 self.connect()
+            with self._acquire() as connection:
+                return operation(connection)
+    
+    def execute_query(self, query, params=None, as_dict=True):
+        """
+        执行查询语句
+        
+        as_dict为True时返回字典列表；为False时返回(列名元组, 行元组列表)，
+        大结果集下避免为每行创建字典
+        """
+        try:
+            def operation(connection):
+                with self._statement(connection, query, params, dictionary=as_dict) as cursor:
+                    cursor.execute(query, params)
+                    rows = cursor.fetchall()
+                    return rows if as_dict else (cursor.column_names, rows)
             
-            self.cursor.execute(query, params)
-            return self.cursor.fetchall()
+            return self._run(operation)
         except Error as e:
             logging.error(f"查询执行失败: {e}")
             return None
     
+    def execute_query_iter(self, query, params=None, as_dict=True):
+        """
+        流式执行查询语句，逐行返回结果
+        
+        使用独立连接上的非缓冲游标，结果不在内存中整体物化，
+        适用于大结果集的遍历
+        
+        Args:
+            query: SQL语句
+            params: 查询参数
+            as_dict: 是否以字典形式返回每一行
+            
+        Yields:
+            结果行
+        """
+        try:
+            connection = _checkout_connection()
+        except Error as e:
+            logging.error(f"查询执行失败: {e}")
+            return
+        
+        try:
+            cursor = connection.cursor(buffered=False, dictionary=as_dict)
+            try:
+                cursor.execute(query, params)
+                for row in cursor:
+                    yield row
+            finally:
+                # 提前结束遍历时丢弃未读取的结果，否则游标无法关闭
+                if connection.unread_result:
+                    connection.consume_results()
+                cursor.close()
+        except Error as e:
+            logging.error(f"查询执行失败: {e}")
+        finally:
+            _release_connection(connection)
+    
     def execute_update(self, query, params=None):
         """执行更新语句(INSERT, UPDATE, DELETE)"""
         try:
-            if not self.connection or not self.connection.is_connected():
-                self.connect()
+            def operation(connection):
+                with self._statement(connection, query, params) as cursor:
+                    cursor.execute(query, params)
+                    return cursor.lastrowid if 'INSERT' in query.upper() else cursor.rowcount
             
-            self.cursor.execute(query, params)
-            self.connection.commit()
-            return self.cursor.lastrowid if 'INSERT' in query.upper() else self.cursor.rowcount
+            return self._run(operation)
         except Error as e:
             logging.error(f"更新执行失败: {e}")
-            if self.connection:
-                self.connection.rollback()
             return None
     
     def execute_many(self, query, params_list):
         """批量执行语句"""
         try:
-            if not self.connection or not self.connection.is_connected():
-                self.connect()
+            def operation(connection):
+                cursor = connection.cursor(dictionary=False)
+                try:
+                    with self._transaction(connection):
+                        cursor.executemany(query, params_list)
+                        return cursor.rowcount
+                finally:
+                    cursor.close()
             
-            self.cursor.executemany(query, params_list)
-            self.connection.commit()
-            return self.cursor.rowcount
+            return self._run(operation)
         except Error as e:
             logging.error(f"批量执行失败: {e}")
-            if self.connection:
-                self.connection.rollback()
             return None
     
+    @contextmanager
     def get_connection(self):
-        """获取数据库连接（用于context manager）"""
+        """
+        获取数据库连接（用于with语句，退出时回滚未完成的事务并归还连接池）
+        
+        Yields:
+            连接
+        """
         try:
-            if not self.connection or not self.connection.is_connected():
-                self.connection = mysql.connector.connect(**DB_CONFIG)
-            return self.connection
+            connection = _checkout_connection()
         except Error as e:
             logging.error(f"获取数据库连接失败: {e}")
             raise
+        
+        try:
+            yield connection
+        finally:
+            _release_connection(connection)
+
+# ID计数器表（与SQL/00_init_all.sql中的定义一致），旧库中不存在时自动创建
+_ID_COUNTER_DDL = """
+CREATE TABLE IF NOT EXISTS sys_id_counter (
+    name VARCHAR(32) NOT NULL,
+    next_val BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+# 计数器名称 -> (表, ID列, ID前缀)，计数器不存在时按表中现有最大编号初始化
+_ID_COUNTERS = {
+    'user': ('sys_user', 'user_id', 'user_'),
+    'doc': ('doc_document', 'doc_id', 'doc_'),
+    'entity': ('doc_entity', 'entity_id', 'ent_'),
+    'export': ('doc_export', 'export_id', 'exp_'),
+    'summary': ('doc_summary', 'summary_id', 'sum_'),
+    'tag': ('doc_tag', 'tag_id', 'tag_'),
+}
+
+_COUNTER_SEED = """
+INSERT IGNORE INTO sys_id_counter (name, next_val)
+SELECT %s, COALESCE(MAX(CAST(SUBSTRING({column}, {start}) AS UNSIGNED)), 0)
+FROM {table}
+WHERE {column} REGEXP %s
+"""
+
+# 本进程内已确认存在的计数器
+_ready_counters = set()
+
+def _ensure_counter(cursor, name):
+    """确保指定的ID计数器已创建并初始化（每个库只初始化一次）"""
+    if name in _ready_counters:
+        return
+    
+    cursor.execute(_ID_COUNTER_DDL)
+    cursor.execute("SELECT 1 FROM sys_id_counter WHERE name = %s", (name,))
+    if cursor.fetchone() is None:
+        table, column, prefix = _ID_COUNTERS[name]
+        seed = _COUNTER_SEED.format(table=table, column=column, start=len(prefix) + 1)
+        cursor.execute(seed, (name, f'^{prefix}[0-9]+$'))
+    
+    _ready_counters.add(name)
+
+def allocate_ids(db, name, count=1):
+    """
+    从ID计数器原子地分配连续的序号
+    
+    在连接池取出的连接上执行，不占用db自身的连接，可在多线程间共享db。
+    UPDATE中的LAST_INSERT_ID(expr)按连接保存分配结果，并通过OK包的insert_id返回，
+    一次往返即可取得序号，并发调用不会分配到相同的序号
+    
+    Args:
+        db: DatabaseConnection实例
+        name: 计数器名称（user/doc/entity/export/summary/tag）
+        count: 分配的序号数量
+        
+    Returns:
+        分配到的第一个序号，计数器不可用（如无建表权限）时返回None
+    """
+    try:
+        with db.get_connection() as connection:
+            with connection.cursor() as cursor:
+                _ensure_counter(cursor, name)
+                cursor.execute(
+                    "UPDATE sys_id_counter SET next_val = LAST_INSERT_ID(next_val + %s) WHERE name = %s",
+                    (count, name)
+                )
+                if not cursor.rowcount:
+                    # 计数器行缺失，下次重新初始化
+                    _ready_counters.discard(name)
+                    return None
+                
+                last = cursor.lastrowid
+                if not last:
+                    cursor.execute("SELECT LAST_INSERT_ID()")
+                    last = cursor.fetchone()[0]
+                if connection.in_transaction:
+                    connection.commit()
+                return int(last) - count + 1
+    except Error as e:
+        logging.error(f"分配ID序号失败: {e}")
+        return None
+
+# 由本连接最近一次分配的序号拼出ID（与f"{prefix}{num:03d}"一致，超过三位时不截断）
+_NEW_ID_EXPR = "CONCAT('{prefix}', LPAD(LAST_INSERT_ID(), GREATEST(3, CHAR_LENGTH(LAST_INSERT_ID())), '0'))"
+
+def insert_with_new_id(db, name, columns, values):
+    """
+    分配一个新ID并以其插入一行，分配、插入与取回ID在一次往返中完成
+    
+    三条语句（计数器UPDATE、INSERT、取回ID的SELECT）以多语句方式一次发送；
+    INSERT仅在计数器UPDATE命中一行时执行，计数器行缺失时不会写入错误的ID
+    
+    Args:
+        db: DatabaseConnection实例
+        name: 计数器名称（user/doc/entity/export/summary/tag），决定目标表、ID列与ID前缀
+        columns: ID列以外要写入的列名
+        values: 与columns对应的值
+        
+    Returns:
+        新记录的ID，计数器不可用时返回None（调用方可退回先生成ID再插入）
+    """
+    table, column, prefix = _ID_COUNTERS[name]
+    new_id = _NEW_ID_EXPR.format(prefix=prefix)
+    placeholders = ', '.join(['%s'] * len(values))
+    operation = (
+        "UPDATE sys_id_counter SET next_val = LAST_INSERT_ID(next_val + 1) WHERE name = %s; "
+        f"INSERT INTO {table} ({column}, {', '.join(columns)}) "
+        f"SELECT {new_id}, {placeholders} FROM DUAL WHERE ROW_COUNT() = 1; "
+        f"SELECT {new_id}, ROW_COUNT()"
+    )
+    
+    try:
+        with db.get_connection() as connection:
+            with connection.cursor() as cursor:
+                _ensure_counter(cursor, name)
+                row = None
+                for result in cursor.execute(operation, (name, *values), multi=True):
+                    if result.with_rows:
+                        row = result.fetchone()
+                if connection.in_transaction:
+                    connection.commit()
+                
+                if not row or row[1] != 1:
+                    # 计数器行缺失，下次重新初始化
+                    _ready_counters.discard(name)
+                    return None
+                return row[0]
+    except Error as e:
+        logging.error(f"插入记录失败: {e}")
+        return None
 
 def generate_user_id(db):
     """生成用户ID，保持user_XXX格式"""
     try:
-        # 查询当前最大ID
+        # 通过计数器行原子递增分配序号
+        num = allocate_ids(db, 'user')
+        if num:
+            return f"user_{num:03d}"  # 格式化为user_006
+        
+        # 计数器不可用（如无建表权限）时退回扫描当前最大ID
         max_id_query = """
         SELECT MAX(user_id) as max_id 
         FROM sys_user 
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+只读查询结果缓存
+
+进程内带过期时间的LRU缓存，按命名空间（如document、entity）分组，
+写操作后按命名空间整体失效。多进程部署时各进程独立缓存，
+其他进程的写入最多在过期时间后可见
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+# 缓存条目上限与过期时间（秒），可通过环境变量调整
+_CACHE_SIZE = int(os.environ.get('QUERY_CACHE_SIZE', 4096))
+_CACHE_TTL = float(os.environ.get('QUERY_CACHE_TTL', 30))
+
+
+class _TTLCache:
+    """线程安全的带过期时间LRU缓存"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 每次失效时递增，查询期间发生失效的结果不再写入缓存
+        self.generation = 0
+    
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+    
+    def put(self, key: Any, value: Any, generation: int) -> None:
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+
+# 命名空间 -> 缓存
+_caches: Dict[str, _TTLCache] = {}
+_caches_lock = threading.Lock()
+
+
+def _get_cache(namespace: str, ttl: Optional[float] = None) -> _TTLCache:
+    cache = _caches.get(namespace)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(namespace, _TTLCache(_CACHE_SIZE, ttl or _CACHE_TTL))
+    return cache
+
+
+def _copy_result(value: Any) -> Any:
+    """复制查询结果（字典或字典列表），避免调用方修改缓存中的对象"""
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return [dict(item) if isinstance(item, dict) else item for item in value]
+    return value
+
+
+def cached_query(namespace: str, ttl: Optional[float] = None, default: Any = None) -> Callable:
+    """
+    缓存模型只读查询方法的结果
+    
+    以(方法名, 参数)为键；被装饰的方法在查询失败时应返回None，该结果不缓存，
+    调用方得到default，避免一次临时的数据库错误在过期前一直被当作查询结果。
+    参数不可哈希时直接查询
+    
+    Args:
+        namespace: 缓存命名空间，写操作通过invalidate_queries按命名空间失效
+        ttl: 过期时间（秒，可选），默认使用QUERY_CACHE_TTL；同一命名空间以首次使用时的设置为准
+        default: 查询失败时返回给调用方的值，可为生成该值的可调用对象（如list、dict）
+    
+    Returns:
+        装饰器
+    """
+    def decorator(func: Callable) -> Callable:
+        def fallback() -> Any:
+            return default() if callable(default) else default
+        
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            cache = _get_cache(namespace, ttl)
+            try:
+                cached = cache.get(key)
+            except TypeError:
+                result = func(self, *args, **kwargs)
+                return fallback() if result is None else result
+            
+            if cached is not None:
+                return _copy_result(cached)
+            
+            generation = cache.generation
+            result = func(self, *args, **kwargs)
+            if result is None:
+                return fallback()
+            cache.put(key, _copy_result(result), generation)
+            return result
+        
+        return wrapper
+    
+    return decorator
+
+
+def invalidate_queries(*namespaces: str) -> None:
+    """
+    使指定命名空间的缓存全部失效
+    
+    Args:
+        namespaces: 缓存命名空间
+    """
+    for namespace in namespaces:
+        _get_cache(namespace).clear()
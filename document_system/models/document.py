@@ -4,16 +4,70 @@
 """
 
 import time
-from typing import Optional, List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 from datetime import datetime
-from ..config.database import DatabaseConnection
+from ..config.database import DatabaseConnection, allocate_ids, insert_with_new_id
+from ..config.query_cache import cached_query, invalidate_queries
+from .entity import Entity
+
+# ngram全文解析器的词元长度（ngram_token_size默认值），更短的关键词无法通过全文索引检索
+_NGRAM_TOKEN_SIZE = 2
+
+# doc_document上建有单列全文索引的列，首次搜索时加载
+_fulltext_columns = None
+
+# 计数器不可用时取下一个编号（按数值比较，超过三位时不会因字符串排序出错）
+_NEXT_DOC_NUM_QUERY = """
+SELECT COALESCE(MAX(CAST(SUBSTRING(doc_id, 5) AS UNSIGNED)), 0) + 1
+FROM doc_document
+WHERE doc_id REGEXP '^doc_[0-9]+$'
+"""
+
+# 创建文档时写入的列（doc_id以外）
+_DOC_COLUMNS = ('user_id', 'title', 'author', 'file_path', 'file_size', 'file_format', 'category')
+
+# update_document允许修改的字段
+_UPDATABLE_FIELDS = frozenset(('title', 'author', 'file_path', 'file_size', 'file_format', 'category'))
+
+# 待更新字段集合 -> UPDATE语句
+_UPDATE_SQL_CACHE: Dict[frozenset, str] = {}
+
+# 热点路径的SQL语句，按名称引用同一字符串对象，
+# 使DatabaseConnection缓存的预处理游标可直接复用服务端已解析的语句
+_STMT = {
+    'insert_document': """
+    INSERT INTO doc_document 
+    (doc_id, user_id, title, author, file_path, file_size, file_format, category)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """,
+    'get_doc_by_id': """
+    SELECT doc_id, user_id, title, author, upload_date, file_path, 
+           file_size, file_format, category, is_deleted
+    FROM doc_document 
+    WHERE doc_id = %s AND is_deleted = 0
+    """,
+    'get_doc_by_id_with_deleted': """
+    SELECT doc_id, user_id, title, author, upload_date, file_path, 
+           file_size, file_format, category, is_deleted
+    FROM doc_document 
+    WHERE doc_id = %s
+    """,
+}
+
+
+@lru_cache(maxsize=1)
+def _dashboard_executor() -> ThreadPoolExecutor:
+    """首页数据并发查询共用的线程池，首次使用时创建"""
+    return ThreadPoolExecutor(max_workers=3, thread_name_prefix='dashboard')
 
 
 class Document:
     """文档数据模型类"""
     
-    def __init__(self):
-        self.db = DatabaseConnection()
+    # 所有实例共用的数据库连接管理对象（每次操作从连接池取出连接、用后即归还，可在多线程间共享）
+    db = DatabaseConnection()
     
     def generate_doc_id(self) -> str:
         """
@@ -22,24 +76,17 @@ class Document:
         Returns:
             文档ID
         """
+        # 通过计数器行原子分配序号，避免并发创建时取到相同的ID
+        num = allocate_ids(self.db, 'doc')
+        if num:
+            return f"doc_{num:03d}"
+        
+        # 计数器不可用时退回查询当前最大编号
         with self.db.get_connection() as connection:
             with connection.cursor() as cursor:
-                # 查询当前最大的doc_id
-                cursor.execute("SELECT doc_id FROM doc_document ORDER BY doc_id DESC LIMIT 1")
-                result = cursor.fetchone()
-                
-                if result and result[0]:
-                    # 提取数字部分并递增
-                    current_id = result[0]
-                    if current_id.startswith('doc_'):
-                        try:
-                            num = int(current_id[4:]) + 1
-                            return f"doc_{num:03d}"
-                        except ValueError:
-                            pass
-                
-                # 如果没有找到记录或格式不对，从001开始
-                return "doc_001"
+                cursor.execute(_NEXT_DOC_NUM_QUERY)
+                num = int(cursor.fetchone()[0])
+                return f"doc_{num:03d}"
     
     def create_document(self, user_id: str, title: str, file_path: str, 
                        file_size: int, author: Optional[str] = None, 
@@ -60,25 +107,78 @@ class Document:
         Returns:
             文档ID，如果创建失败返回None
         """
+        values = (user_id, title, author, file_path, file_size, file_format, category)
+        
+        # 分配ID、插入文档并取回ID在一次往返中完成
+        doc_id = insert_with_new_id(self.db, 'doc', _DOC_COLUMNS, values)
+        if doc_id:
+            invalidate_queries('document', 'entity')
+            return doc_id
+        
+        # 计数器不可用时先生成ID再插入
         doc_id = self.generate_doc_id()
         
-        query = """
-        INSERT INTO doc_document 
-        (doc_id, user_id, title, author, file_path, file_size, file_format, category)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        try:
+            result = self.db.execute_update(_STMT['insert_document'],
+                                            (doc_id, user_id, title, author, 
+                                             file_path, file_size, file_format, category))
+            if result is None:
+                return None
+            invalidate_queries('document', 'entity')
+            return doc_id
+        except Exception as e:
+            print(f"创建文档失败: {e}")
+            return None
+    
+    def create_document_with_entities(self, user_id: str, title: str, file_path: str,
+                                      file_size: int, entities: List[Dict[str, str]],
+                                      author: Optional[str] = None,
+                                      file_format: str = 'pdf',
+                                      category: Optional[str] = None
+                                      ) -> Optional[Tuple[str, List[str]]]:
         """
+        在同一事务中创建文档及其实体，任一步失败时整体回滚，不留下没有实体的文档
+        
+        Args:
+            user_id: 用户ID
+            title: 文档标题
+            file_path: 文件路径
+            file_size: 文件大小（字节）
+            entities: 实体列表，每个实体包含name和type字段
+            author: 作者（可选）
+            file_format: 文件格式
+            category: 文档分类（可选）
+            
+        Returns:
+            (文档ID, 实体ID列表)，如果创建失败返回None
+        """
+        # 序号在事务外分配，回滚时只会空出编号，不会产生重复ID
+        doc_id = self.generate_doc_id()
+        start = allocate_ids(self.db, 'entity', len(entities)) if entities else None
         
         try:
             with self.db.get_connection() as connection:
-                with connection.cursor() as cursor:
-                    cursor.execute(query, (doc_id, user_id, title, author, 
-                                         file_path, file_size, file_format, category))
+                connection.start_transaction()
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(_STMT['insert_document'],
+                                       (doc_id, user_id, title, author, 
+                                        file_path, file_size, file_format, category))
+                        entity_ids = []
+                        if entities:
+                            entity_ids = Entity.insert_entities(cursor, doc_id, entities, start)
                     connection.commit()
-                    return doc_id
+                except Exception:
+                    connection.rollback()
+                    raise
+            
+            invalidate_queries('document', 'entity')
+            return doc_id, entity_ids
         except Exception as e:
             print(f"创建文档失败: {e}")
             return None
     
+    @cached_query('document')
     def get_document_by_id(self, doc_id: str, include_deleted: bool = False) -> Optional[Dict[str, Any]]:
         """
         根据ID获取文档信息
@@ -91,36 +191,48 @@ class Document:
             文档信息字典，如果不存在返回None
         """
         if include_deleted:
-            query = """
-            SELECT doc_id, user_id, title, author, upload_date, file_path, 
-                   file_size, file_format, category, is_deleted
-            FROM doc_document 
-            WHERE doc_id = %s
-            """
+            query = _STMT['get_doc_by_id_with_deleted']
         else:
-            query = """
-            SELECT doc_id, user_id, title, author, upload_date, file_path, 
-                   file_size, file_format, category, is_deleted
-            FROM doc_document 
-            WHERE doc_id = %s AND is_deleted = 0
-            """
+            query = _STMT['get_doc_by_id']
+        
+        try:
+            rows = self.db.execute_query(query, (doc_id,))
+            result = rows[0] if rows else None
+            
+            if result:
+                # 转换datetime为字符串
+                if result['upload_date']:
+                    result['upload_date'] = result['upload_date'].isoformat()
+            
+            return result
+        except Exception as e:
+            print(f"获取文档失败: {e}")
+            return None
+    
+    @cached_query('document', default=False)
+    def document_exists(self, doc_id: str) -> bool:
+        """
+        检查文档是否存在且未删除（只按主键查询，不读取文档内容）
+        
+        Args:
+            doc_id: 文档ID
+            
+        Returns:
+            文档存在且未删除返回True
+        """
+        query = "SELECT 1 FROM doc_document WHERE doc_id = %s AND is_deleted = 0"
         
         try:
             with self.db.get_connection() as connection:
-                with connection.cursor(dictionary=True) as cursor:
+                with connection.cursor() as cursor:
                     cursor.execute(query, (doc_id,))
-                    result = cursor.fetchone()
-                    
-                    if result:
-                        # 转换datetime为字符串
-                        if result['upload_date']:
-                            result['upload_date'] = result['upload_date'].isoformat()
-                    
-                    return result
+                    return cursor.fetchone() is not None
         except Exception as e:
-            print(f"获取文档失败: {e}")
+            print(f"检查文档失败: {e}")
+            # 返回None使失败结果不被缓存，调用方得到装饰器的默认值
             return None
     
+    @cached_query('document')
     def list_user_documents(self, user_id: str, include_deleted: bool = False) -> List[Dict[str, Any]]:
         """
         获取用户的文档列表
@@ -132,38 +244,75 @@ class Document:
         Returns:
             文档列表
         """
+        return list(self.iter_user_documents(user_id, include_deleted))
+    
+    def iter_user_documents(self, user_id: str, include_deleted: bool = False,
+                            limit: Optional[int] = None, offset: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        逐条获取用户的文档（流式读取，不整体加载结果集）
+        
+        Args:
+            user_id: 用户ID
+            include_deleted: 是否包含已删除的文档
+            limit: 返回数量限制（可选，分页在SQL中完成）
+            offset: 偏移量
+            
+        Yields:
+            文档信息
+        """
         if include_deleted:
             query = """
-            SELECT doc_id, title, author, upload_date, file_size, 
+            SELECT doc_id, title, author,
+                   DATE_FORMAT(upload_date, '%Y-%m-%dT%H:%i:%S') AS upload_date, file_size, 
                    file_format, category, is_deleted
             FROM doc_document 
             WHERE user_id = %s
-            ORDER BY upload_date DESC
+            ORDER BY doc_document.upload_date DESC
             """
         else:
             query = """
-            SELECT doc_id, title, author, upload_date, file_size, 
+            SELECT doc_id, title, author,
+                   DATE_FORMAT(upload_date, '%Y-%m-%dT%H:%i:%S') AS upload_date, file_size, 
                    file_format, category
             FROM doc_document 
             WHERE user_id = %s AND is_deleted = 0
-            ORDER BY upload_date DESC
+            ORDER BY doc_document.upload_date DESC
             """
         
+        params = (user_id,)
+        if limit is not None:
+            query += " LIMIT %s OFFSET %s"
+            params = (user_id, limit, max(offset, 0))
+        
+        # upload_date已在SQL中格式化为ISO字符串
+        yield from self.db.execute_query_iter(query, params)
+    
+    @cached_query('document', default=0)
+    def count_user_documents(self, user_id: str, include_deleted: bool = False) -> int:
+        """
+        统计用户的文档数量
+        
+        Args:
+            user_id: 用户ID
+            include_deleted: 是否包含已删除的文档
+            
+        Returns:
+            文档数量
+        """
+        if include_deleted:
+            query = "SELECT COUNT(*) FROM doc_document WHERE user_id = %s"
+        else:
+            query = "SELECT COUNT(*) FROM doc_document WHERE user_id = %s AND is_deleted = 0"
+        
         try:
             with self.db.get_connection() as connection:
-                with connection.cursor(dictionary=True) as cursor:
+                with connection.cursor() as cursor:
                     cursor.execute(query, (user_id,))
-                    results = cursor.fetchall()
-                    
-                    # 转换datetime为字符串
-                    for result in results:
-                        if result['upload_date']:
-                            result['upload_date'] = result['upload_date'].isoformat()
-                    
-                    return results
+                    return cursor.fetchone()[0]
         except Exception as e:
-            print(f"获取文档列表失败: {e}")
-            return []
+            print(f"统计文档数量失败: {e}")
+            # 返回None使失败结果不被缓存，调用方得到装饰器的默认值
+            return None
     
     def update_document(self, doc_id: str, **kwargs) -> bool:
         """
@@ -176,31 +325,25 @@ class Document:
         Returns:
             是否更新成功
         """
-        if not kwargs:
+        fields = frozenset(field for field in kwargs if field in _UPDATABLE_FIELDS)
+        if not fields:
             return False
         
-        # 构建动态UPDATE查询
-        set_clauses = []
-        values = []
-        
-        for field, value in kwargs.items():
-            if field in ['title', 'author', 'file_path', 'file_size', 
-                        'file_format', 'category']:
-                set_clauses.append(f"{field} = %s")
-                values.append(value)
-        
-        if not set_clauses:
-            return False
-        
-        query = f"UPDATE doc_document SET {', '.join(set_clauses)} WHERE doc_id = %s"
+        # 同一组字段始终得到同一条SQL，可复用已缓存的预处理语句
+        query = _UPDATE_SQL_CACHE.get(fields)
+        if query is None:
+            set_clause = ', '.join(f"{field} = %s" for field in sorted(fields))
+            query = _UPDATE_SQL_CACHE.setdefault(
+                fields, f"UPDATE doc_document SET {set_clause} WHERE doc_id = %s")
+        values = [kwargs[field] for field in sorted(fields)]
         values.append(doc_id)
         
         try:
-            with self.db.get_connection() as connection:
-                with connection.cursor() as cursor:
-                    cursor.execute(query, values)
-                    connection.commit()
-                    return cursor.rowcount > 0
+            rowcount = self.db.execute_update(query, values)
+            if rowcount is None:
+                return False
+            invalidate_queries('document', 'entity')
+            return rowcount > 0
         except Exception as e:
             print(f"更新文档失败: {e}")
             return False
@@ -222,6 +365,7 @@ class Document:
                 with connection.cursor() as cursor:
                     cursor.execute(query, (doc_id,))
                     connection.commit()
+                    invalidate_queries('document', 'entity')
                     return cursor.rowcount > 0
         except Exception as e:
             print(f"删除文档失败: {e}")
@@ -244,6 +388,7 @@ class Document:
                 with connection.cursor() as cursor:
                     cursor.execute(query, (doc_id,))
                     connection.commit()
+                    invalidate_queries('document', 'entity')
                     return cursor.rowcount > 0
         except Exception as e:
             print(f"恢复文档失败: {e}")
@@ -266,13 +411,15 @@ class Document:
                 with connection.cursor() as cursor:
                     cursor.execute(query, (doc_id,))
                     connection.commit()
+                    invalidate_queries('document', 'entity', 'summary')
                     return cursor.rowcount > 0
         except Exception as e:
             print(f"硬删除文档失败: {e}")
             return False
     
     def search_documents(self, user_id: str, keyword: str, 
-                        search_type: str = 'title') -> List[Dict[str, Any]]:
+                        search_type: str = 'title',
+                        limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         搜索文档
         
@@ -280,56 +427,124 @@ class Document:
             user_id: 用户ID
             keyword: 搜索关键词
             search_type: 搜索类型（title/author/category）
+            limit: 返回数量限制（可选）
             
         Returns:
             搜索结果列表
         """
-        if search_type == 'title':
-            query = """
-            SELECT doc_id, title, author, upload_date, file_size, 
-                   file_format, category
-            FROM doc_document 
-            WHERE user_id = %s AND is_deleted = 0 AND title LIKE %s
-            ORDER BY upload_date DESC
-            """
-            search_param = f"%{keyword}%"
-        elif search_type == 'author':
-            query = """
-            SELECT doc_id, title, author, upload_date, file_size, 
-                   file_format, category
-            FROM doc_document 
-            WHERE user_id = %s AND is_deleted = 0 AND author LIKE %s
-            ORDER BY upload_date DESC
-            """
-            search_param = f"%{keyword}%"
+        return list(self.iter_search_documents(user_id, keyword, search_type, limit))
+    
+    def iter_search_documents(self, user_id: str, keyword: str,
+                              search_type: str = 'title',
+                              limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        逐条返回文档搜索结果（流式读取，不整体加载结果集）
+        
+        Args:
+            user_id: 用户ID
+            keyword: 搜索关键词
+            search_type: 搜索类型（title/author/category）
+            limit: 返回数量限制（可选，在SQL中限制）
+            
+        Yields:
+            文档信息
+        """
+        order_params = ()
+        order_by = "doc_document.upload_date DESC"
+        if search_type in ('title', 'author'):
+            phrase = keyword.replace('"', ' ')
+            words = phrase.split()
+            if (words and min(len(word) for word in words) >= _NGRAM_TOKEN_SIZE
+                    and self._has_fulltext_index(search_type)):
+                # 全文索引按短语检索，结果按相关度排序
+                match = f"MATCH({search_type}) AGAINST (%s IN BOOLEAN MODE)"
+                condition = match
+                search_param = f'"{phrase}"'
+                order_by = f"{match} DESC, {order_by}"
+                order_params = (search_param,)
+            else:
+                # 单字关键词短于ngram词元，或尚未建立全文索引时使用LIKE
+                condition = f"{search_type} LIKE %s"
+                search_param = f"%{keyword}%"
         elif search_type == 'category':
-            query = """
-            SELECT doc_id, title, author, upload_date, file_size, 
-                   file_format, category
-            FROM doc_document 
-            WHERE user_id = %s AND is_deleted = 0 AND category = %s
-            ORDER BY upload_date DESC
-            """
+            condition = "category = %s"
             search_param = keyword
         else:
-            return []
+            return
         
-        try:
-            with self.db.get_connection() as connection:
-                with connection.cursor(dictionary=True) as cursor:
-                    cursor.execute(query, (user_id, search_param))
-                    results = cursor.fetchall()
-                    
-                    # 转换datetime为字符串
-                    for result in results:
-                        if result['upload_date']:
-                            result['upload_date'] = result['upload_date'].isoformat()
-                    
-                    return results
-        except Exception as e:
-            print(f"搜索文档失败: {e}")
-            return []
+        query = f"""
+        SELECT doc_id, title, author,
+               DATE_FORMAT(upload_date, '%Y-%m-%dT%H:%i:%S') AS upload_date, file_size, 
+               file_format, category
+        FROM doc_document 
+        WHERE user_id = %s AND is_deleted = 0 AND {condition}
+        ORDER BY {order_by}
+        """
+        params = (user_id, search_param) + order_params
+        if limit:
+            query += " LIMIT %s"
+            params += (limit,)
+        
+        # upload_date已在SQL中格式化为ISO字符串
+        yield from self.db.execute_query_iter(query, params)
+    
+    def _has_fulltext_index(self, column: str) -> bool:
+        """
+        检查doc_document的指定列上是否已建立单列全文索引
+        
+        首次调用时查询information_schema并缓存结果，未执行索引迁移的数据库回退到LIKE检索
+        
+        Args:
+            column: 列名
+            
+        Returns:
+            是否存在全文索引
+        """
+        global _fulltext_columns
+        if _fulltext_columns is None:
+            query = """
+            SELECT MIN(column_name) AS column_name
+            FROM information_schema.STATISTICS
+            WHERE table_schema = DATABASE() AND table_name = 'doc_document'
+                  AND index_type = 'FULLTEXT'
+            GROUP BY index_name
+            HAVING COUNT(*) = 1
+            """
+            rows = self.db.execute_query(query)
+            if rows is None:
+                return False
+            _fulltext_columns = frozenset(row['column_name'] for row in rows)
+        return column in _fulltext_columns
     
+    def get_dashboard(self, user_id: str, recent_limit: int = 10,
+                      popular_limit: int = 10) -> Dict[str, Any]:
+        """
+        获取首页数据（最近文档、热门实体、文档统计）
+        
+        三个查询在线程池中并发执行，各自从连接池取出独立连接，
+        总耗时接近最慢的一个查询而不是三者之和
+        
+        Args:
+            user_id: 用户ID
+            recent_limit: 最近文档数量
+            popular_limit: 热门实体数量
+            
+        Returns:
+            包含recent_documents、popular_entities和stats的字典
+        """
+        executor = _dashboard_executor()
+        recent = executor.submit(
+            lambda: list(self.iter_user_documents(user_id, limit=recent_limit)))
+        popular = executor.submit(Entity().get_popular_entities, None, popular_limit)
+        stats = executor.submit(self.get_document_stats, user_id)
+        
+        return {
+            'recent_documents': recent.result(),
+            'popular_entities': popular.result(),
+            'stats': stats.result()
+        }
+    
+    @cached_query('document', default=dict)
     def get_document_stats(self, user_id: Optional[str] = None) -> Dict[str, Any]:
         """
         获取文档统计信息
@@ -346,8 +561,8 @@ class Document:
                 COUNT(*) as total_docs,
                 COUNT(CASE WHEN is_deleted = 0 THEN 1 END) as active_docs,
                 COUNT(CASE WHEN is_deleted = 1 THEN 1 END) as deleted_docs,
-                SUM(file_size) as total_size,
-                AVG(file_size) as avg_size,
+                CAST(COALESCE(SUM(file_size), 0) AS SIGNED) as total_size,
+                CAST(COALESCE(ROUND(AVG(file_size), 2), 0) AS DOUBLE) as avg_size,
                 COUNT(DISTINCT category) as category_count
             FROM doc_document 
             WHERE user_id = %s
@@ -359,25 +574,39 @@ class Document:
                 COUNT(*) as total_docs,
                 COUNT(CASE WHEN is_deleted = 0 THEN 1 END) as active_docs,
                 COUNT(CASE WHEN is_deleted = 1 THEN 1 END) as deleted_docs,
-                SUM(file_size) as total_size,
-                AVG(file_size) as avg_size,
+                CAST(COALESCE(SUM(file_size), 0) AS SIGNED) as total_size,
+                CAST(COALESCE(ROUND(AVG(file_size), 2), 0) AS DOUBLE) as avg_size,
                 COUNT(DISTINCT category) as category_count
             FROM doc_document
             """
             params = ()
         
+        # 汇总表由doc_document上的触发器维护，每个用户一行，读取时无需扫描文档表
+        where = "WHERE user_id = %s" if user_id else ""
+        summary_query = f"""
+        SELECT 
+            CAST(COALESCE(SUM(total_docs), 0) AS SIGNED) as total_docs,
+            CAST(COALESCE(SUM(active_docs), 0) AS SIGNED) as active_docs,
+            CAST(COALESCE(SUM(deleted_docs), 0) AS SIGNED) as deleted_docs,
+            CAST(COALESCE(SUM(total_size), 0) AS SIGNED) as total_size,
+            CAST(COALESCE(ROUND(SUM(total_size) / NULLIF(SUM(total_docs), 0), 2), 0) AS DOUBLE) as avg_size,
+            (SELECT COUNT(DISTINCT category) FROM doc_category_presence {where}) as category_count
+        FROM doc_document_stats
+        {where}
+        """
+        
         try:
             with self.db.get_connection() as connection:
                 with connection.cursor(dictionary=True) as cursor:
-                    cursor.execute(query, params)
-                    result = cursor.fetchone()
-                    
-                    # 处理NULL值
-                    for key, value in result.items():
-                        if value is None:
-                            result[key] = 0
-                    
-                    return result
+                    try:
+                        cursor.execute(summary_query, params * 2)
+                    except Exception as e:
+                        # 未执行SQL/MigrateStats.sql的旧库没有汇总表，退回扫描文档表
+                        print(f"读取文档统计汇总表失败，改为直接统计: {e}")
+                        cursor.execute(query, params)
+                    # 聚合结果已在SQL中将NULL转为0，并转换为整数/浮点数便于JSON序列化
+                    return cursor.fetchone()
         except Exception as e:
             print(f"获取文档统计失败: {e}")
-            return {}
+            # 返回None使失败结果不被缓存，调用方得到装饰器的默认值
+            return None
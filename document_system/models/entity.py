@@ -4,16 +4,46 @@
 """
 
 import time
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
-from ..config.database import DatabaseConnection
+from ..config.database import DatabaseConnection, allocate_ids, insert_with_new_id
+from ..config.query_cache import cached_query, invalidate_queries
+
+# 按数值取当前最大实体编号的下一个（字符串排序下ent_1000会排在ent_999之前）
+_NEXT_ENTITY_NUM_QUERY = """
+SELECT COALESCE(MAX(CAST(SUBSTRING(entity_id, 5) AS UNSIGNED)), 0) + 1
+FROM doc_entity
+WHERE entity_id REGEXP '^ent_[0-9]+$'
+"""
+
+# doc_entity上是否已有与文档同步的is_deleted列（未执行SQL/MigrateEntityDeleted.sql的旧库没有），首次查询时检测
+_entity_deleted_column = None
+
+# 待更新字段集合 -> UPDATE语句
+_UPDATE_SQL_CACHE: Dict[frozenset, str] = {}
+
+# 热点路径的SQL语句，按名称引用同一字符串对象，
+# 使DatabaseConnection缓存的预处理游标可直接复用服务端已解析的语句
+_STMT = {
+    'insert_entity': """
+    INSERT INTO doc_entity (entity_id, doc_id, name, type)
+    VALUES (%s, %s, %s, %s)
+    """,
+    'get_entities_by_doc_id': """
+    SELECT entity_id, doc_id, name, type,
+           DATE_FORMAT(recognize_time, '%Y-%m-%dT%H:%i:%S') AS recognize_time
+    FROM doc_entity 
+    WHERE doc_id = %s
+    ORDER BY doc_entity.recognize_time ASC
+    """,
+}
 
 
 class Entity:
     """文档实体数据模型类"""
     
-    def __init__(self):
-        self.db = DatabaseConnection()
+    # 所有实例共用的数据库连接管理对象（每次操作从连接池取出连接、用后即归还，可在多线程间共享）
+    db = DatabaseConnection()
     
     def generate_entity_id(self) -> str:
         """
@@ -22,24 +52,17 @@ class Entity:
         Returns:
             实体ID
         """
+        # 通过计数器行原子分配序号，避免并发创建时取到相同的ID
+        num = allocate_ids(self.db, 'entity')
+        if num:
+            return f"ent_{num:03d}"
+        
+        # 计数器不可用时退回查询当前最大编号
         with self.db.get_connection() as connection:
             with connection.cursor() as cursor:
-                # 查询当前最大的entity_id
-                cursor.execute("SELECT entity_id FROM doc_entity ORDER BY entity_id DESC LIMIT 1")
-                result = cursor.fetchone()
-                
-                if result and result[0]:
-                    # 提取数字部分并递增
-                    current_id = result[0]
-                    if current_id.startswith('ent_'):
-                        try:
-                            num = int(current_id[4:]) + 1
-                            return f"ent_{num:03d}"
-                        except ValueError:
-                            pass
-                
-                # 如果没有找到记录或格式不对，从001开始
-                return "ent_001"
+                cursor.execute(_NEXT_ENTITY_NUM_QUERY)
+                num = int(cursor.fetchone()[0])
+                return f"ent_{num:03d}"
     
     def create_entity(self, doc_id: str, name: str, entity_type: str) -> Optional[str]:
         """
@@ -53,19 +76,23 @@ class Entity:
         Returns:
             实体ID，如果创建失败返回None
         """
-        entity_id = self.generate_entity_id()
+        # 分配ID、插入实体并取回ID在一次往返中完成
+        entity_id = insert_with_new_id(self.db, 'entity', ('doc_id', 'name', 'type'),
+                                       (doc_id, name, entity_type))
+        if entity_id:
+            invalidate_queries('entity')
+            return entity_id
         
-        query = """
-        INSERT INTO doc_entity (entity_id, doc_id, name, type)
-        VALUES (%s, %s, %s, %s)
-        """
+        # 计数器不可用时先生成ID再插入
+        entity_id = self.generate_entity_id()
         
         try:
-            with self.db.get_connection() as connection:
-                with connection.cursor() as cursor:
-                    cursor.execute(query, (entity_id, doc_id, name, entity_type))
-                    connection.commit()
-                    return entity_id
+            result = self.db.execute_update(_STMT['insert_entity'],
+                                            (entity_id, doc_id, name, entity_type))
+            if result is None:
+                return None
+            invalidate_queries('entity')
+            return entity_id
         except Exception as e:
             print(f"创建实体失败: {e}")
             return None
@@ -81,28 +108,52 @@ class Entity:
         Returns:
             成功创建的实体ID列表
         """
-        entity_ids = []
+        if not entities:
+            return []
         
         try:
-            # 逐个创建实体，避免cursor连接问题
-            for entity in entities:
-                entity_id = self.generate_entity_id()
-                query = """
-                INSERT INTO doc_entity (entity_id, doc_id, name, type)
-                VALUES (%s, %s, %s, %s)
-                """
-                
-                with self.db.get_connection() as connection:
-                    with connection.cursor() as cursor:
-                        cursor.execute(query, (entity_id, doc_id, entity['name'], entity['type']))
-                        connection.commit()
-                        entity_ids.append(entity_id)
+            # 从计数器一次分配整段连续序号，一次executemany写入全部实体
+            start = allocate_ids(self.db, 'entity', len(entities))
+            
+            with self.db.get_connection() as connection:
+                with connection.cursor() as cursor:
+                    entity_ids = self.insert_entities(cursor, doc_id, entities, start)
+                    connection.commit()
+                    invalidate_queries('entity')
             
             return entity_ids
         except Exception as e:
             print(f"批量创建实体失败: {e}")
             return []
     
+    @staticmethod
+    def insert_entities(cursor, doc_id: str, entities: List[Dict[str, str]],
+                        start: Optional[int] = None) -> List[str]:
+        """
+        在给定游标上批量插入实体（不提交事务，供调用方组合到同一事务中）
+        
+        Args:
+            cursor: 普通（非预处理）游标
+            doc_id: 文档ID
+            entities: 实体列表，每个实体包含name和type字段
+            start: 已分配的起始序号，为None时在同一连接上取当前最大编号
+            
+        Returns:
+            实体ID列表
+        """
+        if not start:
+            # 计数器不可用时在同一连接上取当前最大编号
+            cursor.execute(_NEXT_ENTITY_NUM_QUERY)
+            start = int(cursor.fetchone()[0])
+        entity_ids = [f"ent_{num:03d}" for num in range(start, start + len(entities))]
+        params_list = [(entity_id, doc_id, entity['name'], entity['type'])
+                       for entity_id, entity in zip(entity_ids, entities)]
+        
+        # 普通游标的executemany会改写为单条多行INSERT，比逐行执行预处理语句更快
+        cursor.executemany(_STMT['insert_entity'], params_list)
+        return entity_ids
+    
+    @cached_query('entity', default=list)
     def get_entities_by_doc_id(self, doc_id: str) -> List[Dict[str, Any]]:
         """
         根据文档ID获取实体列表
@@ -113,28 +164,13 @@ class Entity:
         Returns:
             实体列表
         """
-        query = """
-        SELECT entity_id, doc_id, name, type, recognize_time
-        FROM doc_entity 
-        WHERE doc_id = %s
-        ORDER BY recognize_time ASC
-        """
-        
         try:
-            with self.db.get_connection() as connection:
-                with connection.cursor(dictionary=True) as cursor:
-                    cursor.execute(query, (doc_id,))
-                    results = cursor.fetchall()
-                    
-                    # 转换datetime为字符串
-                    for result in results:
-                        if result['recognize_time']:
-                            result['recognize_time'] = result['recognize_time'].isoformat()
-                    
-                    return results
+            # recognize_time已在SQL中格式化为ISO字符串；查询失败时为None，不写入缓存
+            return self.db.execute_query(_STMT['get_entities_by_doc_id'], (doc_id,))
         except Exception as e:
             print(f"获取实体列表失败: {e}")
-            return []
+            # 返回None使失败结果不被缓存，调用方得到装饰器的默认值
+            return None
     
     def get_documents_by_entity_name(self, entity_name: str, limit: int = 50) -> List[Dict[str, Any]]:
         """
@@ -148,11 +184,12 @@ class Entity:
             文档列表
         """
         query = """
-        SELECT DISTINCT e.doc_id, d.title, d.author, d.upload_date, d.user_id
+        SELECT DISTINCT e.doc_id, d.title, d.author,
+               DATE_FORMAT(d.upload_date, '%Y-%m-%dT%H:%i:%S') AS upload_date, d.user_id
         FROM doc_entity e
         JOIN doc_document d ON e.doc_id = d.doc_id
         WHERE e.name = %s AND d.is_deleted = 0
-        ORDER BY d.upload_date DESC
+        ORDER BY upload_date DESC
         LIMIT %s
         """
         
@@ -160,14 +197,8 @@ class Entity:
             with self.db.get_connection() as connection:
                 with connection.cursor(dictionary=True) as cursor:
                     cursor.execute(query, (entity_name, limit))
-                    results = cursor.fetchall()
-                    
-                    # 转换datetime为字符串
-                    for result in results:
-                        if result['upload_date']:
-                            result['upload_date'] = result['upload_date'].isoformat()
-                    
-                    return results
+                    # upload_date已在SQL中格式化为ISO字符串
+                    return cursor.fetchall()
         except Exception as e:
             print(f"获取文档列表失败: {e}")
             return []
@@ -184,11 +215,12 @@ class Entity:
             文档列表
         """
         query = """
-        SELECT DISTINCT e.doc_id, d.title, d.author, d.upload_date, d.user_id
+        SELECT DISTINCT e.doc_id, d.title, d.author,
+               DATE_FORMAT(d.upload_date, '%Y-%m-%dT%H:%i:%S') AS upload_date, d.user_id
         FROM doc_entity e
         JOIN doc_document d ON e.doc_id = d.doc_id
         WHERE e.type = %s AND d.is_deleted = 0
-        ORDER BY d.upload_date DESC
+        ORDER BY upload_date DESC
         LIMIT %s
         """
         
@@ -196,14 +228,8 @@ class Entity:
             with self.db.get_connection() as connection:
                 with connection.cursor(dictionary=True) as cursor:
                     cursor.execute(query, (entity_type, limit))
-                    results = cursor.fetchall()
-                    
-                    # 转换datetime为字符串
-                    for result in results:
-                        if result['upload_date']:
-                            result['upload_date'] = result['upload_date'].isoformat()
-                    
-                    return results
+                    # upload_date已在SQL中格式化为ISO字符串
+                    return cursor.fetchall()
         except Exception as e:
             print(f"获取文档列表失败: {e}")
             return []
@@ -225,49 +251,65 @@ class Entity:
         if not entity_names:
             return []
         
+        # 名称去重并排序后作为缓存键，结果与名称顺序无关
+        names = tuple(sorted(set(entity_names)))
+        return self._search_documents_by_entities(names, match_type, limit)
+    
+    @cached_query('entity', default=list)
+    def _search_documents_by_entities(self, names: tuple, match_type: str,
+                                      limit: int) -> List[Dict[str, Any]]:
+        """
+        根据去重后的实体名称搜索文档（结果按名称组合缓存）
+        
+        Args:
+            names: 去重排序后的实体名称
+            match_type: 匹配类型（any/all）
+            limit: 返回数量限制
+            
+        Returns:
+            文档列表
+        """
         if match_type == 'all':
-            # 所有实体都必须匹配
-            placeholders = ', '.join(['%s'] * len(entity_names))
+            # 所有实体都必须匹配：每个实体一个EXISTS子查询，
+            # 借助(name, doc_id)索引逐文档判断，无需先聚合全部候选行
+            conditions = ' AND '.join(
+                f"EXISTS (SELECT 1 FROM doc_entity e{i} WHERE e{i}.doc_id = d.doc_id AND e{i}.name = %s)"
+                for i in range(len(names))
+            )
             query = f"""
-            SELECT d.doc_id, d.title, d.author, d.upload_date, d.user_id,
-                   COUNT(e.entity_id) as matched_entities
+            SELECT d.doc_id, d.title, d.author,
+                   DATE_FORMAT(d.upload_date, '%Y-%m-%dT%H:%i:%S') AS upload_date, d.user_id,
+                   %s AS matched_entities
             FROM doc_document d
-            JOIN doc_entity e ON d.doc_id = e.doc_id
-            WHERE e.name IN ({placeholders}) AND d.is_deleted = 0
-            GROUP BY d.doc_id, d.title, d.author, d.upload_date, d.user_id
-            HAVING matched_entities = %s
+            WHERE d.is_deleted = 0 AND {conditions}
             ORDER BY d.upload_date DESC
             LIMIT %s
             """
-            params = entity_names + [len(entity_names), limit]
+            params = [len(names), *names, limit]
         else:
             # 任意实体匹配即可
-            placeholders = ', '.join(['%s'] * len(entity_names))
+            placeholders = ', '.join(['%s'] * len(names))
             query = f"""
-            SELECT DISTINCT d.doc_id, d.title, d.author, d.upload_date, d.user_id
+            SELECT DISTINCT d.doc_id, d.title, d.author,
+                   DATE_FORMAT(d.upload_date, '%Y-%m-%dT%H:%i:%S') AS upload_date, d.user_id
             FROM doc_document d
             JOIN doc_entity e ON d.doc_id = e.doc_id
             WHERE e.name IN ({placeholders}) AND d.is_deleted = 0
-            ORDER BY d.upload_date DESC
+            ORDER BY upload_date DESC
             LIMIT %s
             """
-            params = entity_names + [limit]
+            params = [*names, limit]
         
         try:
             with self.db.get_connection() as connection:
                 with connection.cursor(dictionary=True) as cursor:
                     cursor.execute(query, params)
-                    results = cursor.fetchall()
-                    
-                    # 转换datetime为字符串
-                    for result in results:
-                        if result['upload_date']:
-                            result['upload_date'] = result['upload_date'].isoformat()
-                    
-                    return results
+                    # upload_date已在SQL中格式化为ISO字符串
+                    return cursor.fetchall()
         except Exception as e:
             print(f"搜索文档失败: {e}")
-            return []
+            # 返回None使失败结果不被缓存，调用方得到装饰器的默认值
+            return None
     
     def update_entity(self, entity_id: str, name: Optional[str] = None, 
                      entity_type: Optional[str] = None) -> bool:
@@ -282,33 +324,26 @@ class Entity:
         Returns:
             是否更新成功
         """
-        if not name and not entity_type:
+        changes = {column: value for column, value in (('name', name), ('type', entity_type)) if value}
+        if not changes:
             return False
         
-        # 构建动态UPDATE查询
-        set_clauses = []
-        values = []
-        
-        if name:
-            set_clauses.append("name = %s")
-            values.append(name)
-        
-        if entity_type:
-            set_clauses.append("type = %s")
-            values.append(entity_type)
-        
-        if not set_clauses:
-            return False
-        
-        query = f"UPDATE doc_entity SET {', '.join(set_clauses)} WHERE entity_id = %s"
+        # 同一组字段始终得到同一条SQL，可复用已缓存的预处理语句
+        fields = frozenset(changes)
+        query = _UPDATE_SQL_CACHE.get(fields)
+        if query is None:
+            set_clause = ', '.join(f"{field} = %s" for field in sorted(fields))
+            query = _UPDATE_SQL_CACHE.setdefault(
+                fields, f"UPDATE doc_entity SET {set_clause} WHERE entity_id = %s")
+        values = [changes[field] for field in sorted(fields)]
         values.append(entity_id)
         
         try:
-            with self.db.get_connection() as connection:
-                with connection.cursor() as cursor:
-                    cursor.execute(query, values)
-                    connection.commit()
-                    return cursor.rowcount > 0
+            rowcount = self.db.execute_update(query, values)
+            if rowcount is None:
+                return False
+            invalidate_queries('entity')
+            return rowcount > 0
         except Exception as e:
             print(f"更新实体失败: {e}")
             return False
@@ -330,6 +365,7 @@ class Entity:
                 with connection.cursor() as cursor:
                     cursor.execute(query, (entity_id,))
                     connection.commit()
+                    invalidate_queries('entity')
                     return cursor.rowcount > 0
         except Exception as e:
             print(f"删除实体失败: {e}")
@@ -352,11 +388,39 @@ class Entity:
                 with connection.cursor() as cursor:
                     cursor.execute(query, (doc_id,))
                     connection.commit()
+                    invalidate_queries('entity')
                     return cursor.rowcount > 0
         except Exception as e:
             print(f"删除文档实体失败: {e}")
             return False
     
+    def _active_entity_source(self) -> Tuple[str, str]:
+        """
+        获取查询未删除文档中实体所用的FROM子句与过滤条件
+        
+        doc_entity已有同步的is_deleted列时直接在实体表上过滤，无需关联文档表；
+        旧库退回关联doc_document判断
+        
+        Returns:
+            (FROM子句, WHERE条件)，实体表别名为e
+        """
+        global _entity_deleted_column
+        if _entity_deleted_column is None:
+            query = """
+            SELECT COUNT(*) AS column_count
+            FROM information_schema.COLUMNS
+            WHERE table_schema = DATABASE() AND table_name = 'doc_entity'
+                  AND column_name = 'is_deleted'
+            """
+            rows = self.db.execute_query(query)
+            if rows:
+                _entity_deleted_column = rows[0]['column_count'] > 0
+        
+        if _entity_deleted_column:
+            return "doc_entity e", "e.is_deleted = 0"
+        return "doc_entity e JOIN doc_document d ON e.doc_id = d.doc_id", "d.is_deleted = 0"
+    
+    @cached_query('entity', default=list)
     def get_popular_entities(self, entity_type: Optional[str] = None, 
                            limit: int = 20) -> List[Dict[str, Any]]:
         """
@@ -369,25 +433,24 @@ class Entity:
         Returns:
             热门实体列表
         """
+        source, active = self._active_entity_source()
         if entity_type:
-            query = """
+            query = f"""
             SELECT e.name, e.type, COUNT(e.entity_id) as usage_count,
                    COUNT(DISTINCT e.doc_id) as document_count
-            FROM doc_entity e
-            JOIN doc_document d ON e.doc_id = d.doc_id
-            WHERE e.type = %s AND d.is_deleted = 0
+            FROM {source}
+            WHERE e.type = %s AND {active}
             GROUP BY e.name, e.type
             ORDER BY usage_count DESC, document_count DESC
             LIMIT %s
             """
             params = (entity_type, limit)
         else:
-            query = """
+            query = f"""
             SELECT e.name, e.type, COUNT(e.entity_id) as usage_count,
                    COUNT(DISTINCT e.doc_id) as document_count
-            FROM doc_entity e
-            JOIN doc_document d ON e.doc_id = d.doc_id
-            WHERE d.is_deleted = 0
+            FROM {source}
+            WHERE {active}
             GROUP BY e.name, e.type
             ORDER BY usage_count DESC, document_count DESC
             LIMIT %s
@@ -401,8 +464,10 @@ class Entity:
                     return cursor.fetchall()
         except Exception as e:
             print(f"获取热门实体失败: {e}")
-            return []
+            # 返回None使失败结果不被缓存，调用方得到装饰器的默认值
+            return None
     
+    @cached_query('entity', default=list)
     def get_entity_types(self) -> List[str]:
         """
         获取所有实体类型
@@ -410,12 +475,12 @@ class Entity:
         Returns:
             实体类型列表
         """
-        query = """
-        SELECT DISTINCT type
-        FROM doc_entity e
-        JOIN doc_document d ON e.doc_id = d.doc_id
-        WHERE d.is_deleted = 0
-        ORDER BY type
+        source, active = self._active_entity_source()
+        query = f"""
+        SELECT DISTINCT e.type
+        FROM {source}
+        WHERE {active}
+        ORDER BY e.type
         """
         
         try:
@@ -426,8 +491,10 @@ class Entity:
                     return [result[0] for result in results]
         except Exception as e:
             print(f"获取实体类型失败: {e}")
-            return []
+            # 返回None使失败结果不被缓存，调用方得到装饰器的默认值
+            return None
     
+    @cached_query('entity', default=dict)
     def get_entity_stats(self) -> Dict[str, Any]:
         """
         获取实体统计信息
@@ -435,31 +502,26 @@ class Entity:
         Returns:
             统计信息字典
         """
-        query = """
+        source, active = self._active_entity_source()
+        query = f"""
         SELECT 
             COUNT(*) as total_entities,
             COUNT(DISTINCT e.name) as unique_entities,
             COUNT(DISTINCT e.type) as entity_types,
             COUNT(DISTINCT e.doc_id) as entity_documents,
-            AVG(LENGTH(e.name)) as avg_name_length,
-            MAX(LENGTH(e.name)) as max_name_length
-        FROM doc_entity e
-        JOIN doc_document d ON e.doc_id = d.doc_id
-        WHERE d.is_deleted = 0
+            CAST(COALESCE(ROUND(AVG(LENGTH(e.name)), 2), 0) AS DOUBLE) as avg_name_length,
+            COALESCE(MAX(LENGTH(e.name)), 0) as max_name_length
+        FROM {source}
+        WHERE {active}
         """
         
         try:
             with self.db.get_connection() as connection:
                 with connection.cursor(dictionary=True) as cursor:
                     cursor.execute(query)
-                    result = cursor.fetchone()
-                    
-                    # 处理NULL值
-                    for key, value in result.items():
-                        if value is None:
-                            result[key] = 0
-                    
-                    return result
+                    # 聚合结果已在SQL中将NULL转为0，并转换为整数/浮点数便于JSON序列化
+                    return cursor.fetchone()
         except Exception as e:
             print(f"获取实体统计失败: {e}")
-            return {}
+            # 返回None使失败结果不被缓存，调用方得到装饰器的默认值
+            return None
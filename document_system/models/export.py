@@ -3,17 +3,214 @@
 封装文档导出相关的数据库操作
 """
 
+import atexit
+import logging
+import os
+import threading
 import time
-from typing import Optional, List, Dict, Any
+from collections import defaultdict
+from itertools import product
+from typing import Optional, List, Dict, Any, Iterator
 from datetime import datetime
-from ..config.database import DatabaseConnection
+from mysql.connector import Error, errorcode
+from ..config.database import DatabaseConnection, allocate_ids, insert_with_new_id
+from ..config.query_cache import cached_query, invalidate_queries
 
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    import json
+    HAS_ORJSON = False
+
+if HAS_ORJSON:
+    def _dump_json(value: Any) -> Optional[str]:
+        """序列化doc_ids/export_params字段（orjson实现），空值存为NULL"""
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode() if value else None
+    
+    _load_json = orjson.loads
+else:
+    def _dump_json(value: Any) -> Optional[str]:
+        """序列化doc_ids/export_params字段（标准库实现，输出格式与orjson一致），空值存为NULL"""
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')) if value else None
+    
+    _load_json = json.loads
+
+# 热门导出类型的缓存时间（秒），可通过环境变量调整
+_POPULAR_TYPES_TTL = float(os.environ.get('EXPORT_POPULAR_CACHE_TTL', 300))
+
+# 清理旧导出任务时每批删除的行数
+_CLEANUP_BATCH_SIZE = 1000
+
+# get_export_stats查询结果的列名（与SELECT顺序一致）
+_STATS_COLUMNS = ('total_exports', 'pending_exports', 'processing_exports', 'completed_exports',
+                  'failed_exports', 'total_downloads', 'avg_file_size', 'total_file_size')
+
+# 按ID批量查询时每条语句的最大ID数，避免IN列表过长超出max_allowed_packet
+_LOOKUP_BATCH_SIZE = 1000
+
+# 创建导出任务时写入的列（export_id以外）
+_EXPORT_COLUMNS = ('user_id', 'export_type', 'format', 'doc_ids', 'export_params')
+
+# 热点路径的SQL语句，按名称引用同一字符串对象，
+# 使DatabaseConnection缓存的预处理游标可直接复用服务端已解析的语句
+_STMT = {
+    'insert_export': """
+    INSERT INTO doc_export 
+    (export_id, user_id, export_type, format, doc_ids, export_params)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    """,
+    'get_export_by_id': """
+    SELECT export_id, user_id, export_type, format, doc_ids, file_path,
+           file_size, export_params, status, create_time, complete_time,
+           error_msg, download_count
+    FROM doc_export 
+    WHERE export_id = %s
+    """,
+    'add_download_count': """
+    UPDATE doc_export 
+    SET download_count = download_count + %s 
+    WHERE export_id = %s
+    """,
+}
+
+# 下载次数先在进程内累计，由后台线程每隔一段时间（秒）或累计到一定次数时合并写入，
+# 可通过环境变量调整；读取到的download_count最多滞后一个写入周期
+_DOWNLOAD_FLUSH_INTERVAL = float(os.environ.get('EXPORT_DOWNLOAD_FLUSH_INTERVAL', 1))
+_DOWNLOAD_FLUSH_EVENTS = int(os.environ.get('EXPORT_DOWNLOAD_FLUSH_EVENTS', 100))
+
+# 导出ID -> 尚未写入数据库的下载次数
+_pending_downloads: Dict[str, int] = defaultdict(int)
+_pending_events = 0
+_pending_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+
+# 计数器不可用时取下一个编号（按数值比较，超过三位时不会因字符串排序出错）
+_NEXT_EXPORT_NUM_QUERY = """
+SELECT COALESCE(MAX(CAST(SUBSTRING(export_id, 5) AS UNSIGNED)), 0) + 1 AS num
+FROM doc_export
+WHERE export_id REGEXP '^exp_[0-9]+$'
+"""
+
+# 计数器不可用时在一条语句中取下一个编号并插入，编号经LAST_INSERT_ID(expr)随OK包返回
+_INSERT_EXPORT_NEXT_ID_QUERY = """
+INSERT INTO doc_export 
+(export_id, user_id, export_type, format, doc_ids, export_params)
+SELECT CONCAT('exp_', LPAD(LAST_INSERT_ID(n.num), GREATEST(3, CHAR_LENGTH(n.num)), '0')),
+       %s, %s, %s, %s, %s
+FROM (""" + _NEXT_EXPORT_NUM_QUERY + """) n
+"""
+
+# 并发插入撞上相同编号（或因此死锁）时的最大尝试次数
+_INSERT_ATTEMPTS = 3
+
+
+def _build_list_exports_query(by_status: bool, paged: bool) -> str:
+    """
+    生成用户导出列表的查询语句
+    
+    各变体的过滤条件均为等值/范围条件，可分别走(user_id, status, create_time)
+    或(user_id, create_time)索引，不使用"%s IS NULL OR status = %s"式的通用条件
+    
+    Args:
+        by_status: 是否按状态过滤
+        paged: 是否带翻页游标
+        
+    Returns:
+        SQL语句
+    """
+    conditions = ["user_id = %s"]
+    if by_status:
+        conditions.append("status = %s")
+    if paged:
+        conditions.append("(create_time < %s OR (create_time = %s AND export_id < %s))")
+    
+    return f"""
+    SELECT export_id, export_type, format, status,
+           DATE_FORMAT(create_time, '%Y-%m-%dT%H:%i:%S') AS create_time,
+           DATE_FORMAT(complete_time, '%Y-%m-%dT%H:%i:%S') AS complete_time,
+           file_size, download_count
+    FROM doc_export 
+    WHERE {' AND '.join(conditions)}
+    ORDER BY doc_export.create_time DESC, export_id DESC
+    LIMIT %s
+    """
+
+
+# (按状态过滤, 带翻页游标) -> 查询语句，导入时一次生成
+_LIST_EXPORTS_SQL = {
+    (by_status, paged): _build_list_exports_query(by_status, paged)
+    for by_status in (False, True)
+    for paged in (False, True)
+}
+
+
+def _build_update_status_query(with_path: bool, with_size: bool,
+                               with_error: bool, completed: bool) -> str:
+    """
+    生成更新导出任务状态的语句
+    
+    Args:
+        with_path: 是否更新文件路径
+        with_size: 是否更新文件大小
+        with_error: 是否更新错误信息
+        completed: 是否为completed状态（同时设置完成时间）
+        
+    Returns:
+        SQL语句
+    """
+    set_clauses = ["status = %s"]
+    if with_path:
+        set_clauses.append("file_path = %s")
+    if with_size:
+        set_clauses.append("file_size = %s")
+    if with_error:
+        set_clauses.append("error_msg = %s")
+    # 如果状态为completed，设置完成时间
+    if completed:
+        set_clauses.append("complete_time = CURRENT_TIMESTAMP")
+    
+    return f"UPDATE doc_export SET {', '.join(set_clauses)} WHERE export_id = %s"
+
+
+# (更新文件路径, 更新文件大小, 更新错误信息, 状态为completed) -> 更新语句，
+# 全部16种组合在导入时一次生成，调用时不再拼接SQL
+_UPDATE_STATUS_SQL = {
+    flags: _build_update_status_query(*flags)
+    for flags in product((False, True), repeat=4)
+}
+
+
+def _decode_export_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    将导出任务行的时间字段转换为ISO字符串，并解析JSON字段
+    
+    Args:
+        row: doc_export查询结果行
+        
+    Returns:
+        转换后的行（原地修改）
+    """
+    # 转换datetime为字符串
+    if row['create_time']:
+        row['create_time'] = row['create_time'].isoformat()
+    if row['complete_time']:
+        row['complete_time'] = row['complete_time'].isoformat()
+    
+    # 解析JSON字段
+    if row['doc_ids']:
+        row['doc_ids'] = _load_json(row['doc_ids'])
+    if row['export_params']:
+        row['export_params'] = _load_json(row['export_params'])
+    return row
 
 class Export:
     """文档导出数据模型类"""
     
-    def __init__(self):
-        self.db = DatabaseConnection()
+    # 所有实例共用的数据库连接管理对象（每次操作从连接池取出连接、用后即归还，可在多线程间共享）
+    db = DatabaseConnection()
     
     def generate_export_id(self) -> str:
         """
@@ -22,24 +219,17 @@ class Export:
         Returns:
             导出ID
         """
+        # 通过计数器行原子分配序号，避免每次插入前扫描当前最大ID
+        num = allocate_ids(self.db, 'export')
+        if num:
+            return f"exp_{num:03d}"
+        
+        # 计数器不可用时退回查询当前最大编号
         with self.db.get_connection() as connection:
             with connection.cursor() as cursor:
-                # 查询当前最大的export_id
-                cursor.execute("SELECT export_id FROM doc_export ORDER BY export_id DESC LIMIT 1")
-                result = cursor.fetchone()
-                
-                if result and result[0]:
-                    # 提取数字部分并递增
-                    current_id = result[0]
-                    if current_id.startswith('exp_'):
-                        try:
-                            num = int(current_id[4:]) + 1
-                            return f"exp_{num:03d}"
-                        except ValueError:
-                            pass
-                
-                # 如果没有找到记录或格式不对，从001开始
-                return "exp_001"
+                cursor.execute(_NEXT_EXPORT_NUM_QUERY)
+                num = int(cursor.fetchone()[0])
+                return f"exp_{num:03d}"
     
     def create_export(self, user_id: str, export_type: str, format: str, 
                      doc_ids: Optional[List[str]] = None,
@@ -57,37 +247,84 @@ class Export:
         Returns:
             导出ID，如果创建失败返回None
         """
-        export_id = self.generate_export_id()
+        # 转换doc_ids、export_params为JSON字符串
+        doc_ids_json = _dump_json(doc_ids)
+        export_params_json = _dump_json(export_params)
         
-        # 转换doc_ids为JSON字符串
-        doc_ids_json = None
-        if doc_ids:
-            import json
-            doc_ids_json = json.dumps(doc_ids)
+        values = (user_id, export_type, format, doc_ids_json, export_params_json)
         
-        # 转换export_params为JSON字符串
-        export_params_json = None
-        if export_params:
-            import json
-            export_params_json = json.dumps(export_params)
+        # 分配ID、插入导出任务并取回ID在一次往返中完成
+        export_id = insert_with_new_id(self.db, 'export', _EXPORT_COLUMNS, values)
+        if export_id:
+            return export_id
         
-        query = """
-        INSERT INTO doc_export 
-        (export_id, user_id, export_type, format, doc_ids, export_params)
-        VALUES (%s, %s, %s, %s, %s, %s)
+        # 计数器不可用时取编号与插入在同一条语句中完成，不再先查询再插入；
+        # 并发创建取到相同编号时主键冲突，重新执行即可取到新的编号
+        for attempt in range(1, _INSERT_ATTEMPTS + 1):
+            try:
+                with self.db.get_connection() as connection:
+                    with connection.cursor() as cursor:
+                        cursor.execute(_INSERT_EXPORT_NEXT_ID_QUERY, values)
+                        num = cursor.lastrowid
+                        if not num:
+                            cursor.execute("SELECT LAST_INSERT_ID()")
+                            num = cursor.fetchone()[0]
+                        if connection.in_transaction:
+                            connection.commit()
+                        return f"exp_{int(num):03d}"
+            except Error as e:
+                if e.errno in (errorcode.ER_DUP_ENTRY, errorcode.ER_LOCK_DEADLOCK) and attempt < _INSERT_ATTEMPTS:
+                    continue
+                logger.error("创建导出任务失败: %s", e)
+                return None
+            except Exception as e:
+                logger.error("创建导出任务失败: %s", e)
+                return None
+    
+    def bulk_create_exports(self, rows: List[Dict[str, Any]]) -> List[str]:
         """
+        批量创建导出任务
+        
+        Args:
+            rows: 导出任务列表，每项包含user_id、export_type、format字段，
+                  以及可选的doc_ids、export_params字段
+            
+        Returns:
+            成功创建的导出ID列表（与rows顺序一致）
+        """
+        if not rows:
+            return []
         
         try:
+            # 从计数器一次分配整段连续序号，一次executemany写入全部任务
+            start = allocate_ids(self.db, 'export', len(rows))
+            
             with self.db.get_connection() as connection:
                 with connection.cursor() as cursor:
-                    cursor.execute(query, (export_id, user_id, export_type, format, 
-                                         doc_ids_json, export_params_json))
-                    connection.commit()
-                    return export_id
+                    if not start:
+                        # 计数器不可用时在同一连接上取当前最大编号
+                        cursor.execute(_NEXT_EXPORT_NUM_QUERY)
+                        start = int(cursor.fetchone()[0])
+                    
+                    export_ids = [f"exp_{num:03d}" for num in range(start, start + len(rows))]
+                    params_list = [
+                        (export_id, row['user_id'], row['export_type'], row['format'],
+                         _dump_json(row.get('doc_ids')), _dump_json(row.get('export_params')))
+                        for export_id, row in zip(export_ids, rows)
+                    ]
+                    
+                    # 普通游标的executemany会改写为单条多行INSERT
+                    cursor.executemany(_STMT['insert_export'], params_list)
+                    # 连接为自动提交模式时语句执行即已生效，不再发送多余的COMMIT
+                    if connection.in_transaction:
+                        connection.commit()
+            
+            return export_ids
         except Exception as e:
-            print(f"创建导出任务失败: {e}")
-            return None
+            logger.error("批量创建导出任务失败: %s", e)
+            return []
     
+    @cached_query('export')
     def get_export_by_id(self, export_id: str) -> Optional[Dict[str, Any]]:
         """
         根据ID获取导出任务信息
@@ -98,42 +335,56 @@ class Export:
         Returns:
             导出任务信息字典，如果不存在返回None
         """
-        query = """
-        SELECT export_id, user_id, export_type, format, doc_ids, file_path,
-               file_size, export_params, status, create_time, complete_time,
-               error_msg, download_count
-        FROM doc_export 
-        WHERE export_id = %s
+        try:
+            rows = self.db.execute_query(_STMT['get_export_by_id'], (export_id,))
+            return _decode_export_row(rows[0]) if rows else None
+        except Exception as e:
+            logger.error("获取导出任务失败: %s", e)
+            return None
+    
+    def get_exports_by_ids(self, export_ids: List[str]) -> Dict[str, Dict[str, Any]]:
         """
+        根据ID批量获取导出任务信息
+        
+        每批ID一条IN查询，替代逐个调用get_export_by_id
+        
+        Args:
+            export_ids: 导出ID列表
+            
+        Returns:
+            导出ID -> 导出任务信息，不存在的ID不出现在结果中
+        """
+        if not export_ids:
+            return {}
+        
+        # 去重并保持顺序
+        export_ids = list(dict.fromkeys(export_ids))
+        results: Dict[str, Dict[str, Any]] = {}
         
         try:
             with self.db.get_connection() as connection:
                 with connection.cursor(dictionary=True) as cursor:
-                    cursor.execute(query, (export_id,))
-                    result = cursor.fetchone()
-                    
-                    if result:
-                        # 转换datetime为字符串
-                        if result['create_time']:
-                            result['create_time'] = result['create_time'].isoformat()
-                        if result['complete_time']:
-                            result['complete_time'] = result['complete_time'].isoformat()
-                        
-                        # 解析JSON字段
-                        if result['doc_ids']:
-                            import json
-                            result['doc_ids'] = json.loads(result['doc_ids'])
-                        if result['export_params']:
-                            import json
-                            result['export_params'] = json.loads(result['export_params'])
-                    
-                    return result
+                    for start in range(0, len(export_ids), _LOOKUP_BATCH_SIZE):
+                        batch = export_ids[start:start + _LOOKUP_BATCH_SIZE]
+                        placeholders = ', '.join(['%s'] * len(batch))
+                        query = f"""
+                        SELECT export_id, user_id, export_type, format, doc_ids, file_path,
+                               file_size, export_params, status, create_time, complete_time,
+                               error_msg, download_count
+                        FROM doc_export 
+                        WHERE export_id IN ({placeholders})
+                        """
+                        cursor.execute(query, batch)
+                        for row in cursor.fetchall():
+                            results[row['export_id']] = _decode_export_row(row)
+            return results
         except Exception as e:
-            print(f"获取导出任务失败: {e}")
-            return None
+            logger.error("批量获取导出任务失败: %s", e)
+            return {}
     
     def list_user_exports(self, user_id: str, status: Optional[str] = None, 
-                         limit: int = 50) -> List[Dict[str, Any]]:
+                         limit: int = 50, before_time: Optional[str] = None,
+                         before_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         获取用户的导出任务列表
         
@@ -141,48 +392,45 @@ class Export:
             user_id: 用户ID
             status: 状态过滤（可选）
             limit: 返回数量限制
+            before_time: 翻页游标，上一页最后一条的create_time（可选）
+            before_id: 翻页游标，上一页最后一条的export_id（可选）
             
         Returns:
             导出任务列表
         """
-        if status:
-            query = """
-            SELECT export_id, export_type, format, status, create_time, 
-                   complete_time, file_size, download_count
-            FROM doc_export 
-            WHERE user_id = %s AND status = %s
-            ORDER BY create_time DESC
-            LIMIT %s
-            """
-            params = (user_id, status, limit)
-        else:
-            query = """
-            SELECT export_id, export_type, format, status, create_time, 
-                   complete_time, file_size, download_count
-            FROM doc_export 
-            WHERE user_id = %s
-            ORDER BY create_time DESC
-            LIMIT %s
-            """
-            params = (user_id, limit)
+        return list(self.iter_user_exports(user_id, status, limit, before_time, before_id))
+    
+    def iter_user_exports(self, user_id: str, status: Optional[str] = None,
+                          limit: int = 50, before_time: Optional[str] = None,
+                          before_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        逐条获取用户的导出任务（流式读取，按游标翻页）
         
-        try:
-            with self.db.get_connection() as connection:
-                with connection.cursor(dictionary=True) as cursor:
-                    cursor.execute(query, params)
-                    results = cursor.fetchall()
-                    
-                    # 转换datetime为字符串
-                    for result in results:
-                        if result['create_time']:
-                            result['create_time'] = result['create_time'].isoformat()
-                        if result['complete_time']:
-                            result['complete_time'] = result['complete_time'].isoformat()
-                    
-                    return results
-        except Exception as e:
-            print(f"获取导出任务列表失败: {e}")
-            return []
+        以(create_time, export_id)为游标定位下一页，翻页代价与页码无关
+        
+        Args:
+            user_id: 用户ID
+            status: 状态过滤（可选）
+            limit: 返回数量限制
+            before_time: 翻页游标，上一页最后一条的create_time（可选）
+            before_id: 翻页游标，上一页最后一条的export_id（可选）
+            
+        Yields:
+            导出任务信息
+        """
+        by_status = bool(status)
+        paged = bool(before_time and before_id)
+        query = _LIST_EXPORTS_SQL[by_status, paged]
+        
+        params: List[Any] = [user_id]
+        if by_status:
+            params.append(status)
+        if paged:
+            params.extend((before_time, before_time, before_id))
+        params.append(limit)
+        
+        # 时间字段已在SQL中格式化为ISO字符串
+        yield from self.db.execute_query_iter(query, tuple(params))
     
     def update_export_status(self, export_id: str, status: str, 
                            file_path: Optional[str] = None,
@@ -201,63 +449,89 @@ class Export:
         Returns:
             是否更新成功
         """
-        set_clauses = ["status = %s"]
-        values = [status]
+        with_path = bool(file_path)
+        with_size = file_size is not None
+        with_error = bool(error_msg)
+        query = _UPDATE_STATUS_SQL[with_path, with_size, with_error, status == 'completed']
         
-        if file_path:
-            set_clauses.append("file_path = %s")
+        values: List[Any] = [status]
+        if with_path:
             values.append(file_path)
-        
-        if file_size is not None:
-            set_clauses.append("file_size = %s")
+        if with_size:
             values.append(file_size)
-        
-        if error_msg:
-            set_clauses.append("error_msg = %s")
+        if with_error:
             values.append(error_msg)
-        
-        # 如果状态为completed，设置完成时间
-        if status == 'completed':
-            set_clauses.append("complete_time = CURRENT_TIMESTAMP")
-        
-        query = f"UPDATE doc_export SET {', '.join(set_clauses)} WHERE export_id = %s"
         values.append(export_id)
         
         try:
-            with self.db.get_connection() as connection:
-                with connection.cursor() as cursor:
-                    cursor.execute(query, values)
-                    connection.commit()
-                    return cursor.rowcount > 0
+            # 语句文本固定，可复用缓存的预处理游标
+            rowcount = self.db.execute_update(query, tuple(values))
+            if rowcount is None:
+                return False
+            invalidate_queries('export')
+            return rowcount > 0
         except Exception as e:
-            print(f"更新导出状态失败: {e}")
+            logger.error("更新导出状态失败: %s", e)
             return False
     
     def increment_download_count(self, export_id: str) -> bool:
         """
         增加下载次数
         
+        次数先记入进程内缓冲，由后台线程合并后批量写入，
+        不再每次下载单独执行一条UPDATE并提交
+        
         Args:
             export_id: 导出ID
             
         Returns:
-            是否更新成功
+            是否已记录（不检查导出任务是否存在）
         """
-        query = """
-        UPDATE doc_export 
-        SET download_count = download_count + 1 
-        WHERE export_id = %s
+        global _pending_events
+        with _pending_lock:
+            _pending_downloads[export_id] += 1
+            _pending_events += 1
+            flush_now = _pending_events >= _DOWNLOAD_FLUSH_EVENTS
+        
+        _ensure_download_flusher()
+        if flush_now:
+            self.flush_download_counts()
+        return True
+    
+    def flush_download_counts(self) -> int:
+        """
+        将缓冲中的下载次数写入数据库
+        
+        每个导出任务一条UPDATE，全部在一个事务中提交；写入失败时次数退回缓冲，下次重试
+        
+        Returns:
+            更新的导出任务数量
         """
+        global _pending_events
+        with _pending_lock:
+            if not _pending_downloads:
+                return 0
+            batch = dict(_pending_downloads)
+            _pending_downloads.clear()
+            _pending_events = 0
+        
+        # 按ID排序加锁，多个进程同时写入时不会互相死锁
+        params_list = [(count, export_id) for export_id, count in sorted(batch.items())]
         
         try:
             with self.db.get_connection() as connection:
                 with connection.cursor() as cursor:
-                    cursor.execute(query, (export_id,))
+                    connection.start_transaction()
+                    cursor.executemany(_STMT['add_download_count'], params_list)
                     connection.commit()
-                    return cursor.rowcount > 0
+            invalidate_queries('export')
+            return len(params_list)
         except Exception as e:
-            print(f"增加下载次数失败: {e}")
-            return False
+            logger.error("写入下载次数失败: %s", e)
+            with _pending_lock:
+                for export_id, count in batch.items():
+                    _pending_downloads[export_id] += count
+            return 0
     
     def delete_export(self, export_id: str) -> bool:
         """
@@ -272,13 +546,12 @@ class Export:
         query = "DELETE FROM doc_export WHERE export_id = %s"
         
         try:
-            with self.db.get_connection() as connection:
-                with connection.cursor() as cursor:
-                    cursor.execute(query, (export_id,))
-                    connection.commit()
-                    return cursor.rowcount > 0
+            rowcount = self.db.execute_update(query, (export_id,))
+            if rowcount:
+                invalidate_queries('export')
+            return bool(rowcount)
         except Exception as e:
-            print(f"删除导出任务失败: {e}")
+            logger.error("删除导出任务失败: %s", e)
             return False
     
     def cleanup_old_exports(self, days: int = 30) -> int:
@@ -295,17 +568,29 @@ class Export:
         DELETE FROM doc_export 
         WHERE create_time < DATE_SUB(NOW(), INTERVAL %s DAY)
         AND status IN ('completed', 'failed')
+        LIMIT %s
         """
         
+        # 分批删除并逐批提交，单个事务的行锁与undo日志保持在一批的规模
+        total = 0
         try:
             with self.db.get_connection() as connection:
                 with connection.cursor() as cursor:
-                    cursor.execute(query, (days,))
-                    connection.commit()
-                    return cursor.rowcount
+                    while True:
+                        cursor.execute(query, (days, _CLEANUP_BATCH_SIZE))
+                        deleted = cursor.rowcount
+                        if connection.in_transaction:
+                            connection.commit()
+                        total += deleted
+                        if deleted < _CLEANUP_BATCH_SIZE:
+                            break
         except Exception as e:
-            print(f"清理旧导出任务失败: {e}")
-            return 0
+            logger.error("清理旧导出任务失败: %s", e)
+        
+        if total:
+            invalidate_queries('export')
+        # 出错时已提交的批次不会回滚，返回实际删除的数量
+        return total
     
     def get_export_stats(self, user_id: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -317,56 +602,41 @@ class Export:
         Returns:
             统计信息字典
         """
-        if user_id:
-            query = """
-            SELECT 
-                COUNT(*) as total_exports,
-                COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending_exports,
-                COUNT(CASE WHEN status = 'processing' THEN 1 END) as processing_exports,
-                COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed_exports,
-                COUNT(CASE WHEN status = 'failed' THEN 1 END) as failed_exports,
-                SUM(download_count) as total_downloads,
-                AVG(file_size) as avg_file_size,
-                SUM(file_size) as total_file_size
-            FROM doc_export 
-            WHERE user_id = %s
-            """
-            params = (user_id,)
-        else:
-            query = """
-            SELECT 
-                COUNT(*) as total_exports,
-                COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending_exports,
-                COUNT(CASE WHEN status = 'processing' THEN 1 END) as processing_exports,
-                COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed_exports,
-                COUNT(CASE WHEN status = 'failed' THEN 1 END) as failed_exports,
-                SUM(download_count) as total_downloads,
-                AVG(file_size) as avg_file_size,
-                SUM(file_size) as total_file_size
-            FROM doc_export
-            """
-            params = ()
+        # 按用户统计时走(user_id, status, ...)覆盖索引，全局统计走(status, ...)覆盖索引，均无需回表
+        where = "WHERE user_id = %s" if user_id else ""
+        params = (user_id,) if user_id else ()
+        query = f"""
+        SELECT 
+            COUNT(*) as total_exports,
+            COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending_exports,
+            COUNT(CASE WHEN status = 'processing' THEN 1 END) as processing_exports,
+            COUNT(CASE WHEN status = 'completed' THEN 1 END) as completed_exports,
+            COUNT(CASE WHEN status = 'failed' THEN 1 END) as failed_exports,
+            CAST(COALESCE(SUM(download_count), 0) AS SIGNED) as total_downloads,
+            CAST(COALESCE(AVG(file_size), 0) AS DOUBLE) as avg_file_size,
+            CAST(COALESCE(SUM(file_size), 0) AS SIGNED) as total_file_size
+        FROM doc_export
+        {where}
+        """
         
         try:
             with self.db.get_connection() as connection:
-                with connection.cursor(dictionary=True) as cursor:
+                with connection.cursor() as cursor:
                     cursor.execute(query, params)
-                    result = cursor.fetchone()
-                    
-                    # 处理NULL值
-                    for key, value in result.items():
-                        if value is None:
-                            result[key] = 0
-                    
-                    return result
+                    # 聚合结果已在SQL中将NULL转为0，并转换为整数/浮点数便于JSON序列化；
+                    # 单行结果按元组读取，只在最后构造一次字典
+                    return dict(zip(_STATS_COLUMNS, cursor.fetchone()))
         except Exception as e:
-            print(f"获取导出统计失败: {e}")
+            logger.error("获取导出统计失败: %s", e)
             return {}
     
+    @cached_query('export_popular', ttl=_POPULAR_TYPES_TTL, default=list)
     def get_popular_export_types(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
         获取热门导出类型
         
+        排行变化缓慢，结果按limit缓存一段时间，期间的新导出任务不会使缓存失效
+        
         Args:
             limit: 返回数量限制
             
@@ -379,7 +649,7 @@ class Export:
             format,
             COUNT(*) as usage_count,
             COUNT(CASE WHEN status = 'completed' THEN 1 END) as success_count,
-            AVG(file_size) as avg_file_size
+            CAST(COALESCE(AVG(file_size), 0) AS DOUBLE) as avg_file_size
         FROM doc_export
         GROUP BY export_type, format
         ORDER BY usage_count DESC
@@ -390,14 +660,30 @@ class Export:
             with self.db.get_connection() as connection:
                 with connection.cursor(dictionary=True) as cursor:
                     cursor.execute(query, (limit,))
-                    results = cursor.fetchall()
-                    
-                    # 处理NULL值
-                    for result in results:
-                        if result['avg_file_size'] is None:
-                            result['avg_file_size'] = 0
-                    
-                    return results
+                    return cursor.fetchall()
         except Exception as e:
-            print(f"获取热门导出类型失败: {e}")
-            return []
+            logger.error("获取热门导出类型失败: %s", e)
+            # 返回None使失败结果不被缓存，调用方得到装饰器的默认值
+            return None
+
+
+def _flush_downloads_forever() -> None:
+    """后台线程：定期写入缓冲中的下载次数"""
+    exporter = Export()
+    while True:
+        time.sleep(_DOWNLOAD_FLUSH_INTERVAL)
+        exporter.flush_download_counts()
+
+
+def _ensure_download_flusher() -> None:
+    """首次记录下载次数时启动后台写入线程，并在进程退出时写入剩余的次数"""
+    global _flusher
+    if _flusher is not None:
+        return
+    with _pending_lock:
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(target=_flush_downloads_forever,
+                                    name='export-download-flusher', daemon=True)
+        _flusher.start()
+    atexit.register(Export().flush_download_counts)
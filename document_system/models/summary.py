@@ -3,17 +3,63 @@
 封装文档摘要相关的数据库操作
 """
 
+import logging
 import time
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 from datetime import datetime
-from ..config.database import DatabaseConnection
+from ..config.database import DatabaseConnection, allocate_ids
+from ..config.query_cache import cached_query, invalidate_queries
+
+logger = logging.getLogger(__name__)
+
+# 热点路径的SQL语句，按名称引用同一字符串对象，
+# 使DatabaseConnection缓存的预处理游标可直接复用服务端已解析的语句
+_STMT = {
+    # 一篇文档只有一条摘要（uk_doc_id），重复生成时覆盖原摘要
+    'upsert_summary': """
+    INSERT INTO doc_summary (summary_id, doc_id, content, length_type)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE 
+    content = VALUES(content),
+    length_type = VALUES(length_type),
+    generate_time = CURRENT_TIMESTAMP
+    """,
+    'get_summary_by_doc_id': """
+    SELECT summary_id, doc_id, content, length_type, generate_time
+    FROM doc_summary 
+    WHERE doc_id = %s
+    """,
+}
+
+# 按文档ID批量查询时每条语句的最大ID数，避免IN列表过长超出max_allowed_packet
+_LOOKUP_BATCH_SIZE = 1000
+
+# get_summary_stats查询结果的列名（与SELECT顺序一致）
+_STATS_COLUMNS = ('total_summaries', 'short_summaries', 'medium_summaries', 'long_summaries',
+                  'avg_content_length', 'max_content_length', 'min_content_length')
+
+# ngram全文解析器的词元长度（ngram_token_size默认值），更短的关键词无法通过全文索引检索
+_NGRAM_TOKEN_SIZE = 2
+
+# doc_summary.content上是否已建立全文索引（未执行索引迁移的旧库没有），首次搜索时检测
+_content_fulltext = None
+
+# doc_summary上是否已有与文档同步的is_deleted列（未执行SQL/MigrateSummaryDeleted.sql的旧库没有），首次查询时检测
+_summary_deleted_column = None
+
+# 计数器不可用时取下一个编号（按数值比较，超过三位时不会因字符串排序出错）
+_NEXT_SUMMARY_NUM_QUERY = """
+SELECT COALESCE(MAX(CAST(SUBSTRING(summary_id, 5) AS UNSIGNED)), 0) + 1
+FROM doc_summary
+WHERE summary_id REGEXP '^sum_[0-9]+$'
+"""
 
 
 class Summary:
     """文档摘要数据模型类"""
     
-    def __init__(self):
-        self.db = DatabaseConnection()
+    # 所有实例共用的数据库连接管理对象（每次操作从连接池取出连接、用后即归还，可在多线程间共享）
+    db = DatabaseConnection()
     
     def generate_summary_id(self) -> str:
         """
@@ -22,24 +68,17 @@ class Summary:
         Returns:
             摘要ID
         """
+        # 通过计数器行原子分配序号，避免每次插入前扫描当前最大ID
+        num = allocate_ids(self.db, 'summary')
+        if num:
+            return f"sum_{num:03d}"
+        
+        # 计数器不可用时退回查询当前最大编号
         with self.db.get_connection() as connection:
             with connection.cursor() as cursor:
-                # 查询当前最大的summary_id
-                cursor.execute("SELECT summary_id FROM doc_summary ORDER BY summary_id DESC LIMIT 1")
-                result = cursor.fetchone()
-                
-                if result and result[0]:
-                    # 提取数字部分并递增
-                    current_id = result[0]
-                    if current_id.startswith('sum_'):
-                        try:
-                            num = int(current_id[4:]) + 1
-                            return f"sum_{num:03d}"
-                        except ValueError:
-                            pass
-                
-                # 如果没有找到记录或格式不对，从001开始
-                return "sum_001"
+                cursor.execute(_NEXT_SUMMARY_NUM_QUERY)
+                num = int(cursor.fetchone()[0])
+                return f"sum_{num:03d}"
     
     def create_summary(self, doc_id: str, content: str, 
                       length_type: str = 'medium') -> Optional[str]:
@@ -56,25 +95,59 @@ class Summary:
         """
         summary_id = self.generate_summary_id()
         
-        query = """
-        INSERT INTO doc_summary (summary_id, doc_id, content, length_type)
-        VALUES (%s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE 
-        content = VALUES(content),
-        length_type = VALUES(length_type),
-        generate_time = CURRENT_TIMESTAMP
+        try:
+            result = self.db.execute_update(_STMT['upsert_summary'],
+                                            (summary_id, doc_id, content, length_type))
+            if result is None:
+                return None
+            invalidate_queries('summary')
+            return summary_id
+        except Exception as e:
+            logger.error("创建摘要失败: %s", e)
+            return None
+    
+    def bulk_create_summaries(self, rows: List[Dict[str, Any]]) -> List[str]:
         """
+        批量创建文档摘要（文档已有摘要时覆盖）
+        
+        Args:
+            rows: 摘要列表，每项包含doc_id、content字段，以及可选的length_type字段
+            
+        Returns:
+            写入的摘要ID列表（与rows顺序一致）
+        """
+        if not rows:
+            return []
         
         try:
+            # 从计数器一次分配整段连续序号，一次executemany写入全部摘要
+            start = allocate_ids(self.db, 'summary', len(rows))
+            
             with self.db.get_connection() as connection:
                 with connection.cursor() as cursor:
-                    cursor.execute(query, (summary_id, doc_id, content, length_type))
-                    connection.commit()
-                    return summary_id
+                    if not start:
+                        # 计数器不可用时在同一连接上取当前最大编号
+                        cursor.execute(_NEXT_SUMMARY_NUM_QUERY)
+                        start = int(cursor.fetchone()[0])
+                    
+                    summary_ids = [f"sum_{num:03d}" for num in range(start, start + len(rows))]
+                    params_list = [
+                        (summary_id, row['doc_id'], row['content'], row.get('length_type', 'medium'))
+                        for summary_id, row in zip(summary_ids, rows)
+                    ]
+                    
+                    # 普通游标的executemany会改写为单条多行INSERT（保留ON DUPLICATE KEY UPDATE）
+                    cursor.executemany(_STMT['upsert_summary'], params_list)
+                    if connection.in_transaction:
+                        connection.commit()
+                    invalidate_queries('summary')
+            
+            return summary_ids
         except Exception as e:
-            print(f"创建摘要失败: {e}")
-            return None
+            logger.error("批量创建摘要失败: %s", e)
+            return []
     
+    @cached_query('summary')
     def get_summary_by_doc_id(self, doc_id: str) -> Optional[Dict[str, Any]]:
         """
         根据文档ID获取摘要
@@ -85,27 +158,59 @@ class Summary:
         Returns:
             摘要信息字典，如果不存在返回None
         """
-        query = """
-        SELECT summary_id, doc_id, content, length_type, generate_time
-        FROM doc_summary 
-        WHERE doc_id = %s
+        try:
+            rows = self.db.execute_query(_STMT['get_summary_by_doc_id'], (doc_id,))
+            result = rows[0] if rows else None
+            
+            if result:
+                # 转换datetime为字符串
+                if result['generate_time']:
+                    result['generate_time'] = result['generate_time'].isoformat()
+            
+            return result
+        except Exception as e:
+            logger.error("获取摘要失败: %s", e)
+            return None
+    
+    def get_summaries_by_doc_ids(self, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        根据文档ID批量获取摘要
+        
+        每批ID一条IN查询，替代逐个调用get_summary_by_doc_id
+        
+        Args:
+            doc_ids: 文档ID列表
+            
+        Returns:
+            文档ID -> 摘要信息，没有摘要的文档不出现在结果中
         """
+        if not doc_ids:
+            return {}
+        
+        # 去重并保持顺序
+        doc_ids = list(dict.fromkeys(doc_ids))
+        results: Dict[str, Dict[str, Any]] = {}
         
         try:
             with self.db.get_connection() as connection:
                 with connection.cursor(dictionary=True) as cursor:
-                    cursor.execute(query, (doc_id,))
-                    result = cursor.fetchone()
-                    
-                    if result:
-                        # 转换datetime为字符串
-                        if result['generate_time']:
-                            result['generate_time'] = result['generate_time'].isoformat()
-                    
-                    return result
+                    for start in range(0, len(doc_ids), _LOOKUP_BATCH_SIZE):
+                        batch = doc_ids[start:start + _LOOKUP_BATCH_SIZE]
+                        placeholders = ', '.join(['%s'] * len(batch))
+                        query = f"""
+                        SELECT summary_id, doc_id, content, length_type,
+                               DATE_FORMAT(generate_time, '%Y-%m-%dT%H:%i:%S') AS generate_time
+                        FROM doc_summary 
+                        WHERE doc_id IN ({placeholders})
+                        """
+                        cursor.execute(query, batch)
+                        for row in cursor.fetchall():
+                            results[row['doc_id']] = row
+            # generate_time已在SQL中格式化为ISO字符串
+            return results
         except Exception as e:
-            print(f"获取摘要失败: {e}")
-            return None
+            logger.error("批量获取摘要失败: %s", e)
+            return {}
     
     def update_summary(self, doc_id: str, content: Optional[str] = None, 
                       length_type: Optional[str] = None) -> bool:
@@ -144,10 +249,12 @@ class Summary:
             with self.db.get_connection() as connection:
                 with connection.cursor() as cursor:
                     cursor.execute(query, values)
-                    connection.commit()
+                    if connection.in_transaction:
+                        connection.commit()
+                    invalidate_queries('summary')
                     return cursor.rowcount > 0
         except Exception as e:
-            print(f"更新摘要失败: {e}")
+            logger.error("更新摘要失败: %s", e)
             return False
     
     def delete_summary(self, doc_id: str) -> bool:
@@ -163,90 +270,163 @@ class Summary:
         query = "DELETE FROM doc_summary WHERE doc_id = %s"
         
         try:
-            with self.db.get_connection() as connection:
-                with connection.cursor() as cursor:
-                    cursor.execute(query, (doc_id,))
-                    connection.commit()
-                    return cursor.rowcount > 0
+            rowcount = self.db.execute_update(query, (doc_id,))
+            if rowcount:
+                invalidate_queries('summary')
+            return bool(rowcount)
         except Exception as e:
-            print(f"删除摘要失败: {e}")
+            logger.error("删除摘要失败: %s", e)
             return False
     
     def list_summaries_by_length_type(self, length_type: str, 
-                                    limit: int = 100) -> List[Dict[str, Any]]:
+                                    limit: int = 100, before_time: Optional[str] = None,
+                                    before_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         根据长度类型列出摘要
         
         Args:
             length_type: 长度类型
             limit: 返回数量限制
+            before_time: 翻页游标，上一页最后一条的generate_time（可选）
+            before_id: 翻页游标，上一页最后一条的summary_id（可选）
             
         Returns:
             摘要列表
         """
-        query = """
-        SELECT s.summary_id, s.doc_id, s.content, s.length_type, s.generate_time,
-               d.title, d.user_id
-        FROM doc_summary s
-        JOIN doc_document d ON s.doc_id = d.doc_id
-        WHERE s.length_type = %s AND d.is_deleted = 0
-        ORDER BY s.generate_time DESC
-        LIMIT %s
+        return list(self.iter_summaries_by_length_type(length_type, limit, before_time, before_id))
+    
+    def iter_summaries_by_length_type(self, length_type: str, limit: int = 100,
+                                      before_time: Optional[str] = None,
+                                      before_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
         """
+        逐条获取指定长度类型的摘要（流式读取，按游标翻页）
         
-        try:
-            with self.db.get_connection() as connection:
-                with connection.cursor(dictionary=True) as cursor:
-                    cursor.execute(query, (length_type, limit))
-                    results = cursor.fetchall()
-                    
-                    # 转换datetime为字符串
-                    for result in results:
-                        if result['generate_time']:
-                            result['generate_time'] = result['generate_time'].isoformat()
-                    
-                    return results
-        except Exception as e:
-            print(f"获取摘要列表失败: {e}")
-            return []
+        Args:
+            length_type: 长度类型
+            limit: 返回数量限制
+            before_time: 翻页游标，上一页最后一条的generate_time（可选）
+            before_id: 翻页游标，上一页最后一条的summary_id（可选）
+            
+        Yields:
+            摘要信息
+        """
+        yield from self._iter_summaries("s.length_type = %s", (length_type,),
+                                        limit, before_time, before_id)
     
-    def search_summaries(self, keyword: str, limit: int = 50) -> List[Dict[str, Any]]:
+    def search_summaries(self, keyword: str, limit: int = 50,
+                         before_time: Optional[str] = None,
+                         before_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         搜索摘要内容
         
         Args:
             keyword: 搜索关键词
             limit: 返回数量限制
+            before_time: 翻页游标，上一页最后一条的generate_time（可选）
+            before_id: 翻页游标，上一页最后一条的summary_id（可选）
             
         Returns:
             搜索结果列表
         """
-        query = """
-        SELECT s.summary_id, s.doc_id, s.content, s.length_type, s.generate_time,
+        return list(self.iter_search_summaries(keyword, limit, before_time, before_id))
+    
+    def iter_search_summaries(self, keyword: str, limit: int = 50,
+                              before_time: Optional[str] = None,
+                              before_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        逐条获取摘要内容的搜索结果（流式读取，按游标翻页）
+        
+        Args:
+            keyword: 搜索关键词
+            limit: 返回数量限制
+            before_time: 翻页游标，上一页最后一条的generate_time（可选）
+            before_id: 翻页游标，上一页最后一条的summary_id（可选）
+            
+        Yields:
+            摘要信息
+        """
+        phrase = keyword.replace('"', ' ')
+        words = phrase.split()
+        if (words and min(len(word) for word in words) >= _NGRAM_TOKEN_SIZE
+                and self._has_content_fulltext()):
+            # 全文索引按短语检索；结果仍按生成时间排序，以便按游标翻页
+            condition = "MATCH(s.content) AGAINST (%s IN BOOLEAN MODE)"
+            search_param = f'"{phrase}"'
+        else:
+            # 单字关键词短于ngram词元，或尚未建立全文索引时使用LIKE
+            condition = "s.content LIKE %s"
+            search_param = f"%{keyword}%"
+        
+        yield from self._iter_summaries(condition, (search_param,),
+                                        limit, before_time, before_id)
+    
+    def _has_content_fulltext(self) -> bool:
+        """
+        检查doc_summary.content上是否已建立全文索引
+        
+        首次调用时查询information_schema并缓存结果，未执行索引迁移的数据库回退到LIKE检索
+        
+        Returns:
+            是否存在全文索引
+        """
+        global _content_fulltext
+        if _content_fulltext is None:
+            query = """
+            SELECT 1
+            FROM information_schema.STATISTICS
+            WHERE table_schema = DATABASE() AND table_name = 'doc_summary'
+                  AND index_type = 'FULLTEXT'
+            GROUP BY index_name
+            HAVING COUNT(*) = 1 AND MIN(column_name) = 'content'
+            """
+            rows = self.db.execute_query(query)
+            if rows is None:
+                return False
+            _content_fulltext = bool(rows)
+        return _content_fulltext
+    
+    def _iter_summaries(self, condition: str, params: tuple, limit: int,
+                        before_time: Optional[str],
+                        before_id: Optional[str]) -> Iterator[Dict[str, Any]]:
+        """
+        按条件流式读取未删除文档的摘要，以(generate_time, summary_id)为游标翻页，
+        翻页代价与页码无关
+        
+        Args:
+            condition: 摘要过滤条件
+            params: 过滤条件的参数
+            limit: 返回数量限制
+            before_time: 翻页游标（generate_time）
+            before_id: 翻页游标（summary_id）
+            
+        Yields:
+            摘要信息
+        """
+        # 标题仍需关联文档表，但删除标记优先在摘要表上过滤，关联只发生在命中的行上
+        _, active_condition = self._active_summary_source()
+        conditions = [condition, active_condition]
+        params = list(params)
+        
+        if before_time and before_id:
+            conditions.append(
+                "(s.generate_time < %s OR (s.generate_time = %s AND s.summary_id < %s))"
+            )
+            params.extend((before_time, before_time, before_id))
+        
+        query = f"""
+        SELECT s.summary_id, s.doc_id, s.content, s.length_type,
+               DATE_FORMAT(s.generate_time, '%Y-%m-%dT%H:%i:%S') AS generate_time,
                d.title, d.user_id
         FROM doc_summary s
         JOIN doc_document d ON s.doc_id = d.doc_id
-        WHERE s.content LIKE %s AND d.is_deleted = 0
-        ORDER BY s.generate_time DESC
+        WHERE {' AND '.join(conditions)}
+        ORDER BY s.generate_time DESC, s.summary_id DESC
         LIMIT %s
         """
-        search_param = f"%{keyword}%"
+        params.append(limit)
         
-        try:
-            with self.db.get_connection() as connection:
-                with connection.cursor(dictionary=True) as cursor:
-                    cursor.execute(query, (search_param, limit))
-                    results = cursor.fetchall()
-                    
-                    # 转换datetime为字符串
-                    for result in results:
-                        if result['generate_time']:
-                            result['generate_time'] = result['generate_time'].isoformat()
-                    
-                    return results
-        except Exception as e:
-            print(f"搜索摘要失败: {e}")
-            return []
+        # generate_time已在SQL中格式化为ISO字符串
+        yield from self.db.execute_query_iter(query, tuple(params))
     
     def get_summary_stats(self) -> Dict[str, Any]:
         """
@@ -255,7 +435,8 @@ class Summary:
         Returns:
             统计信息字典
         """
-        query = """
+        source, active_condition = self._active_summary_source()
+        query = f"""
         SELECT 
             COUNT(*) as total_summaries,
             COUNT(CASE WHEN length_type = 'short' THEN 1 END) as short_summaries,
@@ -264,23 +445,43 @@ class Summary:
             AVG(LENGTH(content)) as avg_content_length,
             MAX(LENGTH(content)) as max_content_length,
             MIN(LENGTH(content)) as min_content_length
-        FROM doc_summary s
-        JOIN doc_document d ON s.doc_id = d.doc_id
-        WHERE d.is_deleted = 0
+        FROM {source}
+        WHERE {active_condition}
         """
         
         try:
             with self.db.get_connection() as connection:
-                with connection.cursor(dictionary=True) as cursor:
+                with connection.cursor() as cursor:
                     cursor.execute(query)
-                    result = cursor.fetchone()
-                    
-                    # 处理NULL值
-                    for key, value in result.items():
-                        if value is None:
-                            result[key] = 0
-                    
-                    return result
+                    # 单行结果按元组读取，处理NULL值后只构造一次字典
+                    row = cursor.fetchone()
+                    return dict(zip(_STATS_COLUMNS, (0 if value is None else value for value in row)))
         except Exception as e:
-            print(f"获取摘要统计失败: {e}")
+            logger.error("获取摘要统计失败: %s", e)
             return {}
+    
+    def _active_summary_source(self) -> Tuple[str, str]:
+        """
+        获取查询未删除文档的摘要所用的FROM子句与过滤条件
+        
+        doc_summary已有同步的is_deleted列时直接在摘要表上过滤，无需关联文档表；
+        旧库退回关联doc_document判断
+        
+        Returns:
+            (FROM子句, WHERE条件)，摘要表别名为s
+        """
+        global _summary_deleted_column
+        if _summary_deleted_column is None:
+            query = """
+            SELECT COUNT(*) AS column_count
+            FROM information_schema.COLUMNS
+            WHERE table_schema = DATABASE() AND table_name = 'doc_summary'
+                  AND column_name = 'is_deleted'
+            """
+            rows = self.db.execute_query(query)
+            if rows:
+                _summary_deleted_column = rows[0]['column_count'] > 0
+        
+        if _summary_deleted_column:
+            return "doc_summary s", "s.is_deleted = 0"
+        return "doc_summary s JOIN doc_document d ON s.doc_id = d.doc_id", "d.is_deleted = 0"
@@ -4,16 +4,23 @@
 """
 
 import time
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
 from datetime import datetime
-from ..config.database import DatabaseConnection
+from ..config.database import DatabaseConnection, allocate_ids
+
+# 计数器不可用时取下一个编号（按数值比较，超过三位时不会因字符串排序出错）
+_NEXT_TAG_NUM_QUERY = """
+SELECT COALESCE(MAX(CAST(SUBSTRING(tag_id, 5) AS UNSIGNED)), 0) + 1
+FROM doc_tag
+WHERE tag_id REGEXP '^tag_[0-9]+$'
+"""
 
 
 class Tag:
     """文档标签数据模型类"""
     
-    def __init__(self):
-        self.db = DatabaseConnection()
+    # 所有实例共用的数据库连接管理对象（每次操作从连接池取出连接、用后即归还，可在多线程间共享）
+    db = DatabaseConnection()
     
     def generate_tag_id(self) -> str:
         """
@@ -22,24 +29,17 @@ class Tag:
         Returns:
             标签ID
         """
+        # 通过计数器行原子分配序号，避免每次插入前扫描当前最大ID
+        num = allocate_ids(self.db, 'tag')
+        if num:
+            return f"tag_{num:03d}"
+        
+        # 计数器不可用时退回查询当前最大编号
         with self.db.get_connection() as connection:
             with connection.cursor() as cursor:
-                # 查询当前最大的tag_id
-                cursor.execute("SELECT tag_id FROM doc_tag ORDER BY tag_id DESC LIMIT 1")
-                result = cursor.fetchone()
-                
-                if result and result[0]:
-                    # 提取数字部分并递增
-                    current_id = result[0]
-                    if current_id.startswith('tag_'):
-                        try:
-                            num = int(current_id[4:]) + 1
-                            return f"tag_{num:03d}"
-                        except ValueError:
-                            pass
-                
-                # 如果没有找到记录或格式不对，从001开始
-                return "tag_001"
+                cursor.execute(_NEXT_TAG_NUM_QUERY)
+                num = int(cursor.fetchone()[0])
+                return f"tag_{num:03d}"
     
     def create_tag(self, doc_id: str, keyword: str, 
                   synonyms: Optional[str] = None) -> Optional[str]:
@@ -82,22 +82,32 @@ class Tag:
         Returns:
             成功创建的标签ID列表
         """
-        tag_ids = []
+        if not keywords:
+            return []
+        
+        query = """
+        INSERT INTO doc_tag (tag_id, doc_id, keyword)
+        VALUES (%s, %s, %s)
+        """
         
         try:
-            # 逐个创建标签，避免cursor连接问题
-            for keyword in keywords:
-                tag_id = self.generate_tag_id()
-                query = """
-                INSERT INTO doc_tag (tag_id, doc_id, keyword)
-                VALUES (%s, %s, %s)
-                """
-                
-                with self.db.get_connection() as connection:
-                    with connection.cursor() as cursor:
-                        cursor.execute(query, (tag_id, doc_id, keyword))
-                        connection.commit()
-                        tag_ids.append(tag_id)
+            # 从计数器一次分配整段连续序号，并发批量创建不会分到重叠的ID
+            start = allocate_ids(self.db, 'tag', len(keywords))
+            
+            with self.db.get_connection() as connection:
+                with connection.cursor() as cursor:
+                    if not start:
+                        # 计数器不可用时在同一连接上取当前最大编号
+                        cursor.execute(_NEXT_TAG_NUM_QUERY)
+                        start = int(cursor.fetchone()[0])
+                    
+                    tag_ids = [f"tag_{num:03d}" for num in range(start, start + len(keywords))]
+                    params_list = [(tag_id, doc_id, keyword)
+                                   for tag_id, keyword in zip(tag_ids, keywords)]
+                    
+                    # 一次executemany写入全部标签
+                    cursor.executemany(query, params_list)
+                    connection.commit()
             
             return tag_ids
         except Exception as e:
@@ -149,30 +159,32 @@ class Tag:
         Returns:
             文档列表
         """
+        return list(self.iter_documents_by_keyword(keyword, limit))
+    
+    def iter_documents_by_keyword(self, keyword: str, limit: int = 50) -> Iterator[Dict[str, Any]]:
+        """
+        逐条获取带有指定关键词的文档（流式读取，不整体加载结果集）
+        
+        Args:
+            keyword: 关键词
+            limit: 返回数量限制
+            
+        Yields:
+            文档信息
+        """
+        # DISTINCT要求排序列出现在选择列表中，按格式化后的upload_date排序（ISO格式字符串顺序即时间顺序）
         query = """
-        SELECT DISTINCT t.doc_id, d.title, d.author, d.upload_date, d.user_id
+        SELECT DISTINCT t.doc_id, d.title, d.author,
+               DATE_FORMAT(d.upload_date, '%Y-%m-%dT%H:%i:%S') AS upload_date, d.user_id
         FROM doc_tag t
         JOIN doc_document d ON t.doc_id = d.doc_id
         WHERE t.keyword = %s AND d.is_deleted = 0
-        ORDER BY d.upload_date DESC
+        ORDER BY upload_date DESC
         LIMIT %s
         """
         
-        try:
-            with self.db.get_connection() as connection:
-                with connection.cursor(dictionary=True) as cursor:
-                    cursor.execute(query, (keyword, limit))
-                    results = cursor.fetchall()
-                    
-                    # 转换datetime为字符串
-                    for result in results:
-                        if result['upload_date']:
-                            result['upload_date'] = result['upload_date'].isoformat()
-                    
-                    return results
-        except Exception as e:
-            print(f"获取文档列表失败: {e}")
-            return []
+        # upload_date已在SQL中格式化为ISO字符串
+        yield from self.db.execute_query_iter(query, (keyword, limit))
     
     def search_documents_by_keywords(self, keywords: List[str], 
                                    match_type: str = 'any', 
@@ -188,14 +200,31 @@ class Tag:
         Returns:
             文档列表
         """
+        return list(self.iter_search_documents_by_keywords(keywords, match_type, limit))
+    
+    def iter_search_documents_by_keywords(self, keywords: List[str],
+                                          match_type: str = 'any',
+                                          limit: int = 50) -> Iterator[Dict[str, Any]]:
+        """
+        逐条返回关键词搜索结果（流式读取，不整体加载结果集）
+        
+        Args:
+            keywords: 关键词列表
+            match_type: 匹配类型（any/all）
+            limit: 返回数量限制
+            
+        Yields:
+            文档信息
+        """
         if not keywords:
-            return []
+            return
         
+        placeholders = ', '.join(['%s'] * len(keywords))
         if match_type == 'all':
             # 所有关键词都必须匹配
-            placeholders = ', '.join(['%s'] * len(keywords))
             query = f"""
-            SELECT d.doc_id, d.title, d.author, d.upload_date, d.user_id,
+            SELECT d.doc_id, d.title, d.author,
+                   DATE_FORMAT(d.upload_date, '%Y-%m-%dT%H:%i:%S') AS upload_date, d.user_id,
                    COUNT(t.tag_id) as matched_keywords
             FROM doc_document d
             JOIN doc_tag t ON d.doc_id = t.doc_id
@@ -205,35 +234,22 @@ class Tag:
             ORDER BY d.upload_date DESC
             LIMIT %s
             """
-            params = keywords + [len(keywords), limit]
+            params = list(keywords) + [len(keywords), limit]
         else:
-            # 任意关键词匹配即可
-            placeholders = ', '.join(['%s'] * len(keywords))
+            # 任意关键词匹配即可（DISTINCT查询按格式化后的upload_date排序）
             query = f"""
-            SELECT DISTINCT d.doc_id, d.title, d.author, d.upload_date, d.user_id
+            SELECT DISTINCT d.doc_id, d.title, d.author,
+                   DATE_FORMAT(d.upload_date, '%Y-%m-%dT%H:%i:%S') AS upload_date, d.user_id
             FROM doc_document d
             JOIN doc_tag t ON d.doc_id = t.doc_id
             WHERE t.keyword IN ({placeholders}) AND d.is_deleted = 0
-            ORDER BY d.upload_date DESC
+            ORDER BY upload_date DESC
             LIMIT %s
             """
-            params = keywords + [limit]
+            params = list(keywords) + [limit]
         
-        try:
-            with self.db.get_connection() as connection:
-                with connection.cursor(dictionary=True) as cursor:
-                    cursor.execute(query, params)
-                    results = cursor.fetchall()
-                    
-                    # 转换datetime为字符串
-                    for result in results:
-                        if result['upload_date']:
-                            result['upload_date'] = result['upload_date'].isoformat()
-                    
-                    return results
-        except Exception as e:
-            print(f"搜索文档失败: {e}")
-            return []
+        # upload_date已在SQL中格式化为ISO字符串
+        yield from self.db.execute_query_iter(query, tuple(params))
     
     def update_tag(self, tag_id: str, keyword: Optional[str] = None, 
                   synonyms: Optional[str] = None) -> bool:
@@ -9,8 +9,8 @@ from ..config.database import DatabaseConnection, generate_user_id
 class UserModel:
     """用户数据模型"""
     
-    def __init__(self):
-        self.db = DatabaseConnection()
+    # 所有实例共用的数据库连接管理对象（每次操作从连接池取出连接、用后即归还，可在多线程间共享）
+    db = DatabaseConnection()
     
     def create_user(self, username, email, password, role='普通用户', status=1, theme='light', summary_length='medium', **kwargs):
         """创建用户"""
@@ -20,7 +20,8 @@ class DocumentService:
         self.entity_model = Entity()
     
     def upload_document(self, user_id: str, title: str, file_path: str, 
-                        file_size: int, **kwargs) -> Dict[str, Any]:
+                        file_size: int, entities: Optional[List[Dict[str, str]]] = None,
+                        **kwargs) -> Dict[str, Any]:
         """
         上传文档
         
@@ -29,26 +30,43 @@ class DocumentService:
             title: 文档标题
             file_path: 文件路径
             file_size: 文件大小
+            entities: 随文档一起写入的实体列表（可选，与文档在同一事务中创建）
             **kwargs: 其他文档属性
             
         Returns:
             上传结果
         """
-        # 创建文档
-        doc_id = self.document_model.create_document(
-            user_id=user_id,
-            title=title,
-            file_path=file_path,
-            file_size=file_size,
-            **kwargs
-        )
+        entity_ids = []
+        if entities:
+            # 文档与实体一次提交，实体写入失败时不会留下孤立的文档
+            created = self.document_model.create_document_with_entities(
+                user_id=user_id,
+                title=title,
+                file_path=file_path,
+                file_size=file_size,
+                entities=entities,
+                **kwargs
+            )
+            doc_id, entity_ids = created if created else (None, [])
+        else:
+            # 创建文档
+            doc_id = self.document_model.create_document(
+                user_id=user_id,
+                title=title,
+                file_path=file_path,
+                file_size=file_size,
+                **kwargs
+            )
         
         if doc_id:
-            return {
+            result = {
                 'success': True,
                 'message': '文档上传成功',
                 'doc_id': doc_id
             }
+            if entities:
+                result['entity_ids'] = entity_ids
+            return result
         else:
             return {
                 'success': False,
@@ -114,6 +132,75 @@ class DocumentService:
             }
         }
     
+    def get_document_summary(self, doc_id: str) -> Dict[str, Any]:
+        """
+        获取文档摘要（不读取文档其余信息）
+        
+        Args:
+            doc_id: 文档ID
+            
+        Returns:
+            摘要信息
+        """
+        if not self.document_model.document_exists(doc_id):
+            return {
+                'success': False,
+                'message': '文档不存在',
+                'document': None
+            }
+        
+        return {
+            'success': True,
+            'message': '获取摘要成功',
+            'summary': self.summary_model.get_summary_by_doc_id(doc_id)
+        }
+    
+    def get_document_tags(self, doc_id: str) -> Dict[str, Any]:
+        """
+        获取文档标签（不读取文档其余信息）
+        
+        Args:
+            doc_id: 文档ID
+            
+        Returns:
+            标签列表
+        """
+        if not self.document_model.document_exists(doc_id):
+            return {
+                'success': False,
+                'message': '文档不存在',
+                'document': None
+            }
+        
+        return {
+            'success': True,
+            'message': '获取标签成功',
+            'tags': self.tag_model.get_tags_by_doc_id(doc_id)
+        }
+    
+    def get_document_entities(self, doc_id: str) -> Dict[str, Any]:
+        """
+        获取文档实体（不读取文档其余信息）
+        
+        Args:
+            doc_id: 文档ID
+            
+        Returns:
+            实体列表
+        """
+        if not self.document_model.document_exists(doc_id):
+            return {
+                'success': False,
+                'message': '文档不存在',
+                'document': None
+            }
+        
+        return {
+            'success': True,
+            'message': '获取实体成功',
+            'entities': self.entity_model.get_entities_by_doc_id(doc_id)
+        }
+    
     def update_document_info(self, doc_id: str, user_id: str, **kwargs) -> Dict[str, Any]:
         """
         更新文档信息
@@ -271,11 +358,11 @@ class DocumentService:
         Returns:
             文档列表
         """
-        documents = self.document_model.list_user_documents(user_id, include_deleted)
-        
-        # 应用分页
-        total = len(documents)
-        paginated_docs = documents[offset:offset + limit]
+        # 分页在SQL中完成，只读取当前页的文档
+        total = self.document_model.count_user_documents(user_id, include_deleted)
+        paginated_docs = list(self.document_model.iter_user_documents(
+            user_id, include_deleted, limit=limit, offset=offset
+        ))
         
         return {
             'success': True,
@@ -300,11 +387,8 @@ class DocumentService:
         Returns:
             搜索结果
         """
-        documents = self.document_model.search_documents(user_id, keyword, search_type)
-        
-        # 手动限制结果数量
-        if limit and len(documents) > limit:
-            documents = documents[:limit]
+        # 结果数量在SQL中限制
+        documents = self.document_model.search_documents(user_id, keyword, search_type, limit)
         
         return {
             'success': True,
@@ -442,6 +526,24 @@ class DocumentService:
                 'message': '实体添加失败'
             }
     
+    def get_dashboard(self, user_id: str) -> Dict[str, Any]:
+        """
+        获取首页数据（最近文档、热门实体、文档统计，并发查询）
+        
+        Args:
+            user_id: 用户ID
+            
+        Returns:
+            首页数据
+        """
+        dashboard = self.document_model.get_dashboard(user_id)
+        
+        return {
+            'success': True,
+            'message': '获取首页数据成功',
+            'dashboard': dashboard
+        }
+    
     def get_document_stats(self, user_id: Optional[str] = None) -> Dict[str, Any]:
         """
         获取文档统计信息